@@ -21,6 +21,7 @@ import joblib
 from fastapi import FastAPI, HTTPException, status
 from fastapi.responses import JSONResponse, RedirectResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
+import tensorflow as tf
 from tensorflow.keras.models import load_model
 
 # Adiciona o diretório raiz ao path para imports
@@ -40,6 +41,9 @@ from api.monitoring import get_prediction_logger, get_metrics_logger
 
 # Sistema de validação de performance (Fase 12)
 from src.performance_monitor import PerformanceMonitor
+from src.drift_detector import (
+    DRIFT_REPORTS, DRIFT_REPORTS_LEGACY, DRIFT_HISTORY_MAX, load_drift_reports
+)
 
 # Módulo de busca automática de dados (Fase 9)
 from api.data_fetcher import (
@@ -62,10 +66,31 @@ except ImportError:
 model = None
 scaler = None
 example_data = None  # Dados de exemplo pré-carregados
+predict_fn = None  # Função concreta de inferência (sem o laço de predict())
 WINDOW_SIZE = 60
 NUM_FEATURES = 5
 
 
+def _criar_predict_fn(modelo):
+    """
+    Compila a chamada direta do modelo em um tf.function com assinatura
+    fixa (None, 60, 5): o grafo é traçado uma vez e reutilizado, sem a
+    montagem de dataset/callbacks que model.predict faz a cada chamada.
+    """
+    @tf.function(input_signature=[
+        tf.TensorSpec((None, WINDOW_SIZE, NUM_FEATURES), tf.float32)
+    ])
+    def _predict(x):
+        return modelo(x, training=False)
+    
+    return _predict
+
+
+def prever(dados_lstm: np.ndarray) -> np.ndarray:
+    """Predição normalizada, shape (batch, 1), para dados (batch, 60, 5)."""
+    return predict_fn(tf.constant(dados_lstm, dtype=tf.float32)).numpy()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -74,7 +99,7 @@ async def lifespan(app: FastAPI):
     Carrega o modelo e scaler na inicialização e libera recursos
     no encerramento.
     """
-    global model, scaler, example_data
+    global model, scaler, example_data, predict_fn
     
     # Startup: Carregar modelo e scaler
     print("🚀 Iniciando API...")
@@ -82,7 +107,10 @@ async def lifespan(app: FastAPI):
     
     try:
         # Caminhos dos artefatos
-        model_path = ROOT_DIR / "models" / "lstm_model_best.h5"
+        model_path = ROOT_DIR / "models" / "lstm_model_best.keras"
+        if not model_path.exists():
+            # Modelos treinados antes da migração para o formato .keras
+            model_path = ROOT_DIR / "models" / "lstm_model_best.h5"
         scaler_path = ROOT_DIR / "models" / "scaler.pkl"
         example_path = ROOT_DIR / "data" / "processed" / "example_input.npy"
         
@@ -96,6 +124,7 @@ async def lifespan(app: FastAPI):
         # Carregar modelo
         print(f"   └─ Carregando modelo: {model_path}")
         model = load_model(str(model_path))
+        predict_fn = _criar_predict_fn(model)
         print(f"   ✅ Modelo carregado com sucesso!")
         
         # Carregar scaler
@@ -122,6 +151,7 @@ async def lifespan(app: FastAPI):
     # Shutdown: Limpar recursos
     print("\n🛑 Encerrando API...")
     model = None
+    predict_fn = None
     scaler = None
     print("✅ Recursos liberados.")
 
@@ -468,7 +498,7 @@ async def fazer_previsao(previsao_input: PrevisaoInput) -> PrevisaoOutput:
         dados_lstm = dados_normalizados.reshape(1, WINDOW_SIZE, NUM_FEATURES)
         
         # Fazer previsão
-        predicao_normalizada = model.predict(dados_lstm, verbose=0)
+        predicao_normalizada = prever(dados_lstm)
         
         # Desnormalizar a previsão
         # O modelo retorna shape (1, 1) mas scaler espera (1, 5)
@@ -593,7 +623,7 @@ async def fazer_previsao_auto(previsao_input: PrevisaoAutoInput) -> PrevisaoOutp
         dados_lstm = dados_normalizados.reshape(1, WINDOW_SIZE, NUM_FEATURES)
         
         # Fazer previsão
-        predicao_normalizada = model.predict(dados_lstm, verbose=0)
+        predicao_normalizada = prever(dados_lstm)
         
         # Desnormalizar a previsão
         # Criar array com shape correto para inverse_transform
@@ -726,7 +756,7 @@ async def fazer_previsao_exemplo() -> PrevisaoOutput:
         dados_lstm = example_data.reshape(1, WINDOW_SIZE, NUM_FEATURES)
         
         # Fazer previsão
-        predicao_normalizada = model.predict(dados_lstm, verbose=0)
+        predicao_normalizada = prever(dados_lstm)
         
         # Desnormalizar
         predicao_array = np.zeros((1, NUM_FEATURES))
@@ -979,7 +1009,6 @@ async def get_drift_status() -> Dict[str, Any]:
     Returns:
         Análise de drift em tempo real
     """
-    import json
     import yfinance as yf
     from datetime import timedelta
     
@@ -1022,58 +1051,56 @@ async def get_drift_status() -> Dict[str, Any]:
                 df = None
         
         if df is None or df.empty:
-            # Fallback: tentar usar dados do arquivo drift_reports.json se existir
-            reports_path = ROOT_DIR / "monitoring" / "drift_reports.json"
-            if reports_path.exists():
+            # Fallback: tentar usar os relatórios de drift já persistidos
+            if DRIFT_REPORTS.exists() or DRIFT_REPORTS_LEGACY.exists():
                 try:
-                    with open(reports_path, 'r', encoding='utf-8') as f:
-                        drift_data = json.load(f)
-                        recent_reports = drift_data.get("reports", [])
+                    # Resumo sobre os últimos DRIFT_HISTORY_MAX relatórios
+                    recent_reports = load_drift_reports(DRIFT_HISTORY_MAX)
+                    
+                    if recent_reports:
+                        # Retorna último report como cache
+                        last_report = recent_reports[-1]
+                        
+                        # Configuração da janela deslizante
+                        reference_window = 30  # dias
+                        current_window = 7     # dias
+                        mean_threshold = 5.0   # %
+                        std_threshold = 50.0   # %
                         
-                        if recent_reports:
-                            # Retorna último report como cache
-                            last_report = recent_reports[-1]
-                            
-                            # Configuração da janela deslizante
-                            reference_window = 30  # dias
-                            current_window = 7     # dias
-                            mean_threshold = 5.0   # %
-                            std_threshold = 50.0   # %
-                            
-                            return {
-                                "status": "active",
-                                "approach": "sliding_window",
-                                "timestamp": datetime.now().isoformat(),
-                                "ticker": "B3SA3.SA",
-                                "drift_detected": last_report.get("drift_detected", False),
-                                "severity": "medium" if last_report.get("drift_detected") else "none",
-                                "alerts": last_report.get("alerts", []) if last_report.get("alerts") else ["⚠️ Dados do cache local (Yahoo Finance temporariamente indisponível)"],
-                                "current_window": {
-                                    "period": "Último cache disponível",
-                                    "days": current_window,
-                                    "stats": last_report.get("current_stats", {})
-                                },
-                                "reference_window": {
-                                    "period": "Dados do cache",
-                                    "days": reference_window,
-                                    "stats": last_report.get("reference_stats", {})
-                                },
-                                "comparisons": last_report.get("comparisons", {}),
-                                "summary": {
-                                    "total_checks": len(recent_reports),
-                                    "drift_detected_count": sum(1 for r in recent_reports if r.get("drift_detected", False)),
-                                    "drift_rate": round(sum(1 for r in recent_reports if r.get("drift_detected", False)) / len(recent_reports) * 100, 1) if len(recent_reports) > 0 else 0
-                                },
-                                "configuration": {
-                                    "reference_window_days": reference_window,
-                                    "current_window_days": current_window,
-                                    "mean_threshold_pct": mean_threshold,
-                                    "std_threshold_pct": std_threshold
-                                },
-                                "recent_reports": recent_reports[-10:],
-                                "cache_mode": True,
-                                "cache_timestamp": last_report.get("timestamp", "unknown")
-                            }
+                        return {
+                            "status": "active",
+                            "approach": "sliding_window",
+                            "timestamp": datetime.now().isoformat(),
+                            "ticker": "B3SA3.SA",
+                            "drift_detected": last_report.get("drift_detected", False),
+                            "severity": "medium" if last_report.get("drift_detected") else "none",
+                            "alerts": last_report.get("alerts", []) if last_report.get("alerts") else ["⚠️ Dados do cache local (Yahoo Finance temporariamente indisponível)"],
+                            "current_window": {
+                                "period": "Último cache disponível",
+                                "days": current_window,
+                                "stats": last_report.get("current_stats", {})
+                            },
+                            "reference_window": {
+                                "period": "Dados do cache",
+                                "days": reference_window,
+                                "stats": last_report.get("reference_stats", {})
+                            },
+                            "comparisons": last_report.get("comparisons", {}),
+                            "summary": {
+                                "total_checks": len(recent_reports),
+                                "drift_detected_count": sum(1 for r in recent_reports if r.get("drift_detected", False)),
+                                "drift_rate": round(sum(1 for r in recent_reports if r.get("drift_detected", False)) / len(recent_reports) * 100, 1) if len(recent_reports) > 0 else 0
+                            },
+                            "configuration": {
+                                "reference_window_days": reference_window,
+                                "current_window_days": current_window,
+                                "mean_threshold_pct": mean_threshold,
+                                "std_threshold_pct": std_threshold
+                            },
+                            "recent_reports": recent_reports[-10:],
+                            "cache_mode": True,
+                            "cache_timestamp": last_report.get("timestamp", "unknown")
+                        }
                 except Exception as e:
                     pass  # Se falhar ao ler cache, continua para retornar erro
             
@@ -1144,18 +1171,11 @@ async def get_drift_status() -> Dict[str, Any]:
         current_period = f"{df.index[-current_window].strftime('%d/%m/%Y')} a {df.index[-1].strftime('%d/%m/%Y')}"
         ref_period = f"{df.index[start_ref].strftime('%d/%m/%Y')} a {df.index[end_ref-1].strftime('%d/%m/%Y')}"
         
-        # Carrega histórico
-        reports_path = ROOT_DIR / "monitoring" / "drift_reports.json"
-        recent_reports = []
-        total_checks = 0
-        drift_count = 0
-        
-        if reports_path.exists():
-            with open(reports_path, 'r', encoding='utf-8') as f:
-                drift_data = json.load(f)
-                recent_reports = drift_data.get("reports", [])[-10:]
-                total_checks = len(drift_data.get("reports", []))
-                drift_count = sum(1 for r in drift_data.get("reports", []) if r.get("drift_detected", False))
+        # Carrega histórico (resumo sobre os últimos DRIFT_HISTORY_MAX relatórios)
+        all_reports = load_drift_reports(DRIFT_HISTORY_MAX)
+        recent_reports = all_reports[-10:]
+        total_checks = len(all_reports)
+        drift_count = sum(1 for r in all_reports if r.get("drift_detected", False))
         
         return {
             "status": "active",
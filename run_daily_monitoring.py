@@ -76,7 +76,7 @@ def run_daily_monitoring():
     # Verifica se há dados de referência
     if not drift_detector.reference_stats:
         print("⚠️  Estatísticas de referência não configuradas")
-        print("   Configure com: setup_reference_from_file()")
+        print("   Configure com: python setup_monitoring.py")
         drift_report = {}
     else:
         # Obtém resumo de drift
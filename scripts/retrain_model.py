@@ -5,7 +5,7 @@ Baixa dados atualizados do Yahoo Finance, treina novo modelo
 e compara com modelo existente antes de substituir.
 
 Uso:
-    python scripts/retrain_model.py [--dry-run] [--force]
+    python scripts/retrain_model.py [--dry-run] [--force] [--fp16 | --no-fp16]
 """
 
 import sys
@@ -21,35 +21,41 @@ ROOT_DIR = Path(__file__).parent.parent
 sys.path.append(str(ROOT_DIR))
 
 import numpy as np
-import pandas as pd
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
-# Imports do projeto
-from src.data_collection import coletar_dados_historicos
-from src.data_preparation import (
-    normalizar_dados,
-    criar_sequencias,
-    dividir_dados,
-    salvar_dados_preparados
-)
-from src.model_builder import construir_modelo_lstm, compilar_modelo
-from src.model_training import treinar_modelo, configurar_callbacks
+# Serializador JSON rápido (opcional)
+try:
+    import orjson
+    ORJSON_DISPONIVEL = True
+except ImportError:
+    ORJSON_DISPONIVEL = False
 
-# Importar API v8 como alternativa
+# Escrita de CSV em C++ multi-thread (opcional)
 try:
-    from src.yahoo_finance_v8 import coletar_dados_yahoo_v8
-    API_V8_DISPONIVEL = True
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+    PYARROW_DISPONIVEL = True
 except ImportError:
-    API_V8_DISPONIVEL = False
-    print("⚠️  API v8 não disponível, usando apenas coletar_dados_historicos")
+    PYARROW_DISPONIVEL = False
+
+# Os módulos do projeto (TensorFlow, pandas) são importados dentro de main()
+# para que --help não pague o custo de import.
 
 
 def calcular_metricas(y_true, y_pred):
-    """Calcula métricas de avaliação"""
-    mae = mean_absolute_error(y_true, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-    mape = np.mean(np.abs((y_true - y_pred) / y_true)) * 100
-    r2 = r2_score(y_true, y_pred)
+    """Calcula métricas de avaliação (MAE, RMSE, MAPE e R² a partir de um único resíduo)"""
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+    
+    diff = y_true - y_pred
+    abs_diff = np.abs(diff)
+    sq_diff = diff * diff
+    
+    mae = abs_diff.mean()
+    rmse = np.sqrt(sq_diff.mean())
+    mape = (abs_diff / np.abs(y_true)).mean() * 100
+    
+    desvio = y_true - y_true.mean()
+    r2 = 1.0 - sq_diff.sum() / (desvio * desvio).sum()
     
     return {
         'MAE': round(float(mae), 4),
@@ -59,9 +65,40 @@ def calcular_metricas(y_true, y_pred):
     }
 
 
+def salvar_csv(df, caminho):
+    """Salva DataFrame em CSV (índice vira coluna) usando pyarrow se disponível"""
+    if PYARROW_DISPONIVEL:
+        tabela = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+        pcsv.write_csv(tabela, caminho)
+    else:
+        df.to_csv(caminho)
+
+
+def compilar_inferencia(modelo, timesteps, num_features):
+    """
+    Compila a inferência do modelo em um tf.function com batch dinâmico.
+
+    A assinatura fixa (None, timesteps, features) evita re-tracing quando o
+    último batch tem tamanho diferente; a chamada de aquecimento faz o trace
+    uma única vez antes da avaliação.
+    """
+    import tensorflow as tf
+
+    @tf.function(input_signature=[
+        tf.TensorSpec((None, timesteps, num_features), tf.float32)
+    ])
+    def inferencia(x):
+        return modelo(x, training=False)
+
+    inferencia(tf.zeros((1, timesteps, num_features), dtype=tf.float32))
+    return inferencia
+
+
 def backup_modelo_atual(models_dir):
-    """Faz backup do modelo atual"""
-    modelo_path = models_dir / "lstm_model_best.h5"
+    """Faz backup do modelo atual (.keras ou, se ainda não migrado, .h5)"""
+    modelo_path = models_dir / "lstm_model_best.keras"
+    if not modelo_path.exists():
+        modelo_path = models_dir / "lstm_model_best.h5"
     scaler_path = models_dir / "scaler.pkl"
     
     if modelo_path.exists():
@@ -69,7 +106,7 @@ def backup_modelo_atual(models_dir):
         backup_dir = models_dir / "backups"
         backup_dir.mkdir(exist_ok=True)
         
-        shutil.copy2(modelo_path, backup_dir / f"lstm_model_{timestamp}.h5")
+        shutil.copy2(modelo_path, backup_dir / f"lstm_model_{timestamp}{modelo_path.suffix}")
         shutil.copy2(scaler_path, backup_dir / f"scaler_{timestamp}.pkl")
         
         print(f"✅ Backup criado: {timestamp}")
@@ -95,8 +132,15 @@ def salvar_metricas(metricas, models_dir):
     
     metricas['timestamp'] = datetime.now().isoformat()
     
-    with open(metrics_file, 'w') as f:
-        json.dump(metricas, f, indent=2)
+    if ORJSON_DISPONIVEL:
+        with open(metrics_file, 'wb') as f:
+            f.write(orjson.dumps(
+                metricas,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            ))
+    else:
+        with open(metrics_file, 'w') as f:
+            json.dump(metricas, f, indent=2)
     
     print(f"✅ Métricas salvas em {metrics_file}")
 
@@ -141,9 +185,26 @@ def main():
                        help='Ticker para treinar (padrão: B3SA3.SA)')
     parser.add_argument('--years', type=int, default=5,
                        help='Anos de histórico (padrão: 5)')
+    parser.add_argument('--fp16', action=argparse.BooleanOptionalAction,
+                       default=False,
+                       help='Treino em precisão mista FP16 (padrão: desativado)')
     
     args = parser.parse_args()
     
+    # Imports do projeto (pesados: TensorFlow via model_builder/model_training)
+    from src.data_collection import coletar_dados_historicos
+    from src.data_preparation import (
+        normalizar_dados,
+        criar_sequencias,
+        dividir_dados,
+        salvar_dados_preparados
+    )
+    from src.model_builder import construir_modelo_lstm, compilar_modelo, ativar_precisao_mista
+    from src.model_training import treinar_modelo, configurar_callbacks
+    
+    # Precisão mista: só compensa em GPUs com Tensor Cores
+    usar_fp16 = ativar_precisao_mista(args.fp16)
+    
     print("=" * 60)
     print("🔄 SCRIPT DE RE-TREINO AUTOMÁTICO")
     print("=" * 60)
@@ -151,6 +212,7 @@ def main():
     print(f"📈 Ticker: {args.ticker}")
     print(f"📊 Período: {args.years} anos")
     print(f"🧪 Dry Run: {'Sim' if args.dry_run else 'Não'}")
+    print(f"⚡ FP16: {'Sim' if usar_fp16 else 'Não'}")
     print("=" * 60)
     
     # Diretórios
@@ -173,7 +235,7 @@ def main():
         
         # Salvar dados coletados
         raw_file = raw_dir / f"{args.ticker}_atualizado.csv"
-        df.to_csv(raw_file)
+        salvar_csv(df, raw_file)
         print(f"✅ {len(df)} dias de dados coletados e salvos em {raw_file}")
         
         # 2. Preparar dados para LSTM
@@ -247,7 +309,7 @@ def main():
         # Configurar callbacks (salva o melhor modelo automaticamente)
         temp_dir = models_dir / "temp"
         temp_dir.mkdir(parents=True, exist_ok=True)
-        model_path = str(temp_dir / "lstm_model_best.h5")
+        model_path = str(temp_dir / "lstm_model_best.keras")
         callbacks = configurar_callbacks(model_path)
         
         # Treinar modelo
@@ -264,17 +326,18 @@ def main():
         # O modelo treinado foi salvo pelos callbacks, carregar o melhor
         from tensorflow.keras.models import load_model
         modelo_treinado = load_model(model_path)
-        y_pred = modelo_treinado.predict(X_test, verbose=0)
+        inferencia = compilar_inferencia(modelo_treinado, timesteps, num_features)
+        y_pred = inferencia(X_test.astype(np.float32)).numpy()
         
         # Desnormalizar previsões (scaler já disponível da etapa 2)
-        # Criar array dummy para desnormalizar apenas Close
-        dummy_train = np.zeros((len(y_test), 5))
-        dummy_train[:, 3] = y_test.flatten()
-        y_test_real = scaler.inverse_transform(dummy_train)[:, 3]
-        
-        dummy_pred = np.zeros((len(y_pred), 5))
-        dummy_pred[:, 3] = y_pred.flatten()
-        y_pred_real = scaler.inverse_transform(dummy_pred)[:, 3]
+        # Um único buffer dummy (reais + previstos) para desnormalizar apenas Close
+        n_test = len(y_test)
+        dummy = np.zeros((n_test + len(y_pred), num_features))
+        dummy[:n_test, 3] = y_test.ravel()
+        dummy[n_test:, 3] = y_pred.ravel()
+        close_real = scaler.inverse_transform(dummy)[:, 3]
+        y_test_real = close_real[:n_test]
+        y_pred_real = close_real[n_test:]
         
         # Calcular métricas
         metricas_novas = calcular_metricas(y_test_real, y_pred_real)
@@ -319,8 +382,8 @@ def main():
         backup_timestamp = backup_modelo_atual(models_dir)
         
         # Copiar novo modelo
-        temp_model = models_dir / "temp" / "lstm_model_best.h5"
-        final_model = models_dir / "lstm_model_best.h5"
+        temp_model = models_dir / "temp" / "lstm_model_best.keras"
+        final_model = models_dir / "lstm_model_best.keras"
         
         shutil.copy2(temp_model, final_model)
         # Scaler já foi salvo em models/scaler.pkl pela função salvar_dados_preparados
@@ -334,7 +397,7 @@ def main():
         shutil.rmtree(models_dir / "temp")
         
         print("\n✅ MODELO ATUALIZADO COM SUCESSO!")
-        print(f"   Backup anterior: backups/lstm_model_{backup_timestamp}.h5")
+        print(f"   Backup anterior: backups/lstm_model_{backup_timestamp}.*")
         print(f"   Novo modelo: {final_model}")
         
         # 9. Resumo
@@ -34,8 +34,8 @@ def main():
     print("Buscando últimas previsões (limit 5)...")
     preds = db.get_predictions(ticker=ticker, limit=5)
     print("Encontradas:", len(preds))
-    for p in preds:
-        print(p)
+    if preds:
+        sys.stdout.write("\n".join(map(str, preds)) + "\n")
 
     # Se possível, tentar validar (somente para teste)
     if preds:
@@ -4,52 +4,65 @@ Verifica se todos os imports e dependências estão corretos
 """
 
 import sys
+import inspect
+import importlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Adicionar src ao path
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.append(str(ROOT_DIR))
 
+# Módulos e funções exigidos pelo re-treino
+IMPORTS_REQUERIDOS = [
+    ("src.data_collection", ["coletar_dados_historicos"]),
+    ("src.data_preparation", [
+        "normalizar_dados",
+        "criar_sequencias",
+        "dividir_dados",
+        "salvar_dados_preparados"
+    ]),
+    ("src.model_training", ["construir_modelo_lstm", "treinar_modelo"]),
+]
+
+
+def _tentar_import(requisito):
+    """
+    Importa um módulo em processo separado e retorna as assinaturas das
+    funções pedidas (ou a mensagem de erro).
+    """
+    modulo, nomes = requisito
+    try:
+        mod = importlib.import_module(modulo)
+        assinaturas = {
+            nome: list(inspect.signature(getattr(mod, nome)).parameters)
+            for nome in nomes
+        }
+    except (ImportError, AttributeError) as e:
+        return modulo, nomes, None, str(e)
+    return modulo, nomes, assinaturas, None
+
+
 def main():
     print("🔍 Validando Sistema de Re-treino...\n")
     
-    # 1. Validar imports
+    # 1. Validar imports (em paralelo: cada módulo pesado em seu processo)
     print("1️⃣ Validando imports...")
-    try:
-        from src.data_collection import coletar_dados_historicos
-        print("   ✅ src.data_collection.coletar_dados_historicos")
-    except ImportError as e:
-        print(f"   ❌ Erro: {e}")
-        return False
+    with ProcessPoolExecutor(max_workers=len(IMPORTS_REQUERIDOS)) as executor:
+        resultados = list(executor.map(_tentar_import, IMPORTS_REQUERIDOS))
     
-    try:
-        from src.data_preparation import (
-            normalizar_dados,
-            criar_sequencias,
-            dividir_dados,
-            salvar_dados_preparados
-        )
-        print("   ✅ src.data_preparation.normalizar_dados")
-        print("   ✅ src.data_preparation.criar_sequencias")
-        print("   ✅ src.data_preparation.dividir_dados")
-        print("   ✅ src.data_preparation.salvar_dados_preparados")
-    except ImportError as e:
-        print(f"   ❌ Erro: {e}")
-        return False
-    
-    try:
-        from src.model_training import construir_modelo_lstm, treinar_modelo
-        print("   ✅ src.model_training.construir_modelo_lstm")
-        print("   ✅ src.model_training.treinar_modelo")
-    except ImportError as e:
-        print(f"   ❌ Erro: {e}")
-        return False
+    assinaturas = {}
+    for modulo, nomes, assinaturas_modulo, erro in resultados:
+        if erro:
+            print(f"   ❌ Erro: {erro}")
+            return False
+        for nome in nomes:
+            print(f"   ✅ {modulo}.{nome}")
+        assinaturas.update(assinaturas_modulo)
     
     # 2. Validar assinatura da função
     print("\n2️⃣ Validando assinatura de coletar_dados_historicos...")
-    import inspect
-    sig = inspect.signature(coletar_dados_historicos)
-    params = list(sig.parameters.keys())
+    params = assinaturas["coletar_dados_historicos"]
     expected = ['ticker', 'anos']
     
     if params == expected:
@@ -80,7 +80,7 @@ def setup_drift_detection():
    • Δ Volatilidade: {comparisons.get('std_diff_pct', 0):.1f}% (threshold: 50%)
 
 📁 Arquivos atualizados:
-   • monitoring/drift_reports.json
+   • monitoring/drift_reports.ndjson
    • monitoring/reference_statistics.json
 """)
     
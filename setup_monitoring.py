@@ -5,6 +5,7 @@ Configura estatísticas de referência para detecção de drift.
 Execute ANTES de colocar monitoramento em produção.
 """
 
+import os
 import sys
 import numpy as np
 import pandas as pd
@@ -17,60 +18,135 @@ sys.path.append(str(ROOT_DIR))
 from src.drift_detector import DriftDetector
 from src.alert_system import AlertSystem, AlertThresholds
 
+# Leitores CSV/Parquet colunares em C++ (opcional)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+    PYARROW_DISPONIVEL = True
+except ImportError:
+    PYARROW_DISPONIVEL = False
 
-def setup_drift_reference():
-    """Configura estatísticas de referência para drift detection."""
+# Linhas por bloco na leitura da referência de drift
+CHUNK_SIZE = 1_000_000
+
+
+def _listar_arquivos_dados(data_dir: Path) -> list:
+    """
+    Lista arquivos de dados com uma única varredura (os.scandir).
+    
+    Ordem: o mais recente primeiro; com a mesma data de modificação, o
+    Parquet vem antes do CSV. Assim um Parquet antigo não esconde um CSV
+    gravado depois. O filtro por extensão vem antes do stat, então só
+    arquivos de dados custam uma chamada de sistema.
+    """
+    extensoes = ('.parquet', '.csv') if PYARROW_DISPONIVEL else ('.csv',)
+    if not os.path.isdir(data_dir):
+        return []
+    
+    with os.scandir(data_dir) as entradas:
+        encontrados = [
+            (-entrada.stat().st_mtime_ns, entrada.name.endswith('.csv'), entrada.path)
+            for entrada in entradas
+            if entrada.name.endswith(extensoes) and entrada.is_file()
+        ]
+    
+    return [Path(caminho) for _, _, caminho in sorted(encontrados)]
+
+
+def _listar_colunas(data_file: Path) -> list:
+    """Lê apenas o cabeçalho/esquema do arquivo de dados."""
+    if data_file.suffix == '.parquet':
+        return pq.read_schema(data_file).names
+    return pd.read_csv(data_file, nrows=0).columns.tolist()
+
+
+def _iterar_close(data_file: Path, chunksize: int = CHUNK_SIZE):
+    """
+    Gera a coluna Close em blocos float32 (Parquet ou CSV), sem carregar
+    o arquivo inteiro em memória.
+    """
+    if data_file.suffix == '.parquet':
+        arquivo = pq.ParquetFile(data_file)
+        for batch in arquivo.iter_batches(batch_size=chunksize, columns=['Close']):
+            yield batch.column(0).to_numpy(zero_copy_only=False).astype(np.float32, copy=False)
+        return
+    
+    if PYARROW_DISPONIVEL:
+        leitor = pacsv.open_csv(
+            data_file,
+            convert_options=pacsv.ConvertOptions(
+                include_columns=['Close'],
+                column_types={'Close': pa.float32()}
+            )
+        )
+        for batch in leitor:
+            yield batch.column(0).to_numpy(zero_copy_only=False)
+        return
+    
+    for bloco in pd.read_csv(data_file, usecols=['Close'], dtype={'Close': np.float32},
+                             engine='c', chunksize=chunksize):
+        yield bloco['Close'].to_numpy()
+
+
+def setup_drift_reference(detector: DriftDetector = None):
+    """
+    Configura estatísticas de referência para drift detection.
+    
+    Retorna o DriftDetector configurado (reaproveitado nas fases seguintes)
+    ou None em caso de falha.
+    """
     print("\n" + "="*70)
     print("🔧 SETUP: Configuração de Referência para Drift Detection")
     print("="*70)
     
-    # Busca arquivo de dados processados
+    # Busca arquivo de dados processados; sem eles, usa a coleta da Fase 1
+    # (data_collection grava o CSV e a cópia Parquet em data/raw)
     data_dir = ROOT_DIR / "data" / "processed"
+    raw_dir = ROOT_DIR / "data" / "raw"
     
-    # Lista arquivos CSV disponíveis
-    csv_files = list(data_dir.glob("*.csv"))
+    # Lista arquivos disponíveis (mais recente primeiro; Parquet no empate)
+    data_files = _listar_arquivos_dados(data_dir) or _listar_arquivos_dados(raw_dir)
     
-    if not csv_files:
-        print("\n❌ Nenhum arquivo CSV encontrado em data/processed/")
+    if not data_files:
+        print("\n❌ Nenhum arquivo CSV/Parquet encontrado em data/processed/ ou data/raw/")
         print("   Execute primeiro: python src/data_collection.py")
-        return False
+        return None
     
     print(f"\n📂 Arquivos encontrados:")
-    for i, f in enumerate(csv_files, 1):
-        print(f"   {i}. {f.name}")
+    for i, f in enumerate(data_files, 1):
+        print(f"   {i}. {f.relative_to(ROOT_DIR)}")
     
     # Usa o primeiro (mais recente)
-    data_file = csv_files[0]
-    print(f"\n✅ Usando: {data_file.name}")
+    data_file = data_files[0]
+    print(f"\n✅ Usando: {data_file.relative_to(ROOT_DIR)}")
     
-    # Carrega dados
+    # Carrega dados (apenas o cabeçalho para validar colunas)
     print(f"📊 Carregando dados...")
-    df = pd.read_csv(data_file)
+    colunas = _listar_colunas(data_file)
     
     # Usa coluna Close para referência
-    if 'Close' not in df.columns:
+    if 'Close' not in colunas:
         print(f"\n❌ Coluna 'Close' não encontrada")
-        print(f"   Colunas disponíveis: {df.columns.tolist()}")
-        return False
-    
-    close_prices = df['Close'].values
+        print(f"   Colunas disponíveis: {colunas}")
+        return None
     
-    print(f"   Total de amostras: {len(close_prices)}")
-    print(f"   Range: R$ {close_prices.min():.2f} - R$ {close_prices.max():.2f}")
-    print(f"   Média: R$ {close_prices.mean():.2f}")
+    # Configura detector: estatísticas acumuladas bloco a bloco (memória constante)
+    detector = detector or DriftDetector()
+    ref_stats = detector.set_reference_statistics_streaming(_iterar_close(data_file))
     
-    # Configura detector
-    detector = DriftDetector()
-    detector.set_reference_statistics(close_prices)
+    print(f"   Total de amostras: {ref_stats['n_samples']}")
+    print(f"   Range: R$ {ref_stats['min']:.2f} - R$ {ref_stats['max']:.2f}")
+    print(f"   Média: R$ {ref_stats['mean']:.2f}")
     
     print(f"\n✅ Estatísticas de referência configuradas!")
     print(f"   Arquivo: monitoring/reference_statistics.json")
     
-    return True
+    return detector
 
 
 def setup_alert_thresholds():
-    """Configura thresholds de alerta."""
+    """Configura thresholds de alerta e retorna o AlertSystem criado."""
     print("\n" + "="*70)
     print("🔧 SETUP: Configuração de Thresholds de Alerta")
     print("="*70)
@@ -94,7 +170,7 @@ def setup_alert_thresholds():
     
     print(f"\n   Arquivo de config: monitoring/alert_config.json")
     
-    return True
+    return alert_system
 
 
 def verify_directories():
@@ -109,7 +185,7 @@ def verify_directories():
     ]
     
     for d in dirs:
-        if not d.exists():
+        if not os.path.isdir(d):
             d.mkdir(parents=True, exist_ok=True)
             print(f"   ✅ Criado: {d.relative_to(ROOT_DIR)}/")
         else:
@@ -118,31 +194,37 @@ def verify_directories():
     return True
 
 
-def test_monitoring_components():
-    """Testa componentes básicos do monitoramento."""
+def test_monitoring_components(detector: DriftDetector = None, alerts: AlertSystem = None):
+    """
+    Testa componentes básicos do monitoramento.
+    
+    Instâncias já criadas nas fases anteriores são reaproveitadas, evitando
+    reler a referência de drift e o histórico de alertas do disco.
+    """
     print("\n" + "="*70)
     print("🧪 TESTE: Componentes de Monitoramento")
     print("="*70)
     
     try:
-        # 1. Test logging
+        # Importados aqui: uma dependência ausente é reportada por este
+        # passo (e importar o módulo não cria logs/ nem carrega yfinance)
         from api.monitoring import get_prediction_logger
+        from src.performance_monitor import PerformanceMonitor
+        
+        # 1. Test logging
         logger = get_prediction_logger()
         print(f"   ✅ PredictionLogger: OK")
         
         # 2. Test performance monitor
-        from src.performance_monitor import PerformanceMonitor
         monitor = PerformanceMonitor()
         print(f"   ✅ PerformanceMonitor: OK")
         
         # 3. Test drift detector
-        from src.drift_detector import DriftDetector
-        detector = DriftDetector()
+        detector = detector or DriftDetector()
         print(f"   ✅ DriftDetector: OK")
         
         # 4. Test alert system
-        from src.alert_system import AlertSystem
-        alerts = AlertSystem()
+        alerts = alerts or AlertSystem()
         print(f"   ✅ AlertSystem: OK")
         
         print(f"\n✅ Todos os componentes funcionando!")
@@ -170,15 +252,15 @@ def main():
         success = False
     
     # 2. Configura drift reference
-    if not setup_drift_reference():
+    detector = setup_drift_reference()
+    if detector is None:
         success = False
     
     # 3. Configura alert thresholds
-    if not setup_alert_thresholds():
-        success = False
+    alert_system = setup_alert_thresholds()
     
-    # 4. Testa componentes
-    if not test_monitoring_components():
+    # 4. Testa componentes (reaproveita as instâncias das fases anteriores)
+    if not test_monitoring_components(detector, alert_system):
         success = False
     
     # Resumo final
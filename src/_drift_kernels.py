@@ -0,0 +1,79 @@
+"""
+Kernels numéricos do detector de drift.
+
+Calcula as estatísticas de janela de várias features (colunas) de uma vez:
+cada coluna é ordenada uma única vez e percorrida em uma única passada
+(Welford para média/desvio). Com numba, as colunas são processadas em
+paralelo (prange); sem numba, um fallback NumPy produz os mesmos campos.
+welford_min_max faz o mesmo para um único array grande, sem ordenar.
+"""
+
+import numpy as np
+
+# Compilação JIT (opcional) para lotes com muitas features
+try:
+    from numba import njit, prange
+    NUMBA_DISPONIVEL = True
+except ImportError:
+    NUMBA_DISPONIVEL = False
+
+# Quantis calculados por coluna, na ordem das linhas de out_quantis
+QUANTIS = (0.5, 0.25, 0.75)
+
+
+if NUMBA_DISPONIVEL:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def batch_window_stats(data2d, out_mean, out_std, out_min, out_max, out_quantis):
+        """Preenche as estatísticas de cada coluna de data2d (colunas em paralelo)."""
+        n, n_features = data2d.shape
+        ultimo = n - 1
+        for j in prange(n_features):
+            col = np.sort(data2d[:, j])
+
+            media = 0.0
+            m2 = 0.0
+            for i in range(n):
+                v = col[i]
+                d = v - media
+                media += d / (i + 1)
+                m2 += d * (v - media)
+
+            out_mean[j] = media
+            out_std[j] = np.sqrt(m2 / n)
+            out_min[j] = col[0]
+            out_max[j] = col[ultimo]
+
+            for k in range(len(QUANTIS)):
+                pos = QUANTIS[k] * ultimo
+                baixo = int(pos)
+                alto = min(baixo + 1, ultimo)
+                out_quantis[k, j] = col[baixo] + (col[alto] - col[baixo]) * (pos - baixo)
+
+    @njit(cache=True)
+    def welford_min_max(x):
+        """Média, desvio (populacional), mínimo e máximo em uma única passada."""
+        media = 0.0
+        m2 = 0.0
+        mn = np.inf
+        mx = -np.inf
+        for i in range(x.shape[0]):
+            v = x[i]
+            d = v - media
+            media += d / (i + 1)
+            m2 += d * (v - media)
+            mn = min(mn, v)
+            mx = max(mx, v)
+        return media, np.sqrt(m2 / x.shape[0]), mn, mx
+else:
+    def batch_window_stats(data2d, out_mean, out_std, out_min, out_max, out_quantis):
+        """Preenche as estatísticas de cada coluna de data2d (fallback NumPy)."""
+        col = np.sort(data2d, axis=0)
+        out_mean[:] = col.mean(axis=0)
+        out_std[:] = col.std(axis=0)
+        out_min[:] = col[0]
+        out_max[:] = col[-1]
+        out_quantis[:] = np.percentile(col, [q * 100 for q in QUANTIS], axis=0)
+
+    def welford_min_max(x):
+        """Média, desvio (populacional), mínimo e máximo (fallback NumPy)."""
+        return x.mean(), x.std(), x.min(), x.max()
@@ -0,0 +1,160 @@
+"""
+ADWIN (ADaptive WINdowing) - Janela Adaptativa para Detecção de Mudanças
+
+Implementa o ADWIN2 (Bifet & Gavaldà, 2007): a janela cresce enquanto os
+dados são estacionários e é cortada quando duas sub-janelas têm médias
+diferentes além do limite de Hoeffding.
+
+A janela é guardada como um histograma exponencial: buckets de 2^i
+elementos com (total, M2), no máximo ``max_buckets`` por nível. Cada
+inserção custa O(1) amortizado e o teste de corte percorre só as
+fronteiras de bucket, O(log n), em vez de reprocessar a janela inteira.
+"""
+
+import math
+from collections import deque
+from typing import List
+
+
+class ADWIN:
+    """
+    Detector de mudança com janela adaptativa (ADWIN2).
+
+    Uso:
+        adwin = ADWIN()
+        for preco in precos:
+            if adwin.update(preco):
+                print("Mudança detectada; janela atual:", adwin.width)
+    """
+
+    def __init__(
+        self,
+        delta: float = 0.002,
+        max_buckets: int = 5,
+        clock: int = 32,
+        min_window: int = 5
+    ):
+        """
+        Inicializa o ADWIN.
+
+        Args:
+            delta: Confiança do teste de corte (menor = menos falsos alarmes)
+            max_buckets: Buckets por nível do histograma exponencial (M)
+            clock: Intervalo, em inserções, entre testes de corte
+            min_window: Tamanho mínimo de cada sub-janela testada
+        """
+        self.delta = delta
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self.min_window = min_window
+
+        # _niveis[i]: buckets de 2^i elementos, do mais antigo ao mais novo
+        self._niveis: List[deque] = []
+        self.width = 0
+        self._total = 0.0
+        self._m2 = 0.0
+        self._tick = 0
+        self.drift_detected = False
+
+    @property
+    def mean(self) -> float:
+        """Média da janela atual."""
+        return self._total / self.width if self.width else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Variância (populacional) da janela atual."""
+        return self._m2 / self.width if self.width else 0.0
+
+    def update(self, value: float) -> bool:
+        """
+        Insere um valor e testa se houve mudança na janela.
+
+        Args:
+            value: Nova observação
+
+        Returns:
+            True se a janela foi cortada (mudança detectada)
+        """
+        value = float(value)
+        if self.width:
+            delta_media = value - self.mean
+            self._m2 += delta_media * delta_media * self.width / (self.width + 1)
+        self.width += 1
+        self._total += value
+
+        if not self._niveis:
+            self._niveis.append(deque())
+        self._niveis[0].append((value, 0.0))
+        self._comprimir()
+
+        self.drift_detected = False
+        self._tick += 1
+        if self._tick % self.clock == 0 and self.width >= 2 * self.min_window:
+            while self._testar_corte():
+                self._remover_mais_antigo()
+                self.drift_detected = True
+
+        return self.drift_detected
+
+    def _comprimir(self):
+        """Junta os dois buckets mais antigos de cada nível que excedeu M."""
+        nivel = 0
+        while nivel < len(self._niveis) and len(self._niveis[nivel]) > self.max_buckets:
+            n = 2 ** nivel
+            total_a, m2_a = self._niveis[nivel].popleft()
+            total_b, m2_b = self._niveis[nivel].popleft()
+            diff = total_a / n - total_b / n
+            bucket = (total_a + total_b, m2_a + m2_b + diff * diff * n / 2)
+
+            if nivel + 1 == len(self._niveis):
+                self._niveis.append(deque())
+            self._niveis[nivel + 1].append(bucket)
+            nivel += 1
+
+    def _testar_corte(self) -> bool:
+        """
+        Percorre as fronteiras de bucket (do mais antigo ao mais novo) e
+        verifica se |μ_antiga - μ_recente| excede ε_cut de Hoeffding.
+        """
+        n0 = 0
+        total0 = 0.0
+        ln_termo = math.log(2 * math.log(self.width) / self.delta)
+        variancia = self.variance
+
+        for nivel in range(len(self._niveis) - 1, -1, -1):
+            tamanho = 2 ** nivel
+            for total_bucket, _ in self._niveis[nivel]:
+                n0 += tamanho
+                total0 += total_bucket
+                n1 = self.width - n0
+                if n1 < self.min_window:
+                    return False
+                if n0 < self.min_window:
+                    continue
+
+                m = 1.0 / (1.0 / n0 + 1.0 / n1)
+                epsilon = math.sqrt(2.0 / m * variancia * ln_termo) + 2.0 / (3.0 * m) * ln_termo
+                if abs(total0 / n0 - (self._total - total0) / n1) > epsilon:
+                    return True
+        return False
+
+    def _remover_mais_antigo(self):
+        """Descarta o bucket mais antigo e desconta-o dos agregados da janela."""
+        nivel = len(self._niveis) - 1
+        total_b, m2_b = self._niveis[nivel].popleft()
+        while self._niveis and not self._niveis[-1]:
+            self._niveis.pop()
+
+        n_b = 2 ** nivel
+        n_resto = self.width - n_b
+        total_resto = self._total - total_b
+        if n_resto:
+            diff = total_b / n_b - total_resto / n_resto
+            self._m2 -= m2_b + diff * diff * n_b * n_resto / self.width
+        else:
+            self._m2 = 0.0
+        self._m2 = max(self._m2, 0.0)
+
+        self.width = n_resto
+        self._total = total_resto
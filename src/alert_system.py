@@ -5,22 +5,114 @@ Envia notificações quando métricas ultrapassam thresholds definidos.
 Suporta múltiplos canais: logs, Slack, email.
 """
 
+import gzip
 import json
+import queue
+import bisect
+import itertools
+import atexit
+import functools
+import os
+import threading
+import time
+import weakref
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import Counter, deque
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 
+# Serializador JSON rápido (opcional)
+try:
+    import orjson
+    ORJSON_DISPONIVEL = True
+except ImportError:
+    ORJSON_DISPONIVEL = False
+
 
 # Diretórios
 ROOT_DIR = Path(__file__).parent.parent
 MONITORING_DIR = ROOT_DIR / "monitoring"
-MONITORING_DIR.mkdir(exist_ok=True)
 
 # Configurações
 ALERT_CONFIG = MONITORING_DIR / "alert_config.json"
 ALERT_HISTORY = MONITORING_DIR / "alert_history.json"
+# Log incremental (um alerta por linha) consolidado no JSON a cada flush
+ALERT_HISTORY_LOG = ALERT_HISTORY.with_suffix(".jsonl")
+HISTORY_FLUSH_EVERY = 50  # Alertas acumulados antes de reescrever o JSON
+# Janela de alertas mantida em memória/JSON; os mais antigos vão para o arquivo
+HISTORY_MAX_ALERTS = 10_000
+ALERT_ARCHIVE = MONITORING_DIR / "alert_history_archive.jsonl.gz"
+
+# Mensagens de violação (formatos pré-definidos)
+MSG_MAE_ALTO = "MAE alto: {:.4f} > {}"
+MSG_MAPE_ALTO = "MAPE alto: {:.2f}% > {}%"
+MSG_DRIFT = "Drift: {}"
+
+NS_POR_HORA = 3_600_000_000_000
+
+# Instâncias vivas, fechadas ao encerrar o processo (referências fracas:
+# o hook não impede a coleta de um AlertSystem descartado)
+_INSTANCES = weakref.WeakSet()
+# Serializa a reescrita do log incremental compartilhado entre instâncias
+_LOG_LOCK = threading.Lock()
+
+
+@atexit.register
+def _close_all():
+    """Fecha as instâncias ainda vivas ao encerrar o processo."""
+    for instance in list(_INSTANCES):
+        instance.close()
+
+
+_monitoring_dir_ok = False
+
+
+def _ensure_monitoring_dir():
+    """Cria monitoring/ na primeira escrita (sem syscall em tempo de import)."""
+    global _monitoring_dir_ok
+    if not _monitoring_dir_ok:
+        MONITORING_DIR.mkdir(parents=True, exist_ok=True)
+        _monitoring_dir_ok = True
+
+
+def _epoch_ns(timestamp) -> int:
+    """Normaliza timestamp de alerta para epoch em ns (aceita ISO legado)."""
+    if isinstance(timestamp, str):
+        return int(datetime.fromisoformat(timestamp).timestamp() * 1e9)
+    return timestamp
+
+
+def _iso(timestamp_ns: int) -> str:
+    """Formata epoch em ns como ISO 8601 (hora local) para exibição."""
+    return datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
+
+
+@functools.lru_cache(maxsize=8)
+def _read_json_cached(path: Path, mtime_ns: int, size: int) -> Dict:
+    """
+    Lê e faz parse de um JSON, memoizado por (caminho, mtime, tamanho).
+    
+    Qualquer escrita no arquivo muda mtime/tamanho e gera nova entrada,
+    então não é preciso invalidar o cache manualmente.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _read_json(path: Path) -> Dict:
+    """
+    Retorna cópia rasa do JSON em cache.
+    
+    O chamador pode trocar chaves do nível de cima; valores aninhados são
+    compartilhados com o cache e precisam ser copiados antes de alterados.
+    """
+    stat = path.stat()
+    return dict(_read_json_cached(path, stat.st_mtime_ns, stat.st_size))
 
 
 @dataclass
@@ -44,6 +136,14 @@ class AlertSystem:
     - Mantém histórico de alertas
     """
     
+    # Emoji do Slack por severidade
+    SLACK_EMOJI = {
+        "INFO": ":information_source:",
+        "WARNING": ":warning:",
+        "CRITICAL": ":rotating_light:"
+    }
+    SLACK_HEADERS = {"Content-Type": "application/json"}
+    
     def __init__(self, thresholds: AlertThresholds = None):
         """
         Inicializa o sistema de alertas.
@@ -53,7 +153,40 @@ class AlertSystem:
         """
         self.thresholds = thresholds or AlertThresholds()
         self.config = self._load_config()
+        # Alertas que saíram da janela; vão para o arquivo no próximo flush,
+        # junto com a reescrita do JSON que deixa de contê-los
+        self._to_archive = []
+        # Linhas do log incremental pelas quais esta instância responde
+        # (gravadas ou reaplicadas por ela); só elas são removidas no flush
+        self._logged_lines = set()
         self.history = self._load_history()
+        self._unflushed = len(self._logged_lines)
+        
+        # Epoch (ns) de cada alerta (mesma ordem do histórico) para busca
+        # binária. Lista com acesso O(1) por índice: despejos só avançam
+        # _ts_inicio, e o prefixo morto é compactado a cada janela cheia
+        self._timestamps = [alert["timestamp"] for alert in self.history["alerts"]]
+        self._ts_inicio = 0
+        
+        # Contadores mantidos incrementalmente para get_alert_summary
+        self._by_type = Counter(alert["type"] for alert in self.history["alerts"])
+        self._by_severity = Counter(alert["severity"] for alert in self.history["alerts"])
+        
+        # Entrega Slack/email em thread de fundo (iniciada no primeiro alerta remoto)
+        self._queue = queue.Queue()
+        self._worker = None
+        _INSTANCES.add(self)
+        
+        # Sessão HTTP persistente: reutiliza a conexão TLS com o webhook
+        self._http = requests.Session()
+        self._http.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=4,
+                max_retries=Retry(total=2, backoff_factor=0.2)
+            )
+        )
     
     def _load_config(self) -> Dict:
         """
@@ -63,8 +196,7 @@ class AlertSystem:
             Dicionário com configurações
         """
         if ALERT_CONFIG.exists():
-            with open(ALERT_CONFIG, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _read_json(ALERT_CONFIG)
         
         # Configuração padrão
         default_config = {
@@ -81,6 +213,7 @@ class AlertSystem:
             "enable_logs": True
         }
         
+        _ensure_monitoring_dir()
         with open(ALERT_CONFIG, 'w', encoding='utf-8') as f:
             json.dump(default_config, f, indent=2)
         
@@ -90,18 +223,143 @@ class AlertSystem:
         """
         Carrega histórico de alertas.
         
+        Lê o JSON consolidado e reaplica os alertas do log incremental
+        ainda não consolidados. Alertas além de HISTORY_MAX_ALERTS saem da
+        janela e são arquivados no próximo flush. Timestamps ISO de
+        históricos antigos são convertidos para epoch em ns.
+        
         Returns:
             Dicionário com histórico
         """
+        history = {"alerts": []}
         if ALERT_HISTORY.exists():
-            with open(ALERT_HISTORY, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"alerts": []}
+            history = _read_json(ALERT_HISTORY)
+        
+        # Cópia de cada alerta: os dicts do cache são compartilhados entre instâncias
+        alerts = deque(dict(alert) for alert in history.get("alerts", []))
+        if ALERT_HISTORY_LOG.exists():
+            with open(ALERT_HISTORY_LOG, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if line.strip():
+                        alerts.append(json.loads(line))
+                        self._logged_lines.add(line)
+        
+        for alert in alerts:
+            alert["timestamp"] = _epoch_ns(alert["timestamp"])
+        
+        while len(alerts) > HISTORY_MAX_ALERTS:
+            self._to_archive.append(alerts.popleft())
+        
+        history["alerts"] = deque(alerts, maxlen=HISTORY_MAX_ALERTS)
+        return history
+    
+    def _write_archive(self):
+        """
+        Acrescenta ao arquivo compactado os alertas que saíram da janela.
+        
+        Chamado só em flush(), imediatamente antes de reescrever o JSON:
+        cada alerta é arquivado uma única vez, no mesmo passo que o remove
+        do histórico persistido.
+        """
+        if not self._to_archive:
+            return
+        _ensure_monitoring_dir()
+        with gzip.open(ALERT_ARCHIVE, 'at', encoding='utf-8') as f:
+            f.writelines(json.dumps(alert, ensure_ascii=False) + "\n"
+                         for alert in self._to_archive)
+        self._to_archive.clear()
+    
+    def _evict_oldest(self):
+        """Tira o alerta mais antigo da janela e desconta-o dos contadores."""
+        oldest = self.history["alerts"].popleft()
+        self._ts_inicio += 1
+        if self._ts_inicio >= HISTORY_MAX_ALERTS:
+            del self._timestamps[:self._ts_inicio]
+            self._ts_inicio = 0
+        self._by_type[oldest["type"]] -= 1
+        self._by_severity[oldest["severity"]] -= 1
+        self._to_archive.append(oldest)
+    
+    def _save_history(self, alert: Dict):
+        """
+        Registra um novo alerta no log incremental (append de uma linha).
+        
+        O JSON completo só é reescrito a cada HISTORY_FLUSH_EVERY alertas,
+        em flush() ou ao encerrar o processo.
+        
+        Args:
+            alert: Alerta recém-adicionado ao histórico
+        """
+        line = json.dumps(alert, ensure_ascii=False)
+        _ensure_monitoring_dir()
+        with _LOG_LOCK, open(ALERT_HISTORY_LOG, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+        self._logged_lines.add(line)
+        
+        self._unflushed += 1
+        if self._unflushed >= HISTORY_FLUSH_EVERY:
+            self.flush()
     
-    def _save_history(self):
-        """Salva histórico de alertas."""
+    def flush(self):
+        """
+        Consolida o histórico em memória no JSON e limpa o log incremental.
+        
+        Alertas que saíram da janela (inclusive os cortados no carregamento)
+        também forçam a reescrita, para que não sejam arquivados de novo.
+        """
+        if not self._unflushed and not self._to_archive:
+            return
+        
+        self._write_archive()
+        history = dict(self.history, alerts=list(self.history["alerts"]))
+        _ensure_monitoring_dir()
         with open(ALERT_HISTORY, 'w', encoding='utf-8') as f:
-            json.dump(self.history, f, indent=2, ensure_ascii=False)
+            json.dump(history, f, indent=2, ensure_ascii=False)
+        
+        self._truncate_log()
+        self._unflushed = 0
+    
+    def _truncate_log(self):
+        """
+        Remove do log incremental apenas as linhas desta instância.
+        
+        Alertas registrados por outra instância e ainda não consolidados
+        por ela permanecem no arquivo.
+        """
+        with _LOG_LOCK:
+            if not ALERT_HISTORY_LOG.exists():
+                self._logged_lines.clear()
+                return
+            with open(ALERT_HISTORY_LOG, 'r', encoding='utf-8') as f:
+                remaining = [line for line in f
+                             if line.strip() and line.rstrip("\n") not in self._logged_lines]
+            self._logged_lines.clear()
+            
+            if not remaining:
+                ALERT_HISTORY_LOG.unlink(missing_ok=True)
+                return
+            tmp = ALERT_HISTORY_LOG.with_suffix(".jsonl.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.writelines(remaining)
+            os.replace(tmp, ALERT_HISTORY_LOG)
+    
+    def close(self, timeout: float = 30.0):
+        """
+        Entrega alertas enfileirados, grava o histórico e fecha a sessão HTTP.
+        
+        Chamado automaticamente ao encerrar o processo; pode ser chamado
+        mais de uma vez.
+        
+        Args:
+            timeout: Tempo máximo (s) aguardando a fila de envio esvaziar
+        """
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout)
+            self._worker = None
+        self.flush()
+        self._http.close()
     
     def check_performance_metrics(self, metrics: Dict) -> List[str]:
         """
@@ -119,18 +377,40 @@ class AlertSystem:
         if "mae" in metrics:
             if metrics["mae"] > self.thresholds.mae_threshold:
                 violations.append(
-                    f"MAE alto: {metrics['mae']:.4f} > {self.thresholds.mae_threshold}"
+                    MSG_MAE_ALTO.format(metrics["mae"], self.thresholds.mae_threshold)
                 )
         
         # Verifica MAPE
         if "mape" in metrics:
             if metrics["mape"] > self.thresholds.mape_threshold:
                 violations.append(
-                    f"MAPE alto: {metrics['mape']:.2f}% > {self.thresholds.mape_threshold}%"
+                    MSG_MAPE_ALTO.format(metrics["mape"], self.thresholds.mape_threshold)
                 )
         
         return violations
     
+    def check_performance_metrics_batch(self, metrics: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Versão vetorizada de check_performance_metrics para vários registros.
+        
+        Args:
+            metrics: Dicionário com arrays de mesmo tamanho ("mae", "mape")
+        
+        Returns:
+            Máscara booleana (True = registro viola algum threshold);
+            use np.flatnonzero(mask) para obter os índices
+        """
+        n = len(next(iter(metrics.values()))) if metrics else 0
+        mask = np.zeros(n, dtype=bool)
+        
+        if "mae" in metrics:
+            mask |= np.asarray(metrics["mae"], dtype=np.float64) > self.thresholds.mae_threshold
+        
+        if "mape" in metrics:
+            mask |= np.asarray(metrics["mape"], dtype=np.float64) > self.thresholds.mape_threshold
+        
+        return mask
+    
     def check_drift_metrics(self, drift_report: Dict) -> List[str]:
         """
         Verifica se drift report indica problemas.
@@ -141,13 +421,10 @@ class AlertSystem:
         Returns:
             Lista de violações detectadas
         """
-        violations = []
-        
-        if drift_report.get("drift_detected"):
-            alerts = drift_report.get("alerts", [])
-            violations.extend([f"Drift: {alert}" for alert in alerts])
+        if not drift_report.get("drift_detected"):
+            return []
         
-        return violations
+        return list(map(MSG_DRIFT.format, drift_report.get("alerts", [])))
     
     def send_alert(
         self,
@@ -165,27 +442,60 @@ class AlertSystem:
             severity: Severidade (INFO, WARNING, CRITICAL)
             metadata: Dados adicionais
         """
+        now = time.time_ns()
         alert = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now,
             "type": alert_type,
             "severity": severity,
             "message": message,
             "metadata": metadata or {}
         }
         
-        # Adiciona ao histórico
+        # Adiciona ao histórico (janela cheia: o mais antigo vai para o arquivo)
+        if len(self.history["alerts"]) >= HISTORY_MAX_ALERTS:
+            self._evict_oldest()
         self.history["alerts"].append(alert)
-        self._save_history()
+        self._timestamps.append(now)
+        self._by_type[alert_type] += 1
+        self._by_severity[severity] += 1
+        self._save_history(alert)
         
-        # Envia via diferentes canais
+        # Envia via diferentes canais (log é local; Slack/email vão para a fila)
         if self.config.get("enable_logs", True):
             self._send_log_alert(alert)
         
-        if self.config.get("enable_slack") and self.config.get("slack_webhook_url"):
-            self._send_slack_alert(alert)
-        
-        if self.config.get("enable_email") and self.config["email_config"].get("sender_email"):
-            self._send_email_alert(alert)
+        if self._slack_enabled() or self._email_enabled():
+            self._enqueue_remote(alert)
+    
+    def _slack_enabled(self) -> bool:
+        """Indica se o canal Slack está ativo e configurado."""
+        return bool(self.config.get("enable_slack") and self.config.get("slack_webhook_url"))
+    
+    def _email_enabled(self) -> bool:
+        """Indica se o canal de email está ativo e configurado."""
+        return bool(self.config.get("enable_email") and self.config["email_config"].get("sender_email"))
+    
+    def _enqueue_remote(self, alert: Dict):
+        """Enfileira alerta para entrega remota, iniciando a thread se preciso."""
+        if self._worker is None:
+            self._worker = threading.Thread(
+                target=self._drain_queue,
+                name="alert-dispatch",
+                daemon=True
+            )
+            self._worker.start()
+        self._queue.put(alert)
+    
+    def _drain_queue(self):
+        """Loop da thread de envio; termina ao receber None."""
+        while True:
+            alert = self._queue.get()
+            if alert is None:
+                break
+            if self._slack_enabled():
+                self._send_slack_alert(alert)
+            if self._email_enabled():
+                self._send_email_alert(alert)
     
     def _send_log_alert(self, alert: Dict):
         """
@@ -204,7 +514,7 @@ class AlertSystem:
         print(f"{severity_symbol} ALERTA: {alert['type'].upper()}")
         print(f"{'='*60}")
         print(f"Severidade: {alert['severity']}")
-        print(f"Timestamp:  {alert['timestamp']}")
+        print(f"Timestamp:  {_iso(alert['timestamp'])}")
         print(f"Mensagem:   {alert['message']}")
         if alert["metadata"]:
             print(f"Detalhes:   {json.dumps(alert['metadata'], indent=2)}")
@@ -222,21 +532,18 @@ class AlertSystem:
             return
         
         # Emoji baseado em severidade
-        emoji = {
-            "INFO": ":information_source:",
-            "WARNING": ":warning:",
-            "CRITICAL": ":rotating_light:"
-        }.get(alert["severity"], ":bell:")
+        emoji = self.SLACK_EMOJI.get(alert["severity"], ":bell:")
+        alert_type = alert['type'].upper()
         
         # Monta payload do Slack
         payload = {
-            "text": f"{emoji} *{alert['type'].upper()} Alert*",
+            "text": f"{emoji} *{alert_type} Alert*",
             "blocks": [
                 {
                     "type": "header",
                     "text": {
                         "type": "plain_text",
-                        "text": f"{emoji} {alert['type'].upper()} Alert"
+                        "text": f"{emoji} {alert_type} Alert"
                     }
                 },
                 {
@@ -248,7 +555,7 @@ class AlertSystem:
                         },
                         {
                             "type": "mrkdwn",
-                            "text": f"*Time:*\n{alert['timestamp']}"
+                            "text": f"*Time:*\n{_iso(alert['timestamp'])}"
                         }
                     ]
                 },
@@ -262,11 +569,16 @@ class AlertSystem:
             ]
         }
         
+        if ORJSON_DISPONIVEL:
+            body = orjson.dumps(payload)
+        else:
+            body = json.dumps(payload).encode("utf-8")
+        
         try:
-            response = requests.post(
+            response = self._http.post(
                 webhook_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
+                data=body,
+                headers=self.SLACK_HEADERS,
                 timeout=10
             )
             
@@ -304,16 +616,16 @@ class AlertSystem:
         Returns:
             Lista de alertas
         """
-        from datetime import timedelta
-        
-        cutoff = datetime.now() - timedelta(hours=hours)
+        cutoff = time.time_ns() - hours * NS_POR_HORA
         
-        recent = [
-            alert for alert in self.history["alerts"]
-            if datetime.fromisoformat(alert["timestamp"]) > cutoff
-        ]
+        # Alertas são anexados em ordem cronológica: basta achar o corte
+        idx = bisect.bisect_right(self._timestamps, cutoff, lo=self._ts_inicio)
         
-        return recent
+        # Os recentes ficam no fim da janela: percorre só eles, a partir da direita
+        recentes = list(itertools.islice(reversed(self.history["alerts"]),
+                                         len(self._timestamps) - idx))
+        recentes.reverse()
+        return recentes
     
     def get_alert_summary(self) -> Dict:
         """
@@ -327,21 +639,10 @@ class AlertSystem:
         if total == 0:
             return {"total_alerts": 0}
         
-        # Conta por tipo
-        by_type = {}
-        by_severity = {}
-        
-        for alert in self.history["alerts"]:
-            alert_type = alert["type"]
-            severity = alert["severity"]
-            
-            by_type[alert_type] = by_type.get(alert_type, 0) + 1
-            by_severity[severity] = by_severity.get(severity, 0) + 1
-        
         return {
             "total_alerts": total,
-            "by_type": by_type,
-            "by_severity": by_severity,
+            "by_type": dict(+self._by_type),
+            "by_severity": dict(+self._by_severity),
             "last_alert": self.history["alerts"][-1] if total > 0 else None
         }
 
@@ -362,6 +663,7 @@ def configure_slack_webhook(webhook_url: str):
     config["slack_webhook_url"] = webhook_url
     config["enable_slack"] = True
     
+    _ensure_monitoring_dir()
     with open(ALERT_CONFIG, 'w', encoding='utf-8') as f:
         json.dump(config, f, indent=2)
     
@@ -16,19 +16,19 @@ Versão: 1.0.0
 """
 
 import os
-import json
+import sys
+import functools
+import glob
 from datetime import datetime, timedelta
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Union
 import warnings
 
 import yfinance as yf
 import pandas as pd
 import numpy as np
-from scipy import stats
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-warnings.filterwarnings('ignore')
+sys.path.append(os.path.dirname(__file__))
+from utils import indices_lttb, figura_reutilizavel, salvar_json
 
 # ===================================================================
 # CONFIGURAÇÕES
@@ -39,38 +39,155 @@ YEARS_OF_DATA = 5
 DATA_DIR = "data/raw"
 DOCS_DIR = "docs/data_collection"
 OUTPUT_FILE = os.path.join(DATA_DIR, "b3sa3_historical.csv")
+OUTPUT_PARQUET = os.path.join(DATA_DIR, "b3sa3_historical.parquet")
 LOG_FILE = os.path.join(DOCS_DIR, "data_collection_log.json")
+# Cache diário dos downloads (API v8 / yfinance), um Parquet por (ticker, anos, dia)
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+# Pontos máximos por série nos gráficos (séries maiores são reduzidas via LTTB)
+MAX_PONTOS_GRAFICO = 5000
 
 # Criar diretórios se não existirem
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(DOCS_DIR, exist_ok=True)
 
-# Configuração de visualizações
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+
+@functools.lru_cache(maxsize=1)
+def _seaborn():
+    """
+    Importa matplotlib/seaborn e aplica o estilo apenas quando um gráfico
+    é gerado (a coleta de dados não paga o custo desses imports).
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # Saída apenas em PNG: sem backend de GUI
+    import seaborn as sns
+    
+    # Configuração de visualizações
+    matplotlib.style.use('seaborn-v0_8-darkgrid')
+    sns.set_palette("husl")
+    return sns
 
 
 # ===================================================================
 # FUNÇÕES AUXILIARES
 # ===================================================================
 
-def coletar_dados_historicos(ticker: str, anos: int) -> pd.DataFrame:
+def _caminho_cache(ticker: str, anos: int, dia: datetime) -> str:
+    """Caminho do cache Parquet do download de um ticker em um dia."""
+    return os.path.join(CACHE_DIR, f"{ticker}_{anos}y_{dia.strftime('%Y-%m-%d')}.parquet")
+
+
+def _ler_cache(caminho: str) -> pd.DataFrame:
+    """Lê o download em cache (DataFrame vazio se ausente ou ilegível)."""
+    if not os.path.exists(caminho):
+        return pd.DataFrame()
+    try:
+        return pd.read_parquet(caminho)
+    except Exception as e:
+        print(f"⚠️  Cache ignorado ({caminho}): {str(e)}")
+        return pd.DataFrame()
+
+
+def _salvar_cache(dados: pd.DataFrame, caminho: str) -> None:
+    """
+    Grava o download no cache; falhas não interrompem a coleta.
+    
+    Após gravar, remove os caches de dias anteriores do mesmo
+    ticker/período: só o do dia é lido de novo.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        dados.to_parquet(caminho, engine='pyarrow')
+    except Exception as e:
+        print(f"⚠️  Não foi possível gravar o cache: {str(e)}")
+        return
+    
+    # "<ticker>_<anos>y_" sem o "AAAA-MM-DD.parquet" do dia
+    prefixo = os.path.basename(caminho)[:-len("AAAA-MM-DD.parquet")]
+    for antigo in glob.glob(os.path.join(CACHE_DIR, glob.escape(prefixo) + "*.parquet")):
+        if antigo != caminho:
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+
+
+def _coletar_varios_tickers(tickers: List[str], anos: int) -> pd.DataFrame:
+    """
+    Baixa vários tickers em uma única chamada yf.download (threads internas).
+    
+    Parâmetros:
+    -----------
+    tickers : list
+        Códigos das ações
+    anos : int
+        Número de anos de histórico a coletar
+        
+    Retorna:
+    --------
+    pd.DataFrame
+        Colunas MultiIndex (ticker, campo OHLCV)
+    """
+    print(f"\n{'='*70}")
+    print(f"FASE 1: COLETA DE DADOS - {len(tickers)} tickers")
+    print(f"{'='*70}\n")
+    
+    data_fim = datetime.now()
+    data_inicio = data_fim - timedelta(days=anos*365)
+    
+    caminho_cache = _caminho_cache("+".join(sorted(tickers)), anos, data_fim)
+    dados = _ler_cache(caminho_cache)
+    if not dados.empty:
+        print(f"📦 Cache: {len(dados)} registros ({caminho_cache})\n")
+        return dados
+    
+    print(f"📡 yfinance (lote): {', '.join(tickers)}")
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        dados = yf.download(
+            tickers,
+            start=data_inicio,
+            end=data_fim,
+            progress=False,
+            threads=True,
+            group_by='ticker'
+        )
+    
+    if dados.empty:
+        raise ValueError(f"Nenhum dado encontrado para {tickers}")
+    
+    print(f"✅ yfinance: {len(dados)} registros\n")
+    _salvar_cache(dados, caminho_cache)
+    return dados
+
+
+def coletar_dados_historicos(ticker: Union[str, List[str]], anos: int) -> pd.DataFrame:
     """
     Coleta dados históricos usando estratégia híbrida.
-    Prioridade: SQLite → API v8 → yfinance
+    Prioridade: SQLite → cache do dia → API v8 → yfinance
+    
+    Com uma lista de tickers, baixa todos em lote via yfinance.
     
     Parâmetros:
     -----------
-    ticker : str
-        Código da ação (ex: B3SA3.SA)
+    ticker : str ou list
+        Código da ação (ex: B3SA3.SA) ou lista de códigos (vazia: DataFrame vazio)
     anos : int
         Número de anos de histórico a coletar
         
     Retorna:
     --------
     pd.DataFrame
-        DataFrame com dados históricos (OHLCV)
+        DataFrame com dados históricos (OHLCV); para uma lista, colunas
+        MultiIndex (ticker, campo)
     """
+    if not isinstance(ticker, str):
+        tickers = list(ticker)
+        if not tickers:
+            return pd.DataFrame()
+        if len(tickers) > 1:
+            return _coletar_varios_tickers(tickers, anos)
+        ticker = tickers[0]
+    
     print(f"\n{'='*70}")
     print(f"FASE 1: COLETA DE DADOS - {ticker}")
     print(f"{'='*70}\n")
@@ -100,6 +217,14 @@ def coletar_dados_historicos(ticker: str, anos: int) -> pd.DataFrame:
     except Exception as e:
         print(f"⚠️  SQLite não disponível: {str(e)}")
     
+    # Cache local: downloads do mesmo dia não voltam à rede
+    caminho_cache = _caminho_cache(ticker, anos, data_fim)
+    dados = _ler_cache(caminho_cache)
+    if not dados.empty:
+        print(f"📦 Cache: {len(dados)} registros ({caminho_cache})")
+        print(f"   Período: {dados.index[0].strftime('%Y-%m-%d')} a {dados.index[-1].strftime('%Y-%m-%d')}\n")
+        return dados
+    
     # Método 2: API v8 (mais confiável que yfinance)
     try:
         from src.yahoo_finance_v8 import coletar_dados_yahoo_v8
@@ -108,6 +233,7 @@ def coletar_dados_historicos(ticker: str, anos: int) -> pd.DataFrame:
         if not dados.empty:
             print(f"✅ API v8: {len(dados)} registros")
             print(f"   Período: {dados.index[0].strftime('%Y-%m-%d')} a {dados.index[-1].strftime('%Y-%m-%d')}\n")
+            _salvar_cache(dados, caminho_cache)
             return dados
     except Exception as e:
         print(f"⚠️  API v8 falhou: {str(e)}")
@@ -115,13 +241,15 @@ def coletar_dados_historicos(ticker: str, anos: int) -> pd.DataFrame:
     # Método 3: yfinance (fallback final)
     print(f"📡 Usando yfinance (fallback)...")
     try:
-        # Download dos dados
-        dados = yf.download(
-            ticker,
-            start=data_inicio,
-            end=data_fim,
-            progress=False
-        )
+        # Download dos dados (silencia apenas os avisos ruidosos do yfinance/pandas)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            dados = yf.download(
+                ticker,
+                start=data_inicio,
+                end=data_fim,
+                progress=False
+            )
         
         # Remover MultiIndex se houver (quando temos apenas um ticker)
         if isinstance(dados.columns, pd.MultiIndex):
@@ -133,6 +261,7 @@ def coletar_dados_historicos(ticker: str, anos: int) -> pd.DataFrame:
         print(f"✅ yfinance: {len(dados)} registros")
         print(f"   Período: {dados.index[0].strftime('%Y-%m-%d')} a {dados.index[-1].strftime('%Y-%m-%d')}\n")
         
+        _salvar_cache(dados, caminho_cache)
         return dados
         
     except Exception as e:
@@ -140,7 +269,7 @@ def coletar_dados_historicos(ticker: str, anos: int) -> pd.DataFrame:
         raise ValueError(f"Não foi possível coletar dados de {ticker} por nenhum método")
 
 
-def analisar_dados_faltantes(df: pd.DataFrame) -> Dict:
+def analisar_dados_faltantes(df: pd.DataFrame, verbose: bool = True) -> Dict:
     """
     Analisa e trata valores ausentes no DataFrame.
     
@@ -148,36 +277,38 @@ def analisar_dados_faltantes(df: pd.DataFrame) -> Dict:
     -----------
     df : pd.DataFrame
         DataFrame a ser analisado
+    verbose : bool
+        Se True, imprime o relatório por coluna
         
     Retorna:
     --------
     dict
         Estatísticas sobre dados faltantes
     """
-    print(f"🔍 Análise de Dados Faltantes:")
-    print(f"{'─'*70}\n")
+    if verbose:
+        print(f"🔍 Análise de Dados Faltantes:")
+        print(f"{'─'*70}\n")
     
     # Contagem de valores ausentes
     missing = df.isnull().sum()
-    missing_pct = (missing / len(df)) * 100
     
-    missing_info = {}
+    # Todas as colunas começam zeradas; só as com ausentes são preenchidas
+    missing_info = {col: {'count': 0, 'percentage': 0.0} for col in df.columns}
+    com_faltantes = missing[missing > 0]
+    for col, count in com_faltantes.items():
+        missing_info[col] = {
+            'count': int(count),
+            'percentage': float(count / len(df) * 100)
+        }
+    
+    if verbose:
+        for col, info in missing_info.items():
+            if info['count'] > 0:
+                print(f"   ⚠️  {col}: {info['count']} valores ({info['percentage']:.2f}%)")
+            else:
+                print(f"   ✅ {col}: Sem valores faltantes")
+        print()
     
-    for col in df.columns:
-        if missing[col] > 0:
-            print(f"   ⚠️  {col}: {missing[col]} valores ({missing_pct[col]:.2f}%)")
-            missing_info[col] = {
-                'count': int(missing[col]),
-                'percentage': float(missing_pct[col])
-            }
-        else:
-            print(f"   ✅ {col}: Sem valores faltantes")
-            missing_info[col] = {
-                'count': 0,
-                'percentage': 0.0
-            }
-    
-    print()
     return missing_info
 
 
@@ -199,10 +330,15 @@ def detectar_outliers(df: pd.DataFrame, coluna: str, threshold: float = 3.0) ->
     tuple
         (Série booleana com outliers, número de outliers)
     """
-    z_scores = np.abs(stats.zscore(df[coluna].dropna()))
-    outliers = z_scores > threshold
+    serie = df[coluna].dropna()
+    valores = serie.to_numpy(dtype=np.float64)
     
-    return outliers, outliers.sum()
+    # |z| > threshold  <=>  |x - μ| > threshold * σ (evita o array de z-scores)
+    mu = valores.mean()
+    sigma = valores.std()
+    outliers = np.abs(valores - mu) > threshold * sigma
+    
+    return pd.Series(outliers, index=serie.index), int(np.count_nonzero(outliers))
 
 
 def limpar_dados(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
@@ -222,42 +358,42 @@ def limpar_dados(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
     print(f"🧹 Limpeza de Dados:")
     print(f"{'─'*70}\n")
     
-    df_limpo = df.copy()
     stats_limpeza = {}
     
-    # 1. Remover duplicatas
-    duplicatas_antes = len(df_limpo)
-    df_limpo = df_limpo[~df_limpo.index.duplicated(keep='first')]
-    duplicatas_removidas = duplicatas_antes - len(df_limpo)
+    # 1. Remover duplicatas (a indexação booleana já gera um novo DataFrame).
+    # Índice ordenado (caso normal): duplicatas são vizinhas, basta comparar
+    # cada data com a anterior, sem a tabela hash de duplicated()
+    if df.index.is_monotonic_increasing and len(df) > 0:
+        datas = df.index.to_numpy()
+        manter = np.empty(len(datas), dtype=bool)
+        manter[0] = True
+        np.not_equal(datas[1:], datas[:-1], out=manter[1:])
+    else:
+        manter = ~df.index.duplicated(keep='first')
+    df_limpo = df[manter]
+    duplicatas_removidas = len(df) - len(df_limpo)
     print(f"   🗑️  Duplicatas removidas: {duplicatas_removidas}")
     stats_limpeza['duplicatas_removidas'] = duplicatas_removidas
     
-    # 2. Tratar valores ausentes
-    missing_antes = df_limpo.isnull().sum().sum()
-    
-    # Forward fill para gaps curtos (máximo 3 dias)
-    df_limpo = df_limpo.fillna(method='ffill', limit=3)
+    # 2. Tratar valores ausentes (uma única varredura de NaN)
+    missing_antes = int(np.count_nonzero(df_limpo.isna().to_numpy()))
     
-    # Remover linhas com valores ainda ausentes
-    df_limpo = df_limpo.dropna()
+    # Forward fill para gaps curtos (máximo 3 dias) e remoção das linhas
+    # com valores ainda ausentes
+    df_limpo = df_limpo.ffill(limit=3).dropna()
     
-    missing_tratados = missing_antes - df_limpo.isnull().sum().sum()
+    # Após o dropna não resta nenhum NaN: todos os ausentes foram tratados
+    missing_tratados = missing_antes
     print(f"   📝 Valores ausentes tratados: {missing_tratados}")
     stats_limpeza['missing_tratados'] = missing_tratados
     
-    # 3. Validar consistência de preços
-    inconsistencias = 0
-    
-    # Low deve ser <= High
-    mask_low_high = df_limpo['Low'] > df_limpo['High']
-    inconsistencias += mask_low_high.sum()
-    
-    # Open e Close devem estar entre Low e High
-    mask_open = (df_limpo['Open'] < df_limpo['Low']) | (df_limpo['Open'] > df_limpo['High'])
-    inconsistencias += mask_open.sum()
+    # 3. Validar consistência de preços (uma máscara única sobre o bloco OHLC)
+    o, h, l, c = df_limpo[['Open', 'High', 'Low', 'Close']].to_numpy().T
     
-    mask_close = (df_limpo['Close'] < df_limpo['Low']) | (df_limpo['Close'] > df_limpo['High'])
-    inconsistencias += mask_close.sum()
+    # Low deve ser <= High; Open e Close devem estar entre Low e High
+    inconsistencias = int(np.count_nonzero(
+        (l > h) | (o < l) | (o > h) | (c < l) | (c > h)
+    ))
     
     print(f"   ⚖️  Inconsistências detectadas: {inconsistencias}")
     stats_limpeza['inconsistencias'] = inconsistencias
@@ -287,6 +423,8 @@ def realizar_analise_exploratoria(df: pd.DataFrame) -> None:
     df : pd.DataFrame
         DataFrame com dados limpos
     """
+    sns = _seaborn()
+    
     print(f"📊 Análise Exploratória:")
     print(f"{'─'*70}\n")
     
@@ -297,13 +435,22 @@ def realizar_analise_exploratoria(df: pd.DataFrame) -> None:
         print(f"      {stat:8s}: R$ {float(valor):,.2f}")
     print()
     
+    # Bloco OHLCV extraído uma vez; gráficos e correlação usam os arrays
+    colunas = ['Open', 'High', 'Low', 'Close', 'Volume']
+    valores = df[colunas].to_numpy(dtype=np.float64)
+    close, volume = valores[:, 3], valores[:, 4]
+    
+    # Séries longas são reduzidas antes de plotar (histograma e boxplot usam tudo)
+    idx_close = indices_lttb(close, MAX_PONTOS_GRAFICO)
+    idx_volume = indices_lttb(volume, MAX_PONTOS_GRAFICO)
+    
     # Criar figura com múltiplos gráficos
-    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    fig, axes = figura_reutilizavel(2, 2, figsize=(15, 10))
     fig.suptitle(f'Análise Exploratória - {TICKER}', fontsize=16, fontweight='bold')
     
     # 1. Série temporal do preço de fechamento
     ax1 = axes[0, 0]
-    ax1.plot(df.index, df['Close'], linewidth=1.5, color='#2E86AB')
+    ax1.plot(df.index[idx_close], close[idx_close], linewidth=1.5, color='#2E86AB')
     ax1.set_title('Série Temporal - Preço de Fechamento', fontweight='bold')
     ax1.set_xlabel('Data')
     ax1.set_ylabel('Preço (R$)')
@@ -311,7 +458,7 @@ def realizar_analise_exploratoria(df: pd.DataFrame) -> None:
     
     # 2. Distribuição do preço de fechamento
     ax2 = axes[0, 1]
-    ax2.hist(df['Close'], bins=50, color='#A23B72', alpha=0.7, edgecolor='black')
+    ax2.hist(close, bins=50, color='#A23B72', alpha=0.7, edgecolor='black')
     ax2.set_title('Distribuição - Preço de Fechamento', fontweight='bold')
     ax2.set_xlabel('Preço (R$)')
     ax2.set_ylabel('Frequência')
@@ -319,7 +466,7 @@ def realizar_analise_exploratoria(df: pd.DataFrame) -> None:
     
     # 3. Volume de negociação
     ax3 = axes[1, 0]
-    ax3.bar(df.index, df['Volume'], width=1, color='#F18F01', alpha=0.6)
+    ax3.bar(df.index[idx_volume], volume[idx_volume], width=1, color='#F18F01', alpha=0.6)
     ax3.set_title('Volume de Negociação', fontweight='bold')
     ax3.set_xlabel('Data')
     ax3.set_ylabel('Volume')
@@ -327,38 +474,36 @@ def realizar_analise_exploratoria(df: pd.DataFrame) -> None:
     
     # 4. Boxplot de preços
     ax4 = axes[1, 1]
-    box_data = [df['Open'], df['High'], df['Low'], df['Close']]
-    ax4.boxplot(box_data, labels=['Open', 'High', 'Low', 'Close'])
+    ax4.boxplot(valores[:, :4], labels=colunas[:4])
     ax4.set_title('Boxplot - Preços OHLC', fontweight='bold')
     ax4.set_ylabel('Preço (R$)')
     ax4.grid(True, alpha=0.3)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Salvar gráfico
     plot_path = os.path.join(DOCS_DIR, 'analise_exploratoria.png')
-    plt.savefig(plot_path, dpi=300, bbox_inches='tight')
+    fig.savefig(plot_path, dpi=300, bbox_inches='tight')
     print(f"   💾 Gráficos salvos em: {plot_path}\n")
     
-    plt.close()
-    
     # Matriz de correlação
     print("   🔗 Matriz de Correlação:")
-    corr_matrix = df[['Open', 'High', 'Low', 'Close', 'Volume']].corr()
+    corr_matrix = pd.DataFrame(
+        np.corrcoef(valores, rowvar=False), index=colunas, columns=colunas
+    )
     print(corr_matrix.round(3))
     print()
     
     # Salvar matriz de correlação
-    fig_corr, ax_corr = plt.subplots(figsize=(10, 8))
+    fig_corr, eixos_corr = figura_reutilizavel(figsize=(10, 8))
+    ax_corr = eixos_corr[0, 0]
     sns.heatmap(corr_matrix, annot=True, fmt='.3f', cmap='coolwarm', 
                 center=0, square=True, linewidths=1, ax=ax_corr)
     ax_corr.set_title('Matriz de Correlação - Features', fontweight='bold', fontsize=14)
     
     corr_path = os.path.join(DOCS_DIR, 'matriz_correlacao.png')
-    plt.savefig(corr_path, dpi=300, bbox_inches='tight')
+    fig_corr.savefig(corr_path, dpi=300, bbox_inches='tight')
     print(f"   💾 Matriz de correlação salva em: {corr_path}\n")
-    
-    plt.close()
 
 
 def salvar_dados_e_log(df: pd.DataFrame, stats: Dict) -> None:
@@ -375,26 +520,29 @@ def salvar_dados_e_log(df: pd.DataFrame, stats: Dict) -> None:
     print(f"💾 Salvando Resultados:")
     print(f"{'─'*70}\n")
     
-    # Salvar CSV
+    # Salvar CSV (cópia legível; a Fase 2 lê o Parquet quando disponível)
     df.to_csv(OUTPUT_FILE)
     print(f"   ✅ Dados salvos em: {OUTPUT_FILE}")
     print(f"      Tamanho: {os.path.getsize(OUTPUT_FILE) / 1024:.2f} KB")
     print(f"      Registros: {len(df)}")
     print(f"      Colunas: {list(df.columns)}\n")
     
-    # Converter stats para tipos Python nativos
-    def converter_para_json(obj):
-        """Converte tipos numpy para tipos Python nativos"""
-        if isinstance(obj, dict):
-            return {k: converter_para_json(v) for k, v in obj.items()}
-        elif isinstance(obj, (np.integer, np.int64)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float64)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
+    # Cópia colunar em Parquet (formato de leitura preferido pela Fase 2)
+    try:
+        df.to_parquet(OUTPUT_PARQUET, engine='pyarrow', compression='zstd')
+        print(f"   ✅ Cópia Parquet salva em: {OUTPUT_PARQUET}")
+        print(f"      Tamanho: {os.path.getsize(OUTPUT_PARQUET) / 1024:.2f} KB\n")
+    except Exception as e:
+        # Parquet antigo esconderia o CSV recém-gravado na Fase 2
+        if os.path.exists(OUTPUT_PARQUET):
+            os.remove(OUTPUT_PARQUET)
+        if isinstance(e, ImportError):
+            print(f"   ⚠️  pyarrow não instalado - cópia Parquet não gerada\n")
         else:
-            return obj
+            print(f"   ⚠️  Cópia Parquet não gerada: {str(e)}\n")
+    
+    # Estatísticas de Close/Volume numa única extração do bloco
+    close, volume = df[['Close', 'Volume']].to_numpy(dtype=np.float64).T
     
     # Criar log de execução
     log_data = {
@@ -405,21 +553,20 @@ def salvar_dados_e_log(df: pd.DataFrame, stats: Dict) -> None:
             'fim': df.index[-1].strftime('%Y-%m-%d'),
             'dias_totais': int(len(df))
         },
-        'estatisticas_limpeza': converter_para_json(stats),
+        'estatisticas_limpeza': stats,
         'estatisticas_dados': {
-            'preco_medio': float(df['Close'].mean()),
-            'preco_minimo': float(df['Close'].min()),
-            'preco_maximo': float(df['Close'].max()),
-            'preco_atual': float(df['Close'].iloc[-1]),
-            'volume_medio': float(df['Volume'].mean())
+            'preco_medio': float(close.mean()),
+            'preco_minimo': float(close.min()),
+            'preco_maximo': float(close.max()),
+            'preco_atual': float(close[-1]),
+            'volume_medio': float(volume.mean())
         },
         'colunas': list(df.columns),
         'output_file': OUTPUT_FILE
     }
     
-    # Salvar log em JSON
-    with open(LOG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(log_data, f, indent=4, ensure_ascii=False)
+    # Salvar log em JSON (tipos NumPy de stats são serializados diretamente)
+    salvar_json(log_data, LOG_FILE)
     
     print(f"   ✅ Log salvo em: {LOG_FILE}\n")
 
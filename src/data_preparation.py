@@ -17,6 +17,7 @@ Versão: 1.0.0
 """
 
 import os
+import sys
 import json
 import warnings
 from datetime import datetime
@@ -26,9 +27,14 @@ import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 import joblib
+import matplotlib
+matplotlib.use('Agg')  # Saída apenas em PNG: sem backend de GUI
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+sys.path.append(os.path.dirname(__file__))
+from utils import indices_lttb, figura_reutilizavel, salvar_json
+
 warnings.filterwarnings('ignore')
 
 # ===================================================================
@@ -38,12 +44,20 @@ warnings.filterwarnings('ignore')
 # Arquivos de entrada
 DATA_DIR = "data/raw"
 INPUT_FILE = os.path.join(DATA_DIR, "b3sa3_historical.csv")
+INPUT_PARQUET = os.path.join(DATA_DIR, "b3sa3_historical.parquet")
 
 # Arquivos de saída
 PROCESSED_DIR = "data/processed"
 MODELS_DIR = "models"
 DOCS_DIR = "docs/data_preparation"
 
+# Série normalizada única + índices de divisão (a Fase 4 recria as janelas
+# como views sobre o arquivo mapeado em memória)
+SERIE_FILE = os.path.join(PROCESSED_DIR, "serie_normalizada.npy")
+SERIE_META_FILE = os.path.join(PROCESSED_DIR, "serie_meta.json")
+# Conjuntos X/y já materializados, num único arquivo compactado
+SEQUENCIAS_FILE = os.path.join(PROCESSED_DIR, "sequencias.npz")
+
 # Parâmetros do modelo
 TIMESTEPS = 60  # Janela de 60 dias para prever o próximo dia
 TRAIN_SPLIT = 0.70  # 70% para treino
@@ -54,6 +68,9 @@ TEST_SPLIT = 0.15   # 15% para teste
 FEATURES = ['Open', 'High', 'Low', 'Close', 'Volume']
 TARGET = 'Close'  # Variável alvo: preço de fechamento
 
+# Pontos máximos por série nos gráficos (séries maiores são reduzidas via LTTB)
+MAX_PONTOS_GRAFICO = 5000
+
 # Criar diretórios
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 os.makedirs(MODELS_DIR, exist_ok=True)
@@ -68,6 +85,20 @@ sns.set_palette("husl")
 # FUNÇÕES AUXILIARES
 # ===================================================================
 
+def _parquet_atualizado() -> bool:
+    """
+    Indica se a cópia Parquet da Fase 1 pode substituir o CSV.
+    
+    O CSV é gravado primeiro e o Parquet pode ter ficado de uma coleta
+    anterior; só é usado se for pelo menos tão recente quanto o CSV.
+    """
+    if not os.path.exists(INPUT_PARQUET):
+        return False
+    if not os.path.exists(INPUT_FILE):
+        return True
+    return os.stat(INPUT_PARQUET).st_mtime_ns >= os.stat(INPUT_FILE).st_mtime_ns
+
+
 def carregar_dados_limpos() -> pd.DataFrame:
     """
     Carrega os dados limpos gerados na Fase 1.
@@ -81,12 +112,23 @@ def carregar_dados_limpos() -> pd.DataFrame:
     print(f"FASE 2: PREPARAÇÃO DOS DADOS PARA LSTM")
     print(f"{'='*70}\n")
     
+    # Parquet (gerado junto com o CSV na Fase 1) dispensa o parse de texto/datas
+    usar_parquet = _parquet_atualizado()
+    arquivo = INPUT_PARQUET if usar_parquet else INPUT_FILE
+    
     print(f"📂 Carregando dados da Fase 1...")
-    print(f"   Arquivo: {INPUT_FILE}\n")
+    print(f"   Arquivo: {arquivo}\n")
     
     try:
-        # Carregar CSV com index como data
-        df = pd.read_csv(INPUT_FILE, index_col=0, parse_dates=True)
+        df = None
+        if usar_parquet:
+            try:
+                df = pd.read_parquet(INPUT_PARQUET)
+            except ImportError:
+                print(f"⚠️  pyarrow não instalado - lendo {INPUT_FILE}\n")
+        if df is None:
+            # Carregar CSV com index como data
+            df = pd.read_csv(INPUT_FILE, index_col=0, parse_dates=True)
         
         print(f"✅ Dados carregados com sucesso!")
         print(f"   Registros: {len(df)}")
@@ -115,6 +157,45 @@ def carregar_dados_limpos() -> pd.DataFrame:
         raise
 
 
+def _ajustar_minmax(dados: np.ndarray, feature_range: Tuple[float, float] = (0, 1)) -> MinMaxScaler:
+    """
+    Ajusta um MinMaxScaler calculando min/max diretamente em NumPy.
+    
+    Evita a validação e as passagens extras de fit(); os atributos são os
+    mesmos do sklearn, então o scaler continua serializável com joblib e
+    utilizável em transform/inverse_transform pelos demais módulos.
+    
+    Parâmetros:
+    -----------
+    dados : np.ndarray
+        Matriz (amostras, features)
+    feature_range : tuple
+        Intervalo de saída
+        
+    Retorna:
+    --------
+    MinMaxScaler
+        Scaler com atributos ajustados
+    """
+    data_min = np.nanmin(dados, axis=0)
+    data_max = np.nanmax(dados, axis=0)
+    data_range = data_max - data_min
+    
+    # Features constantes: mesma regra do sklearn (escala 1, sem divisão por zero)
+    range_seguro = np.where(data_range == 0.0, 1.0, data_range)
+    
+    scaler = MinMaxScaler(feature_range=feature_range)
+    scaler.n_features_in_ = dados.shape[1]
+    scaler.n_samples_seen_ = dados.shape[0]
+    scaler.data_min_ = data_min
+    scaler.data_max_ = data_max
+    scaler.data_range_ = data_range
+    scaler.scale_ = (feature_range[1] - feature_range[0]) / range_seguro
+    scaler.min_ = feature_range[0] - data_min * scaler.scale_
+    
+    return scaler
+
+
 def normalizar_dados(df: pd.DataFrame, features: list) -> Tuple[np.ndarray, MinMaxScaler]:
     """
     Normaliza os dados usando MinMaxScaler [0, 1].
@@ -146,9 +227,12 @@ def normalizar_dados(df: pd.DataFrame, features: list) -> Tuple[np.ndarray, MinM
     print(f"      Máximo: {df[TARGET].max():.2f}")
     print(f"      Média:  {df[TARGET].mean():.2f}\n")
     
-    # Inicializar e ajustar o scaler
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    dados_normalizados = scaler.fit_transform(dados)
+    # Ajustar o scaler e normalizar (x * scale_ + min_, como no sklearn)
+    scaler = _ajustar_minmax(dados, feature_range=(0, 1))
+    dados_normalizados = dados * scaler.scale_ + scaler.min_
+    
+    # float32 é a precisão do LSTM: janelas e arquivos .npy ocupam metade
+    dados_normalizados = dados_normalizados.astype(np.float32, copy=False)
     
     print(f"   ✅ Normalização concluída!")
     print(f"   📊 Range: [0, 1]")
@@ -188,18 +272,15 @@ def criar_sequencias(dados: np.ndarray, timesteps: int, target_idx: int) -> Tupl
     print(f"   ⏱️  Timesteps (janela): {timesteps} dias")
     print(f"   🎯 Feature alvo: {FEATURES[target_idx]}\n")
     
-    X, y = [], []
+    # Criar janelas deslizantes como view (sem copiar cada janela):
+    # X[i] = sequência dos 'timesteps' dias anteriores ao dia i + timesteps
+    janelas = np.lib.stride_tricks.sliding_window_view(
+        dados, window_shape=(timesteps, dados.shape[1])
+    )
+    X = janelas[:-1, 0]
     
-    # Criar janelas deslizantes
-    for i in range(timesteps, len(dados)):
-        # X[i] = sequência dos últimos 'timesteps' dias
-        X.append(dados[i-timesteps:i])
-        
-        # y[i] = preço de fechamento do dia seguinte
-        y.append(dados[i, target_idx])
-    
-    X = np.array(X)
-    y = np.array(y)
+    # y[i] = preço de fechamento do dia seguinte à janela
+    y = dados[timesteps:, target_idx]
     
     print(f"   ✅ Sequências criadas com sucesso!")
     print(f"   📊 Shape de X (entrada): {X.shape}")
@@ -280,30 +361,56 @@ def dividir_dados(X: np.ndarray, y: np.ndarray,
     }
 
 
-def salvar_dados_preparados(dados_divididos: dict, scaler: MinMaxScaler) -> None:
+def salvar_dados_preparados(dados_divididos: dict, scaler: MinMaxScaler,
+                            dados_normalizados: np.ndarray = None) -> None:
     """
     Salva dados preparados e scaler para uso futuro.
     
+    Com `dados_normalizados`, grava apenas a série (uma vez) e os tamanhos
+    da divisão: as janelas sobrepostas não são duplicadas em disco. Sem
+    ela, grava todos os conjuntos X/y em um único .npz compactado.
+    
     Parâmetros:
     -----------
     dados_divididos : dict
         Dicionário com conjuntos divididos
     scaler : MinMaxScaler
         Scaler ajustado
+    dados_normalizados : np.ndarray, opcional
+        Série normalizada de onde as janelas foram criadas
     """
     print(f"💾 Salvando Dados Preparados:")
     print(f"{'─'*70}\n")
     
-    # Salvar arrays NumPy
     arquivos_salvos = []
     
-    for nome, array in dados_divididos.items():
-        if isinstance(array, np.ndarray):
-            filepath = os.path.join(PROCESSED_DIR, f"{nome}.npy")
-            np.save(filepath, array)
-            tamanho_mb = os.path.getsize(filepath) / (1024 * 1024)
-            print(f"   ✅ {nome}.npy salvo ({tamanho_mb:.2f} MB)")
-            arquivos_salvos.append(filepath)
+    if dados_normalizados is not None:
+        # Série única; X/y são recriados como views na carga
+        np.save(SERIE_FILE, np.asarray(dados_normalizados, dtype=np.float32))
+        tamanho_mb = os.path.getsize(SERIE_FILE) / (1024 * 1024)
+        print(f"   ✅ {os.path.basename(SERIE_FILE)} salvo ({tamanho_mb:.2f} MB)")
+        
+        meta = {
+            'timesteps': TIMESTEPS,
+            'target_idx': FEATURES.index(TARGET),
+            'train_size': int(dados_divididos['train_size']),
+            'val_size': int(dados_divididos['val_size']),
+            'test_size': int(dados_divididos['test_size'])
+        }
+        with open(SERIE_META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=4)
+        print(f"   ✅ {os.path.basename(SERIE_META_FILE)} salvo")
+        arquivos_salvos += [SERIE_FILE, SERIE_META_FILE]
+    else:
+        # Salvar arrays NumPy (um arquivo, uma passada de compressão)
+        arrays = {
+            nome: array for nome, array in dados_divididos.items()
+            if isinstance(array, np.ndarray)
+        }
+        np.savez_compressed(SEQUENCIAS_FILE, **arrays)
+        tamanho_mb = os.path.getsize(SEQUENCIAS_FILE) / (1024 * 1024)
+        print(f"   ✅ {os.path.basename(SEQUENCIAS_FILE)} salvo ({tamanho_mb:.2f} MB): {', '.join(arrays)}")
+        arquivos_salvos.append(SEQUENCIAS_FILE)
     
     print()
     
@@ -354,8 +461,7 @@ def salvar_dados_preparados(dados_divididos: dict, scaler: MinMaxScaler) -> None
     }
     
     log_file = os.path.join(DOCS_DIR, "data_preparation_log.json")
-    with open(log_file, 'w', encoding='utf-8') as f:
-        json.dump(log_data, f, indent=4, ensure_ascii=False)
+    salvar_json(log_data, log_file)
     
     print(f"   ✅ Log salvo: {log_file}\n")
 
@@ -377,7 +483,7 @@ def visualizar_preparacao(df: pd.DataFrame, dados_normalizados: np.ndarray,
     print(f"📊 Gerando Visualizações:")
     print(f"{'─'*70}\n")
     
-    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    fig, axes = figura_reutilizavel(2, 2, figsize=(15, 10))
     fig.suptitle('Preparação de Dados para LSTM - B3SA3.SA', 
                  fontsize=16, fontweight='bold')
     
@@ -385,9 +491,13 @@ def visualizar_preparacao(df: pd.DataFrame, dados_normalizados: np.ndarray,
     ax1 = axes[0, 0]
     close_idx = FEATURES.index(TARGET)
     
-    ax1.plot(df.index, df[TARGET], label='Original', alpha=0.7, linewidth=1.5)
+    # Pontos a plotar nas séries temporais (todos, se a série for curta)
+    close_norm = dados_normalizados[:, close_idx]
+    idx = indices_lttb(close_norm, MAX_PONTOS_GRAFICO)
+    
+    ax1.plot(df.index[idx], df[TARGET].iloc[idx], label='Original', alpha=0.7, linewidth=1.5)
     ax1_twin = ax1.twinx()
-    ax1_twin.plot(df.index, dados_normalizados[:, close_idx], 
+    ax1_twin.plot(df.index[idx], close_norm[idx], 
                   label='Normalizado', color='orange', alpha=0.7, linewidth=1.5)
     
     ax1.set_title('Preço de Fechamento: Original vs Normalizado', fontweight='bold')
@@ -400,7 +510,7 @@ def visualizar_preparacao(df: pd.DataFrame, dados_normalizados: np.ndarray,
     
     # 2. Distribuição dos dados normalizados
     ax2 = axes[0, 1]
-    ax2.hist(dados_normalizados[:, close_idx], bins=50, 
+    ax2.hist(close_norm, bins=50, 
              color='green', alpha=0.7, edgecolor='black')
     ax2.set_title('Distribuição do Close Normalizado', fontweight='bold')
     ax2.set_xlabel('Valor Normalizado')
@@ -412,12 +522,14 @@ def visualizar_preparacao(df: pd.DataFrame, dados_normalizados: np.ndarray,
     train_end = dados_divididos['train_size']
     val_end = train_end + dados_divididos['val_size']
     
-    indices = np.arange(len(dados_normalizados[:, close_idx]))
-    ax3.plot(indices[:train_end], dados_normalizados[:train_end, close_idx], 
+    treino = idx[idx < train_end]
+    validacao = idx[(idx >= train_end) & (idx < val_end)]
+    teste = idx[idx >= val_end]
+    ax3.plot(treino, close_norm[treino], 
              label=f'Treino ({TRAIN_SPLIT*100:.0f}%)', color='blue', alpha=0.7)
-    ax3.plot(indices[train_end:val_end], dados_normalizados[train_end:val_end, close_idx], 
+    ax3.plot(validacao, close_norm[validacao], 
              label=f'Validação ({VAL_SPLIT*100:.0f}%)', color='orange', alpha=0.7)
-    ax3.plot(indices[val_end:], dados_normalizados[val_end:, close_idx], 
+    ax3.plot(teste, close_norm[teste], 
              label=f'Teste ({TEST_SPLIT*100:.0f}%)', color='green', alpha=0.7)
     
     ax3.axvline(x=train_end, color='red', linestyle='--', alpha=0.5)
@@ -443,14 +555,12 @@ def visualizar_preparacao(df: pd.DataFrame, dados_normalizados: np.ndarray,
     ax4.legend()
     ax4.grid(True, alpha=0.3)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Salvar gráfico
     plot_path = os.path.join(DOCS_DIR, 'data_preparation_viz.png')
-    plt.savefig(plot_path, dpi=300, bbox_inches='tight')
+    fig.savefig(plot_path, dpi=300, bbox_inches='tight')
     print(f"   💾 Visualizações salvas: {plot_path}\n")
-    
-    plt.close()
 
 
 # ===================================================================
@@ -476,7 +586,7 @@ def main():
         dados_divididos = dividir_dados(X, y, TRAIN_SPLIT, VAL_SPLIT, TEST_SPLIT)
         
         # 5. Salvar dados preparados
-        salvar_dados_preparados(dados_divididos, scaler)
+        salvar_dados_preparados(dados_divididos, scaler, dados_normalizados)
         
         # 6. Visualizar preparação
         visualizar_preparacao(df, dados_normalizados, dados_divididos)
@@ -485,9 +595,8 @@ def main():
         print(f"✅ FASE 2 CONCLUÍDA COM SUCESSO!")
         print(f"{'='*70}\n")
         print(f"📁 Arquivos gerados:")
-        print(f"   → data/processed/X_train.npy, y_train.npy")
-        print(f"   → data/processed/X_val.npy, y_val.npy")
-        print(f"   → data/processed/X_test.npy, y_test.npy")
+        print(f"   → {SERIE_FILE}")
+        print(f"   → {SERIE_META_FILE}")
         print(f"   → models/scaler.pkl")
         print(f"   → docs/data_preparation/")
         print(f"\n📊 Estatísticas:")
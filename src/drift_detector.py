@@ -14,14 +14,31 @@ Abordagem:
 - Objetivo: Detectar mudanças abruptas, não evolução gradual
 """
 
+import functools
 import json
+import os
+import sys
+import time
+from collections import deque
+
 import numpy as np
 import pandas as pd
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from scipy import stats
 
+sys.path.append(os.path.dirname(__file__))
+from _drift_kernels import batch_window_stats, welford_min_max
+from adwin import ADWIN
+
+# Serializador JSON rápido (opcional)
+try:
+    import orjson
+    ORJSON_DISPONIVEL = True
+except ImportError:
+    ORJSON_DISPONIVEL = False
+
 
 # Diretórios
 ROOT_DIR = Path(__file__).parent.parent
@@ -30,7 +47,274 @@ MONITORING_DIR.mkdir(exist_ok=True)
 
 # Arquivos de persistência
 REFERENCE_STATS = MONITORING_DIR / "reference_statistics.json"
-DRIFT_REPORTS = MONITORING_DIR / "drift_reports.json"
+DRIFT_REPORTS = MONITORING_DIR / "drift_reports.ndjson"  # Um relatório por linha (append)
+DRIFT_REPORTS_LEGACY = MONITORING_DIR / "drift_reports.json"
+DRIFT_HISTORY_MAX = 100  # Relatórios mantidos em memória
+# Rotação do NDJSON: acima do limite, só os últimos relatórios são mantidos
+DRIFT_REPORTS_MAX_BYTES = 5 * 1024 * 1024
+DRIFT_REPORTS_KEEP = 10 * DRIFT_HISTORY_MAX
+HIST_BINS = 20  # Bins compartilhados por PSI, KL e Wasserstein
+# Amostra (reservoir) para mediana/quartis da referência lida em blocos
+RESERVOIR_SIZE = 100_000
+# Teste de Wasserstein por lotes: cada janela é dividida em WASSERSTEIN_LOTES
+# lotes (7 dias -> 3 lotes de 2 pontos), de ao menos WASSERSTEIN_LOTE_MIN pontos
+WASSERSTEIN_LOTES = 3
+WASSERSTEIN_LOTE_MIN = 2
+
+
+# Último segundo formatado por _agora_iso: [segundo epoch, texto ISO]
+_ISO_CACHE = [None, ""]
+
+
+def _agora_iso() -> str:
+    """
+    Instante atual em ISO 8601 (hora local, resolução de 1 s).
+    
+    A formatação acontece no máximo uma vez por segundo; chamadas dentro
+    do mesmo segundo só comparam um inteiro de time.time_ns().
+    """
+    segundo = time.time_ns() // 1_000_000_000
+    if segundo != _ISO_CACHE[0]:
+        _ISO_CACHE[0] = segundo
+        _ISO_CACHE[1] = datetime.fromtimestamp(segundo).isoformat()
+    return _ISO_CACHE[1]
+
+
+def _dump_json(obj, path: Path):
+    """Grava JSON com indentação 2 (orjson em um único write, se disponível)."""
+    if ORJSON_DISPONIVEL:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(
+                obj,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            ))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
+
+
+def _tail_lines(path: Path, n: int, bloco: int = 64 * 1024) -> List[bytes]:
+    """Lê as últimas ``n`` linhas não vazias de um arquivo, de trás para frente."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        dados = b""
+        while pos > 0 and dados.count(b"\n") <= n:
+            passo = min(bloco, pos)
+            pos -= passo
+            f.seek(pos)
+            dados = f.read(passo) + dados
+    linhas = [linha for linha in dados.splitlines() if linha.strip()]
+    return linhas[-n:]
+
+
+def _rotacionar_ndjson(path: Path, manter: int):
+    """
+    Reduz um NDJSON às suas últimas ``manter`` linhas.
+    
+    A cópia é gravada ao lado e substitui o original com ``os.replace``,
+    então leitores nunca veem o arquivo pela metade.
+    """
+    linhas = _tail_lines(path, manter)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, 'wb') as f:
+        f.writelines(linha + b"\n" for linha in linhas)
+    os.replace(tmp, path)
+
+
+def _chave_arquivo(path: Path) -> Tuple[str, int, int]:
+    """Chave de cache de um arquivo: (caminho, mtime_ns, tamanho)."""
+    st = path.stat()
+    return str(path), st.st_mtime_ns, st.st_size
+
+
+@functools.lru_cache(maxsize=8)
+def _ler_json(caminho: str, mtime_ns: int, tamanho: int):
+    """JSON interpretado, memoizado enquanto o arquivo não muda."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=8)
+def _ler_ndjson(caminho: str, mtime_ns: int, tamanho: int, limit: Optional[int]) -> Tuple[Dict, ...]:
+    """Relatórios do NDJSON (todos ou os ``limit`` últimos), memoizados em tupla."""
+    if limit is None:
+        with open(caminho, 'rb') as f:
+            linhas = [linha for linha in f if linha.strip()]
+    else:
+        linhas = _tail_lines(Path(caminho), limit)
+    return tuple(json.loads(linha) for linha in linhas)
+
+
+def load_drift_reports(limit: Optional[int] = None) -> List[Dict]:
+    """
+    Carrega os relatórios de drift persistidos, do mais antigo ao mais recente.
+    
+    Lê o NDJSON append-only; se ele ainda não existir, recorre ao
+    ``drift_reports.json`` do formato antigo. A leitura é memoizada por
+    (caminho, mtime, tamanho); cada chamada recebe uma lista nova com uma
+    cópia rasa de cada relatório (já limitada a ``limit``), então os
+    campos aninhados do cache não devem ser alterados.
+    
+    Args:
+        limit: Quantidade máxima de relatórios (os mais recentes). None = todos
+    
+    Returns:
+        Lista de relatórios
+    """
+    if DRIFT_REPORTS.exists():
+        reports = _ler_ndjson(*_chave_arquivo(DRIFT_REPORTS), limit)
+    elif DRIFT_REPORTS_LEGACY.exists():
+        reports = _ler_json(*_chave_arquivo(DRIFT_REPORTS_LEGACY)).get("reports", [])
+        if limit is not None:
+            reports = reports[-limit:]
+    else:
+        return []
+    
+    return [dict(report) for report in reports]
+
+
+def _quantis_ordenados(s: np.ndarray, qs) -> List[float]:
+    """Quantis de um array já ordenado com a interpolação linear do NumPy."""
+    ultimo = len(s) - 1
+    valores = []
+    for q in qs:
+        pos = q * ultimo
+        baixo = int(pos)
+        alto = min(baixo + 1, ultimo)
+        frac = pos - baixo
+        valores.append(float(s[baixo] + (s[alto] - s[baixo]) * frac))
+    return valores
+
+
+def _quantis_particionados(x: np.ndarray, qs) -> List[float]:
+    """
+    Quantis com a interpolação linear do NumPy, sem ordenar o array inteiro.
+    
+    Um único ``np.partition`` (introselect, O(n)) fixa as estatísticas de
+    ordem vizinhas de cada quantil.
+    """
+    ultimo = len(x) - 1
+    posicoes = [q * ultimo for q in qs]
+    kth = sorted({min(int(pos) + d, ultimo) for pos in posicoes for d in (0, 1)})
+    part = np.partition(x, kth)
+    valores = []
+    for pos in posicoes:
+        baixo = int(pos)
+        alto = min(baixo + 1, ultimo)
+        valores.append(float(part[baixo] + (part[alto] - part[baixo]) * (pos - baixo)))
+    return valores
+
+
+def _ks_2samp_ordenado(ref_sorted: np.ndarray, cur_sorted: np.ndarray) -> Tuple[float, float]:
+    """
+    Teste KS de duas amostras sobre arrays já ordenados.
+    
+    As ECDFs são avaliadas com ``searchsorted`` nos pontos das duas amostras,
+    e o p-valor usa a aproximação assintótica ``kstwo.sf(D, round(n*m/(n+m)))``,
+    a mesma de ``ks_2samp(method='asymp')``.
+    """
+    n_ref, n_cur = len(ref_sorted), len(cur_sorted)
+    pontos = np.concatenate([ref_sorted, cur_sorted])
+    cdf_ref = np.searchsorted(ref_sorted, pontos, side='right') / n_ref
+    cdf_cur = np.searchsorted(cur_sorted, pontos, side='right') / n_cur
+    d = float(np.max(np.abs(cdf_ref - cdf_cur)))
+    en = n_ref * n_cur / (n_ref + n_cur)
+    p_value = float(np.clip(stats.kstwo.sf(d, np.round(en)), 0.0, 1.0))
+    return d, p_value
+
+
+def _histogramas_compartilhados(
+    ref_sorted: np.ndarray,
+    cur_sorted: np.ndarray,
+    bins: int = HIST_BINS
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Histogramas normalizados das duas janelas sobre as mesmas bordas.
+    
+    Com os arrays já ordenados, cada histograma sai de um ``searchsorted``
+    nas bordas (O(bins log n)); bins [a, b) e o último fechado, como
+    ``np.histogram``.
+    
+    Returns:
+        (p_ref, p_cur, bordas)
+    """
+    inicio = min(ref_sorted[0], cur_sorted[0])
+    fim = max(ref_sorted[-1], cur_sorted[-1])
+    if fim <= inicio:
+        fim = inicio + 1.0
+    bordas = np.linspace(inicio, fim, bins + 1)
+    
+    def _frequencias(ordenado: np.ndarray) -> np.ndarray:
+        idx = np.searchsorted(ordenado, bordas, side='left')
+        idx[-1] = len(ordenado)
+        return np.diff(idx) / len(ordenado)
+    
+    return _frequencias(ref_sorted), _frequencias(cur_sorted), bordas
+
+
+def psi(p_ref: np.ndarray, p_cur: np.ndarray, eps: float = 1e-6) -> float:
+    """Population Stability Index entre dois histogramas normalizados."""
+    p_ref = np.maximum(p_ref, eps)
+    p_cur = np.maximum(p_cur, eps)
+    return float(np.sum((p_cur - p_ref) * np.log(p_cur / p_ref)))
+
+
+def kl_divergence(p_ref: np.ndarray, p_cur: np.ndarray, eps: float = 1e-6) -> float:
+    """Divergência KL(atual || referência) entre histogramas normalizados."""
+    p_ref = np.maximum(p_ref, eps)
+    p_cur = np.maximum(p_cur, eps)
+    return float(np.sum(p_cur * np.log(p_cur / p_ref)))
+
+
+def wasserstein_from_hist(p_ref: np.ndarray, p_cur: np.ndarray, bordas: np.ndarray) -> float:
+    """Distância de Wasserstein-1 aproximada pelas CDFs dos histogramas."""
+    return float(np.sum(np.abs(np.cumsum(p_ref) - np.cumsum(p_cur)) * np.diff(bordas)))
+
+
+def _teste_wasserstein_em_lotes(
+    reference_data: np.ndarray,
+    current_data: np.ndarray,
+    n_lotes: int = WASSERSTEIN_LOTES
+) -> Optional[Dict]:
+    """
+    Teste de drift por lotes: Wasserstein de cada lote a uma base + t pareado.
+    
+    A janela de referência é dividida ao meio: a metade mais antiga é a
+    base de comparação e a mais recente fornece os lotes de referência,
+    então nenhum lote é comparado com a janela de onde foi tirado. As duas
+    janelas são divididas em ``n_lotes`` lotes do mesmo tamanho (mantendo
+    os pontos mais recentes), cada lote é comparado com a base, e
+    ``ttest_rel`` (unilateral) testa se os lotes atuais estão mais
+    distantes que os de referência.
+    
+    Returns:
+        Resultado do teste ou None se as janelas não comportarem
+        ``n_lotes`` lotes de ao menos WASSERSTEIN_LOTE_MIN pontos
+    """
+    meio = len(reference_data) // 2
+    base, recente = reference_data[:meio], reference_data[meio:]
+    tamanho = min(len(recente), len(current_data)) // n_lotes
+    if n_lotes < 2 or tamanho < WASSERSTEIN_LOTE_MIN or len(base) < tamanho:
+        return None
+    
+    lotes_ref = recente[len(recente) - n_lotes * tamanho:].reshape(n_lotes, tamanho)
+    lotes_cur = current_data[len(current_data) - n_lotes * tamanho:].reshape(n_lotes, tamanho)
+    d_ref = np.array([stats.wasserstein_distance(base, lote) for lote in lotes_ref])
+    d_cur = np.array([stats.wasserstein_distance(base, lote) for lote in lotes_cur])
+    
+    t_stat, p_value = stats.ttest_rel(d_cur, d_ref, alternative='greater')
+    if not np.isfinite(p_value):
+        return None
+    
+    return {
+        "n_batches": int(n_lotes),
+        "batch_size": int(tamanho),
+        "mean_distance_reference": float(d_ref.mean()),
+        "mean_distance_current": float(d_cur.mean()),
+        "statistic": float(t_stat),
+        "p_value": float(p_value)
+    }
 
 
 class SlidingWindowDriftDetector:
@@ -69,43 +353,305 @@ class SlidingWindowDriftDetector:
         
         self.reference_stats = self._load_reference_stats()
         self.drift_history = self._load_drift_history()
+        
+        # Colunas paralelas ao histórico: flag de drift e instante de cada relatório
+        reports = self.drift_history["reports"]
+        self._drift_flags = np.fromiter(
+            (bool(r.get("drift_detected", False)) for r in reports), dtype=bool, count=len(reports)
+        )
+        self._report_times = np.array(
+            [r.get("timestamp") for r in reports], dtype='datetime64[us]'
+        )
+        
+        # Última janela de referência e sua versão ordenada (KS sem reordenar)
+        self._ref_raw: Optional[np.ndarray] = None
+        self._ref_sorted: Optional[np.ndarray] = None
+        self._series_np: Optional[np.ndarray] = None
+        
+        # Janela adaptativa (ADWIN) alimentada incrementalmente pelos preços
+        self.adwin = ADWIN(clock=1)
+        self._adwin_ultimo = None
     
     def _load_reference_stats(self) -> Dict:
-        """Carrega estatísticas de referência."""
+        """
+        Carrega estatísticas de referência.
+        
+        O JSON só é reinterpretado quando o arquivo muda; outras instâncias
+        no mesmo processo recebem uma cópia rasa do resultado em cache
+        (as estatísticas são substituídas, nunca alteradas no lugar).
+        """
         if REFERENCE_STATS.exists():
-            with open(REFERENCE_STATS, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return dict(_ler_json(*_chave_arquivo(REFERENCE_STATS)))
         return {}
     
     def _save_reference_stats(self):
         """Salva estatísticas de referência."""
-        with open(REFERENCE_STATS, 'w', encoding='utf-8') as f:
-            json.dump(self.reference_stats, f, indent=2, ensure_ascii=False)
+        _dump_json(self.reference_stats, REFERENCE_STATS)
     
     def _load_drift_history(self) -> Dict:
-        """Carrega histórico de drift."""
-        if DRIFT_REPORTS.exists():
-            with open(DRIFT_REPORTS, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"reports": [], "approach": "sliding_window"}
-    
-    def _save_drift_history(self):
-        """Salva histórico de drift."""
-        with open(DRIFT_REPORTS, 'w', encoding='utf-8') as f:
-            json.dump(self.drift_history, f, indent=2, ensure_ascii=False)
-    
-    def _calculate_stats(self, data: np.ndarray) -> Dict:
-        """Calcula estatísticas de uma janela de dados."""
+        """Carrega os últimos DRIFT_HISTORY_MAX relatórios de drift."""
+        return {
+            "reports": deque(load_drift_reports(DRIFT_HISTORY_MAX), maxlen=DRIFT_HISTORY_MAX),
+            "approach": "sliding_window"
+        }
+    
+    def _record_report(self, report: Dict):
+        """Acrescenta um relatório ao histórico em memória, às colunas e ao NDJSON."""
+        self.drift_history["reports"].append(report)
+        self._drift_flags = np.append(self._drift_flags, report["drift_detected"])[-DRIFT_HISTORY_MAX:]
+        self._report_times = np.append(
+            self._report_times, np.datetime64(report["timestamp"], 'us')
+        )[-DRIFT_HISTORY_MAX:]
+        self._save_drift_history(report)
+    
+    def _save_drift_history(self, report: Dict):
+        """
+        Acrescenta um relatório ao NDJSON de histórico (uma linha, O(1)).
+        
+        Na primeira gravação, o histórico em memória (que pode vir do
+        ``drift_reports.json`` antigo) é copiado para o NDJSON.
+        
+        Args:
+            report: Relatório recém-gerado
+        """
+        novos = [report] if DRIFT_REPORTS.exists() else self.drift_history["reports"]
+        if ORJSON_DISPONIVEL:
+            with open(DRIFT_REPORTS, 'ab') as f:
+                f.writelines(
+                    orjson.dumps(r, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n" for r in novos
+                )
+                tamanho = f.tell()
+        else:
+            with open(DRIFT_REPORTS, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in novos)
+                tamanho = f.tell()
+        
+        if tamanho > DRIFT_REPORTS_MAX_BYTES:
+            _rotacionar_ndjson(DRIFT_REPORTS, DRIFT_REPORTS_KEEP)
+    
+    def _calculate_stats(self, data: np.ndarray, ordenado: bool = False) -> Dict:
+        """
+        Calcula estatísticas de uma janela de dados.
+        
+        Sem ordenar o array: momentos e extremos vêm de uma passada Welford
+        e mediana/quartis de um único ``np.partition`` (mesma interpolação
+        linear de ``np.percentile``). Com ``ordenado=True`` (array já
+        ordenado, ex: para o KS) tudo é lido direto das posições.
+        
+        Um array 2D (amostras x features) é processado de uma vez pelo
+        kernel ``batch_window_stats``, e cada campo vira uma lista por feature.
+        """
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim == 2:
+            return self._calculate_stats_2d(data)
+        
+        data = data.ravel()
+        if ordenado:
+            mean = data.mean()
+            desvio = data - mean
+            std = np.sqrt(np.dot(desvio, desvio) / len(data))
+            min_val, max_val = data[0], data[-1]
+            median, q1, q3 = _quantis_ordenados(data, (0.5, 0.25, 0.75))
+        else:
+            mean, std, min_val, max_val = welford_min_max(data)
+            median, q1, q3 = _quantis_particionados(data, (0.5, 0.25, 0.75))
+        
         return {
             "n_samples": int(len(data)),
-            "mean": float(np.mean(data)),
-            "std": float(np.std(data)),
-            "min": float(np.min(data)),
-            "max": float(np.max(data)),
-            "median": float(np.median(data)),
-            "q1": float(np.percentile(data, 25)),
-            "q3": float(np.percentile(data, 75)),
-            "iqr": float(np.percentile(data, 75) - np.percentile(data, 25))
+            "mean": float(mean),
+            "std": float(std),
+            "min": float(min_val),
+            "max": float(max_val),
+            "median": median,
+            "q1": q1,
+            "q3": q3,
+            "iqr": q3 - q1
+        }
+    
+    def _calculate_stats_2d(self, data: np.ndarray) -> Dict:
+        """Estatísticas por feature (colunas) de um lote 2D, em um único kernel."""
+        n, n_features = data.shape
+        out_mean = np.empty(n_features)
+        out_std = np.empty(n_features)
+        out_min = np.empty(n_features)
+        out_max = np.empty(n_features)
+        out_quantis = np.empty((3, n_features))
+        batch_window_stats(
+            np.asfortranarray(data), out_mean, out_std, out_min, out_max, out_quantis
+        )
+        median, q1, q3 = out_quantis
+        
+        return {
+            "n_samples": int(n),
+            "n_features": int(n_features),
+            "mean": out_mean.tolist(),
+            "std": out_std.tolist(),
+            "min": out_min.tolist(),
+            "max": out_max.tolist(),
+            "median": median.tolist(),
+            "q1": q1.tolist(),
+            "q3": q3.tolist(),
+            "iqr": (q3 - q1).tolist()
+        }
+    
+    def set_reference_statistics(self, data: np.ndarray) -> Dict:
+        """
+        Define a referência a partir de um array completo de preços.
+        
+        Args:
+            data: Preços de referência (ex: histórico de treino)
+        
+        Returns:
+            Estatísticas de referência salvas
+        """
+        data = np.asarray(data, dtype=np.float64).ravel()
+        data = data[~np.isnan(data)]
+        if len(data) == 0:
+            raise ValueError("Nenhum dado válido para estatísticas de referência")
+        
+        stats_dict = self._calculate_stats(data)
+        stats_dict["timestamp"] = _agora_iso()
+        stats_dict["window_type"] = "fixed"
+        
+        self.reference_stats = stats_dict
+        self._save_reference_stats()
+        return stats_dict
+    
+    def set_reference_statistics_streaming(self, chunks: Iterable[np.ndarray]) -> Dict:
+        """
+        Define a referência lendo os dados em blocos, com memória O(1).
+        
+        Usa o algoritmo de Welford com a combinação de Chan para juntar
+        (n, média, M2) de cada bloco. Mediana e quartis vêm de uma amostra
+        uniforme (reservoir) de até RESERVOIR_SIZE valores: exatos quando
+        a série cabe nela, aproximados acima disso. As chaves são as mesmas
+        de set_reference_statistics.
+        
+        Args:
+            chunks: Iterável de arrays de preços (ex: blocos de um CSV)
+        
+        Returns:
+            Estatísticas de referência salvas
+        """
+        n = 0
+        mean = 0.0
+        m2 = 0.0
+        min_val = np.inf
+        max_val = -np.inf
+        amostra = np.empty(RESERVOIR_SIZE, dtype=np.float64)
+        rng = np.random.default_rng(seed=42)
+        
+        for chunk in chunks:
+            chunk = np.asarray(chunk, dtype=np.float64).ravel()
+            chunk = chunk[~np.isnan(chunk)]
+            n_b = len(chunk)
+            if n_b == 0:
+                continue
+            
+            mean_b = chunk.mean()
+            desvio = chunk - mean_b
+            m2_b = float(np.dot(desvio, desvio))
+            
+            n_total = n + n_b
+            delta = mean_b - mean
+            mean += delta * n_b / n_total
+            m2 += m2_b + delta * delta * n * n_b / n_total
+            n = n_total
+            
+            min_val = min(min_val, float(chunk.min()))
+            max_val = max(max_val, float(chunk.max()))
+            
+            # Reservoir (algoritmo R vetorizado): completa a amostra e depois
+            # o i-ésimo valor substitui uma posição com probabilidade K/i
+            n_antes = n - n_b
+            livres = max(RESERVOIR_SIZE - n_antes, 0)
+            amostra[n_antes:n_antes + min(livres, n_b)] = chunk[:livres]
+            if n_b > livres:
+                indices = np.arange(n_antes + livres + 1, n + 1)
+                posicoes = (rng.random(len(indices)) * indices).astype(np.int64)
+                troca = posicoes < RESERVOIR_SIZE
+                amostra[posicoes[troca]] = chunk[livres:][troca]
+        
+        if n == 0:
+            raise ValueError("Nenhum dado válido para estatísticas de referência")
+        
+        median, q1, q3 = _quantis_particionados(amostra[:min(n, RESERVOIR_SIZE)], (0.5, 0.25, 0.75))
+        
+        stats_dict = {
+            "n_samples": int(n),
+            "mean": float(mean),
+            "std": float(np.sqrt(m2 / n)),
+            "min": min_val,
+            "max": max_val,
+            "median": median,
+            "q1": q1,
+            "q3": q3,
+            "iqr": q3 - q1,
+            "timestamp": _agora_iso(),
+            "window_type": "fixed"
+        }
+        
+        self.reference_stats = stats_dict
+        self._save_reference_stats()
+        return stats_dict
+    
+    def _sorted_reference(self, reference_data: np.ndarray) -> np.ndarray:
+        """
+        Retorna a janela de referência ordenada, reaproveitando a última ordenação.
+        
+        Enquanto a janela não muda entre detecções, a comparação O(n)
+        substitui a reordenação O(n log n).
+        """
+        reference_data = np.asarray(reference_data, dtype=np.float64).ravel()
+        if self._ref_raw is None or not np.array_equal(self._ref_raw, reference_data):
+            self._ref_raw = reference_data.copy()
+            self._ref_sorted = np.sort(reference_data)
+        return self._ref_sorted
+    
+    def _price_array(self, df: pd.DataFrame, price_column: str) -> np.ndarray:
+        """
+        Extrai a coluna de preço como array float64 plano (sem cópia se já for).
+        
+        Um DataFrame de colunas MultiIndex (yfinance recente) devolve
+        ``df['Close']`` com forma (n, 1); o ravel mantém a série 1D. O array
+        fica em ``self._series_np`` e as janelas são fatias (views) dele.
+        """
+        self._series_np = np.asarray(
+            df[price_column].to_numpy(dtype=np.float64, copy=False)
+        ).ravel()
+        return self._series_np
+    
+    def _update_adwin(self, index: pd.Index, serie: np.ndarray) -> Dict:
+        """
+        Alimenta o ADWIN só com as observações posteriores à última vista.
+        
+        Cada inserção custa O(log n); a janela adaptativa indica quantos
+        pregões recentes são homogêneos e se houve corte nesta atualização.
+        
+        Args:
+            index: Índice (datas) ordenado da série
+            serie: Preços alinhados ao índice
+        
+        Returns:
+            Estado da janela adaptativa
+        """
+        inicio = 0
+        if self._adwin_ultimo is not None:
+            inicio = int(index.searchsorted(self._adwin_ultimo, side='right'))
+        novos = serie[inicio:]
+        
+        mudanca = False
+        for valor in novos[~np.isnan(novos)].tolist():
+            mudanca |= self.adwin.update(valor)
+        if len(novos):
+            self._adwin_ultimo = index[-1]
+        
+        return {
+            "width": int(self.adwin.width),
+            "mean": float(self.adwin.mean),
+            "std": float(np.sqrt(self.adwin.variance)),
+            "change_detected": bool(mudanca),
+            "new_observations": int(len(novos))
         }
     
     def update_reference_from_recent_data(self, df: pd.DataFrame, price_column: str = 'Close'):
@@ -120,22 +666,24 @@ class SlidingWindowDriftDetector:
         print("📊 ATUALIZANDO REFERÊNCIA (JANELA DESLIZANTE)")
         print(f"{'='*60}")
         
-        # Ordenar por data
-        df = df.sort_index()
+        # Ordenar por data (só copia se necessário)
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        serie = self._price_array(df, price_column)
         
         # Janela de referência: de (current_window + reference_window) até current_window dias atrás
         end_ref = len(df) - self.current_window_days
         start_ref = max(0, end_ref - self.reference_window_days)
         
-        reference_data = df.iloc[start_ref:end_ref][price_column].values
+        reference_data = serie[start_ref:end_ref]
         
         if len(reference_data) < 10:
             print("❌ Dados insuficientes para janela de referência")
             return
         
-        # Calcula estatísticas
-        stats_dict = self._calculate_stats(reference_data)
-        stats_dict["timestamp"] = datetime.now().isoformat()
+        # Calcula estatísticas (a ordenação fica em cache para a detecção)
+        stats_dict = self._calculate_stats(self._sorted_reference(reference_data), ordenado=True)
+        stats_dict["timestamp"] = _agora_iso()
         stats_dict["window_type"] = "sliding"
         stats_dict["reference_days"] = self.reference_window_days
         stats_dict["current_days"] = self.current_window_days
@@ -178,23 +726,30 @@ class SlidingWindowDriftDetector:
         print("🔍 DETECÇÃO DE DRIFT (JANELA DESLIZANTE)")
         print(f"{'='*60}")
         
-        # Ordenar por data
-        df = df.sort_index()
+        # Ordenar por data (só copia se necessário)
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        serie = self._price_array(df, price_column)
         
-        # Janela atual: últimos N dias
-        current_data = df.iloc[-self.current_window_days:][price_column].values
+        # Janela atual: últimos N dias (views do array, sem passar pelo pandas)
+        current_data = serie[-self.current_window_days:]
         
         # Janela de referência: antes da janela atual
         end_ref = len(df) - self.current_window_days
         start_ref = max(0, end_ref - self.reference_window_days)
-        reference_data = df.iloc[start_ref:end_ref][price_column].values
+        reference_data = serie[start_ref:end_ref]
         
         if len(current_data) < 3 or len(reference_data) < 10:
             return {"error": "Dados insuficientes para análise de drift"}
         
-        # Calcula estatísticas
-        current_stats = self._calculate_stats(current_data)
-        reference_stats = self._calculate_stats(reference_data)
+        # Janela adaptativa: atualização incremental, informativa no relatório
+        adaptive = self._update_adwin(df.index, serie)
+        
+        # Calcula estatísticas (referência ordenada em cache)
+        ref_sorted = self._sorted_reference(reference_data)
+        cur_sorted = np.sort(np.asarray(current_data, dtype=np.float64))
+        current_stats = self._calculate_stats(cur_sorted, ordenado=True)
+        reference_stats = self._calculate_stats(ref_sorted, ordenado=True)
         
         # Compara estatísticas
         drift_detected = False
@@ -225,10 +780,7 @@ class SlidingWindowDriftDetector:
         # 3. Teste Kolmogorov-Smirnov (se dados suficientes)
         ks_result = None
         if len(current_data) >= 5 and len(reference_data) >= 20:
-            ks_statistic, p_value = stats.ks_2samp(reference_data, current_data)
-            # Garantir que são floats (podem vir como numpy arrays)
-            ks_stat_float = float(ks_statistic) if hasattr(ks_statistic, '__float__') else float(ks_statistic.item()) if hasattr(ks_statistic, 'item') else float(ks_statistic)
-            p_value_float = float(p_value) if hasattr(p_value, '__float__') else float(p_value.item()) if hasattr(p_value, 'item') else float(p_value)
+            ks_stat_float, p_value_float = _ks_2samp_ordenado(ref_sorted, cur_sorted)
             ks_result = {"statistic": ks_stat_float, "p_value": p_value_float}
             
             if p_value_float < self.significance_level:
@@ -238,6 +790,25 @@ class SlidingWindowDriftDetector:
                     drift_detected = True
                     alerts.append(f"Distribuição diferente (KS p={p_value_float:.4f})")
         
+        # 4. Wasserstein por lotes + t pareado (mesmo critério conservador do KS);
+        #    com as janelas padrão (30/7 dias): 3 lotes de 2 pontos
+        batched_result = _teste_wasserstein_em_lotes(reference_data, current_data)
+        if batched_result and batched_result["p_value"] < self.significance_level:
+            if mean_diff_pct > 3 or std_diff_pct > 30:
+                drift_detected = True
+                alerts.append(
+                    f"Lotes recentes mais distantes da referência (Wasserstein, p={batched_result['p_value']:.4f})"
+                )
+        
+        # 5. Divergências a partir de um único par de histogramas (mesmas bordas)
+        p_ref, p_cur, bordas = _histogramas_compartilhados(ref_sorted, cur_sorted)
+        divergences = {
+            "bins": HIST_BINS,
+            "psi": psi(p_ref, p_cur),
+            "kl_divergence": kl_divergence(p_ref, p_cur),
+            "wasserstein": wasserstein_from_hist(p_ref, p_cur, bordas)
+        }
+        
         # Período atual e referência
         if hasattr(df.index[-1], 'strftime'):
             current_period = f"{df.index[-self.current_window_days].strftime('%d/%m')} a {df.index[-1].strftime('%d/%m')}"
@@ -248,7 +819,7 @@ class SlidingWindowDriftDetector:
         
         # Monta relatório
         report = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _agora_iso(),
             "approach": "sliding_window",
             "drift_detected": drift_detected,
             "severity": "high" if mean_diff_pct > 10 or std_diff_pct > 100 else "medium" if drift_detected else "none",
@@ -266,19 +837,19 @@ class SlidingWindowDriftDetector:
             "comparisons": {
                 "mean_diff_pct": float(mean_diff_pct),
                 "std_diff_pct": float(std_diff_pct),
-                "ks_test": ks_result
+                "ks_test": ks_result,
+                "batched_wasserstein": batched_result,
+                "divergences": divergences
             },
+            "adaptive_window": adaptive,
             "thresholds": {
                 "mean_threshold_pct": self.mean_threshold_pct,
                 "std_threshold_pct": self.std_threshold_pct
             }
         }
         
-        # Adiciona ao histórico (mantém últimos 100)
-        self.drift_history["reports"].append(report)
-        if len(self.drift_history["reports"]) > 100:
-            self.drift_history["reports"] = self.drift_history["reports"][-100:]
-        self._save_drift_history()
+        # Adiciona ao histórico (deque mantém os últimos DRIFT_HISTORY_MAX)
+        self._record_report(report)
         
         # Print resumo
         print(f"\n📅 Janela Atual: {current_period}")
@@ -304,22 +875,159 @@ class SlidingWindowDriftDetector:
         
         return report
     
-    def get_drift_summary(self, n_reports: int = 10) -> Dict:
-        """Retorna resumo das últimas análises de drift."""
-        recent = self.drift_history.get("reports", [])[-n_reports:]
+    def detect_drift(self, current_data: np.ndarray, window_name: str = "current") -> Dict:
+        """
+        Compara um lote de dados com a referência fixa (set_reference_statistics).
+        
+        A referência é modelada como normal(mean, std), então o teste KS é de
+        uma amostra contra a CDF analítica: determinístico e sem sortear uma
+        amostra sintética de referência a cada chamada.
+        
+        Args:
+            current_data: Valores observados (ex: preços de entrada da API)
+            window_name: Rótulo do lote no relatório
+        
+        Returns:
+            Relatório de drift
+        """
+        if not self.reference_stats:
+            return {"error": "Estatísticas de referência não definidas"}
+        
+        current_data = np.asarray(current_data, dtype=np.float64).ravel()
+        current_data = current_data[~np.isnan(current_data)]
+        if len(current_data) < 3:
+            return {"error": "Dados insuficientes para análise de drift"}
+        
+        current_stats = self._calculate_stats(current_data)
+        ref_mean = self.reference_stats["mean"]
+        ref_std = self.reference_stats["std"]
+        
+        drift_detected = False
+        alerts = []
+        
+        mean_diff_pct = abs((current_stats["mean"] - ref_mean) / ref_mean) * 100 if ref_mean else 0.0
+        std_diff_pct = abs((current_stats["std"] - ref_std) / ref_std) * 100 if ref_std else 0.0
+        
+        if mean_diff_pct > self.mean_threshold_pct:
+            drift_detected = True
+            alerts.append(f"Média mudou {mean_diff_pct:.2f}%")
+        
+        if std_diff_pct > self.std_threshold_pct:
+            drift_detected = True
+            alerts.append(f"Desvio padrão mudou {std_diff_pct:.2f}%")
+        
+        # Teste KS de uma amostra contra normal(ref_mean, ref_std)
+        ks_result = None
+        if ref_std > 0 and len(current_data) >= 5:
+            ks_statistic, p_value = stats.kstest(current_data, 'norm', args=(ref_mean, ref_std))
+            ks_result = {"statistic": float(ks_statistic), "p_value": float(p_value)}
+            
+            # Mesmo critério da janela deslizante: KS sozinho não marca drift
+            if p_value < self.significance_level and (mean_diff_pct > 3 or std_diff_pct > 30):
+                drift_detected = True
+                alerts.append(f"KS test: p-value={p_value:.4f} < {self.significance_level}")
+        
+        report = {
+            "timestamp": _agora_iso(),
+            "window_name": window_name,
+            "drift_detected": drift_detected,
+            "severity": "high" if mean_diff_pct > 10 or std_diff_pct > 100 else "medium" if drift_detected else "none",
+            "alerts": alerts,
+            "current_stats": current_stats,
+            "reference_stats": self.reference_stats,
+            "comparisons": {
+                "mean_diff_pct": float(mean_diff_pct),
+                "std_diff_pct": float(std_diff_pct),
+                "ks_test": ks_result
+            }
+        }
+        
+        self._record_report(report)
+        
+        return report
+    
+    def monitor_prediction_distribution(self, predictions: List[float]) -> Dict:
+        """
+        Analisa a distribuição das previsões e marca outliers pelo método IQR.
+        
+        Outliers = valores < Q1 - 1.5*IQR ou > Q3 + 1.5*IQR. Mínimo, quartis,
+        mediana e máximo saem de um único ``np.partition``.
+        
+        Args:
+            predictions: Valores previstos pelo modelo
+        
+        Returns:
+            Estatísticas da distribuição e outliers
+        """
+        pred_array = np.asarray(predictions, dtype=np.float64).ravel()
+        if len(pred_array) == 0:
+            return {"error": "Nenhuma previsão para analisar"}
+        
+        min_val, q1, median, q3, max_val = _quantis_particionados(
+            pred_array, (0.0, 0.25, 0.5, 0.75, 1.0)
+        )
+        iqr = q3 - q1
+        lower_bound = q1 - 1.5 * iqr
+        upper_bound = q3 + 1.5 * iqr
+        
+        # Máscara combinada no próprio buffer; .tolist() já entrega floats Python
+        outlier_mask = pred_array < lower_bound
+        outlier_mask |= pred_array > upper_bound
+        outliers = pred_array[outlier_mask]
+        
+        return {
+            "timestamp": _agora_iso(),
+            "n_predictions": int(len(pred_array)),
+            "stats": {
+                "mean": float(pred_array.mean()),
+                "std": float(pred_array.std()),
+                "min": min_val,
+                "max": max_val,
+                "median": median,
+                "q1": q1,
+                "q3": q3,
+                "iqr": iqr
+            },
+            "outliers": {
+                "count": int(len(outliers)),
+                "percentage": float(len(outliers) / len(pred_array) * 100),
+                "lower_bound": lower_bound,
+                "upper_bound": upper_bound,
+                "values": outliers.tolist()
+            }
+        }
+    
+    def get_drift_summary(self, n_reports: int = 10, days: Optional[int] = None) -> Dict:
+        """
+        Retorna resumo das últimas análises de drift.
+        
+        Args:
+            n_reports: Quantidade de relatórios mais recentes considerados
+            days: Se informado, considera os relatórios dos últimos N dias
+        
+        Returns:
+            Resumo com contagem e taxa de drift
+        """
+        if days is None:
+            flags = self._drift_flags[-n_reports:]
+        else:
+            limite = np.datetime64(datetime.now() - timedelta(days=days), 'us')
+            flags = self._drift_flags[self._report_times >= limite]
         
-        if not recent:
+        total = len(flags)
+        if not total:
             return {"message": "Nenhuma análise de drift registrada"}
         
-        drift_count = sum(1 for r in recent if r.get("drift_detected", False))
+        drift_count = int(np.count_nonzero(flags))
+        last = self.drift_history["reports"][-1]
         
         return {
             "approach": "sliding_window",
-            "total_checks": len(recent),
+            "total_checks": total,
             "drift_detected_count": drift_count,
-            "drift_rate": float(drift_count / len(recent) * 100) if recent else 0,
-            "last_check_timestamp": recent[-1].get("timestamp") if recent else None,
-            "last_drift_detected": recent[-1].get("drift_detected") if recent else None,
+            "drift_rate": float(drift_count / total * 100),
+            "last_check_timestamp": last.get("timestamp"),
+            "last_drift_detected": last.get("drift_detected"),
             "configuration": {
                 "reference_window_days": self.reference_window_days,
                 "current_window_days": self.current_window_days,
@@ -378,7 +1086,7 @@ def main():
     if "error" in result:
         print(f"❌ Erro: {result['error']}")
     else:
-        print("\n📋 Resultado salvo em monitoring/drift_reports.json")
+        print("\n📋 Resultado salvo em monitoring/drift_reports.ndjson")
 
 
 if __name__ == "__main__":
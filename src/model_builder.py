@@ -15,20 +15,35 @@ Data: 02/11/2025
 Versão: 1.0.0
 """
 
+import io
 import os
+import sys
 import json
+import logging
 import warnings
 from datetime import datetime
 from typing import Tuple
 
 import numpy as np
-from tensorflow import keras
+from tensorflow.keras import mixed_precision
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 from tensorflow.keras.optimizers import Adam
 
+# Serializador JSON rápido (opcional)
+try:
+    import orjson
+    ORJSON_DISPONIVEL = True
+except ImportError:
+    ORJSON_DISPONIVEL = False
+
 warnings.filterwarnings('ignore')
 
+# Mensagens de construção em DEBUG: silenciosas para quem importa o módulo
+# (API, retreino, testes); main() as exibe no console
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
 # ===================================================================
 # CONFIGURAÇÕES
 # ===================================================================
@@ -47,6 +62,17 @@ LSTM_UNITS_1 = 64   # Neurônios na primeira camada LSTM
 LSTM_UNITS_2 = 32   # Neurônios na segunda camada LSTM
 DROPOUT_RATE = 0.2  # Taxa de dropout (20%)
 
+# Configuração exigida pelo kernel fundido cuDNN (CuDNNLSTM) em GPU.
+# Qualquer desvio (ex: recurrent_dropout > 0, unroll=True, outra ativação)
+# faz o Keras cair na implementação passo a passo.
+LSTM_CUDNN_KWARGS = {
+    'activation': 'tanh',
+    'recurrent_activation': 'sigmoid',
+    'recurrent_dropout': 0.0,
+    'unroll': False,
+    'use_bias': True,
+}
+
 # Compilação
 OPTIMIZER = 'adam'
 LOSS_FUNCTION = 'mse'  # Mean Squared Error
@@ -61,6 +87,62 @@ os.makedirs(DOCS_DIR, exist_ok=True)
 # FUNÇÕES
 # ===================================================================
 
+def verificar_kernel_cudnn(layer: LSTM) -> bool:
+    """
+    Indica se uma camada LSTM pode usar o kernel fundido cuDNN.
+    
+    Usa o atributo interno ``_could_use_gpu_kernel`` do Keras (TF 2.x) e,
+    se ele não existir, confere a configuração da camada.
+    
+    Parâmetros:
+    -----------
+    layer : LSTM
+        Camada LSTM já construída
+        
+    Retorna:
+    --------
+    bool
+        True se a camada atende aos requisitos do cuDNN
+    """
+    if hasattr(layer, '_could_use_gpu_kernel'):
+        return bool(layer._could_use_gpu_kernel)
+    
+    config = layer.get_config()
+    return (
+        config['activation'] == 'tanh'
+        and config['recurrent_activation'] == 'sigmoid'
+        and config['recurrent_dropout'] == 0
+        and not config['unroll']
+        and config['use_bias']
+    )
+
+
+def ativar_precisao_mista(usar: bool = False) -> bool:
+    """
+    Ativa a política global mixed_float16 (LSTM em FP16, saída em FP32).
+    
+    Só compensa em GPUs com Tensor Cores; em CPU o FP16 é mais lento.
+    Deve ser chamada antes de construir o modelo. Com a política ativa,
+    compile() envolve o otimizador em um LossScaleOptimizer.
+    
+    É opt-in: a política fica gravada na config das camadas do .keras,
+    e a API (CPU) passaria a servir o modelo em FP16.
+    
+    Parâmetros:
+    -----------
+    usar : bool
+        Ativa a precisão mista (padrão: desativada)
+        
+    Retorna:
+    --------
+    bool
+        Se a precisão mista foi ativada
+    """
+    if usar:
+        mixed_precision.set_global_policy('mixed_float16')
+    return usar
+
+
 def construir_modelo_lstm(timesteps: int = TIMESTEPS, 
                           features: int = FEATURES,
                           lstm1_units: int = LSTM_UNITS_1,
@@ -94,62 +176,77 @@ def construir_modelo_lstm(timesteps: int = TIMESTEPS,
     Sequential
         Modelo Keras compilado
     """
-    print(f"\n{'='*70}")
-    print(f"CONSTRUÇÃO DO MODELO LSTM")
-    print(f"{'='*70}\n")
+    logger.debug(f"\n{'='*70}")
+    logger.debug(f"CONSTRUÇÃO DO MODELO LSTM")
+    logger.debug(f"{'='*70}\n")
     
-    print(f"🔨 Construindo Arquitetura:")
-    print(f"{'─'*70}\n")
+    logger.debug(f"🔨 Construindo Arquitetura:")
+    logger.debug(f"{'─'*70}\n")
     
     # Inicializar modelo sequencial
-    print(f"   1️⃣  Inicializando modelo Sequential...")
+    logger.debug(f"   1️⃣  Inicializando modelo Sequential...")
     model = Sequential(name='LSTM_B3SA3_Predictor')
-    print(f"      ✅ Modelo inicializado\n")
+    logger.debug(f"      ✅ Modelo inicializado\n")
     
     # Camada LSTM 1
-    print(f"   2️⃣  Adicionando Camada LSTM 1:")
-    print(f"      • Unidades: {lstm1_units}")
-    print(f"      • Return sequences: True")
-    print(f"      • Input shape: ({timesteps}, {features})")
+    logger.debug(f"   2️⃣  Adicionando Camada LSTM 1:")
+    logger.debug(f"      • Unidades: {lstm1_units}")
+    logger.debug(f"      • Return sequences: True")
+    logger.debug(f"      • Input shape: ({timesteps}, {features})")
     
     model.add(LSTM(
         units=lstm1_units,
         return_sequences=True,
         input_shape=(timesteps, features),
-        name='lstm_layer_1'
+        name='lstm_layer_1',
+        **LSTM_CUDNN_KWARGS
     ))
-    print(f"      ✅ LSTM Layer 1 adicionada\n")
+    logger.debug(f"      ✅ LSTM Layer 1 adicionada\n")
     
     # Camada Dropout
-    print(f"   3️⃣  Adicionando Camada Dropout:")
-    print(f"      • Taxa: {dropout} ({dropout*100:.0f}%)")
-    print(f"      • Função: Reduzir overfitting")
+    logger.debug(f"   3️⃣  Adicionando Camada Dropout:")
+    logger.debug(f"      • Taxa: {dropout} ({dropout*100:.0f}%)")
+    logger.debug(f"      • Função: Reduzir overfitting")
     
     model.add(Dropout(dropout, name='dropout_layer'))
-    print(f"      ✅ Dropout Layer adicionada\n")
+    logger.debug(f"      ✅ Dropout Layer adicionada\n")
     
     # Camada LSTM 2
-    print(f"   4️⃣  Adicionando Camada LSTM 2:")
-    print(f"      • Unidades: {lstm2_units}")
-    print(f"      • Return sequences: False (camada final recorrente)")
+    logger.debug(f"   4️⃣  Adicionando Camada LSTM 2:")
+    logger.debug(f"      • Unidades: {lstm2_units}")
+    logger.debug(f"      • Return sequences: False (camada final recorrente)")
     
     model.add(LSTM(
         units=lstm2_units,
         return_sequences=False,
-        name='lstm_layer_2'
+        name='lstm_layer_2',
+        **LSTM_CUDNN_KWARGS
     ))
-    print(f"      ✅ LSTM Layer 2 adicionada\n")
+    logger.debug(f"      ✅ LSTM Layer 2 adicionada\n")
     
     # Camada Densa de Saída
-    print(f"   5️⃣  Adicionando Camada Dense de Saída:")
-    print(f"      • Unidades: 1 (previsão do preço)")
-    print(f"      • Ativação: Linear (regressão)")
+    logger.debug(f"   5️⃣  Adicionando Camada Dense de Saída:")
+    logger.debug(f"      • Unidades: 1 (previsão do preço)")
+    logger.debug(f"      • Ativação: Linear (regressão)")
     
-    model.add(Dense(1, name='output_layer'))
-    print(f"      ✅ Dense Output Layer adicionada\n")
+    # dtype float32 mantém a saída/perda em FP32 sob política mixed_float16
+    model.add(Dense(1, dtype='float32', name='output_layer'))
+    logger.debug(f"      ✅ Dense Output Layer adicionada\n")
     
-    print(f"{'─'*70}")
-    print(f"✅ Arquitetura construída com sucesso!\n")
+    # Confere se as camadas LSTM se qualificam para o kernel cuDNN
+    # (filtro local: o 'ignore' global do módulo esconderia o aviso)
+    for layer in model.layers:
+        if isinstance(layer, LSTM) and not verificar_kernel_cudnn(layer):
+            with warnings.catch_warnings():
+                warnings.simplefilter('always', RuntimeWarning)
+                warnings.warn(
+                    f"Camada {layer.name} não é compatível com cuDNN; "
+                    f"a GPU usará a implementação passo a passo",
+                    RuntimeWarning
+                )
+    
+    logger.debug(f"{'─'*70}")
+    logger.debug(f"✅ Arquitetura construída com sucesso!\n")
     
     return model
 
@@ -180,16 +277,16 @@ def compilar_modelo(model: Sequential,
     if metrics is None:
         metrics = METRICS
     
-    print(f"⚙️  Compilando Modelo:")
-    print(f"{'─'*70}\n")
+    logger.debug(f"⚙️  Compilando Modelo:")
+    logger.debug(f"{'─'*70}\n")
     
-    print(f"   🔧 Configurações de Compilação:")
-    print(f"      • Otimizador: {optimizer.upper()}")
-    print(f"        └─ Adam: Otimizador adaptativo eficiente")
-    print(f"      • Função de Perda: {loss.upper()}")
-    print(f"        └─ MSE: Apropriada para regressão")
-    print(f"      • Métricas: {[m.upper() for m in metrics]}")
-    print(f"        └─ MAE: Erro médio absoluto (interpretação fácil)\n")
+    logger.debug(f"   🔧 Configurações de Compilação:")
+    logger.debug(f"      • Otimizador: {optimizer.upper()}")
+    logger.debug(f"        └─ Adam: Otimizador adaptativo eficiente")
+    logger.debug(f"      • Função de Perda: {loss.upper()}")
+    logger.debug(f"        └─ MSE: Apropriada para regressão")
+    logger.debug(f"      • Métricas: {[m.upper() for m in metrics]}")
+    logger.debug(f"        └─ MAE: Erro médio absoluto (interpretação fácil)\n")
     
     model.compile(
         optimizer=optimizer,
@@ -197,7 +294,7 @@ def compilar_modelo(model: Sequential,
         metrics=metrics
     )
     
-    print(f"   ✅ Modelo compilado com sucesso!\n")
+    logger.debug(f"   ✅ Modelo compilado com sucesso!\n")
     
     return model
 
@@ -216,26 +313,28 @@ def exibir_resumo_modelo(model: Sequential) -> dict:
     dict
         Dicionário com informações do modelo
     """
-    print(f"📊 Resumo da Arquitetura:")
-    print(f"{'─'*70}\n")
+    logger.debug(f"📊 Resumo da Arquitetura:")
+    logger.debug(f"{'─'*70}\n")
     
-    # Exibir resumo do Keras
-    model.summary()
+    # Exibir resumo do Keras (só monta o texto se DEBUG estiver ativo)
+    if logger.isEnabledFor(logging.DEBUG):
+        model.summary(print_fn=logger.debug)
     
-    print(f"\n{'─'*70}\n")
+    logger.debug(f"\n{'─'*70}\n")
     
     # Contar parâmetros
+    # Tamanho de cada peso a partir da forma estática, sem ops do TF
     total_params = model.count_params()
-    trainable_params = sum([keras.backend.count_params(w) for w in model.trainable_weights])
+    trainable_params = int(sum(np.prod(w.shape.as_list()) for w in model.trainable_weights))
     non_trainable_params = total_params - trainable_params
     
-    print(f"📈 Estatísticas do Modelo:")
-    print(f"   • Total de parâmetros:      {total_params:,}")
-    print(f"   • Parâmetros treináveis:    {trainable_params:,}")
-    print(f"   • Parâmetros não-treináveis: {non_trainable_params:,}")
-    print(f"   • Número de camadas:        {len(model.layers)}")
-    print(f"   • Input shape:              {model.input_shape}")
-    print(f"   • Output shape:             {model.output_shape}\n")
+    logger.debug(f"📈 Estatísticas do Modelo:")
+    logger.debug(f"   • Total de parâmetros:      {total_params:,}")
+    logger.debug(f"   • Parâmetros treináveis:    {trainable_params:,}")
+    logger.debug(f"   • Parâmetros não-treináveis: {non_trainable_params:,}")
+    logger.debug(f"   • Número de camadas:        {len(model.layers)}")
+    logger.debug(f"   • Input shape:              {model.input_shape}")
+    logger.debug(f"   • Output shape:             {model.output_shape}\n")
     
     # Informações das camadas
     info = {
@@ -248,9 +347,11 @@ def exibir_resumo_modelo(model: Sequential) -> dict:
             'non_trainable_params': int(non_trainable_params)
         },
         'compilation': {
-            'optimizer': model.optimizer.get_config()['name'],
+            # Sob mixed_float16 o otimizador vem envolto em LossScaleOptimizer
+            'optimizer': getattr(model.optimizer, 'inner_optimizer', model.optimizer).get_config()['name'],
             'loss': model.loss,
-            'metrics': [m.name for m in model.metrics]
+            'metrics': [m.name for m in model.metrics],
+            'dtype_policy': mixed_precision.global_policy().name
         },
         'input_shape': list(model.input_shape[1:]),
         'output_shape': list(model.output_shape[1:])
@@ -269,6 +370,7 @@ def exibir_resumo_modelo(model: Sequential) -> dict:
         if isinstance(layer, LSTM):
             layer_info['units'] = layer.units
             layer_info['return_sequences'] = layer.return_sequences
+            layer_info['cudnn_compativel'] = verificar_kernel_cudnn(layer)
         elif isinstance(layer, Dropout):
             layer_info['rate'] = float(layer.rate)
         elif isinstance(layer, Dense):
@@ -291,8 +393,8 @@ def salvar_arquitetura(model: Sequential, info: dict) -> None:
     info : dict
         Dicionário com informações do modelo
     """
-    print(f"💾 Salvando Arquitetura:")
-    print(f"{'─'*70}\n")
+    logger.debug(f"💾 Salvando Arquitetura:")
+    logger.debug(f"{'─'*70}\n")
     
     # Salvar estrutura do modelo em JSON
     model_json = model.to_json()
@@ -302,25 +404,34 @@ def salvar_arquitetura(model: Sequential, info: dict) -> None:
         f.write(model_json)
     
     tamanho_kb = os.path.getsize(json_path) / 1024
-    print(f"   ✅ Arquitetura salva: {json_path} ({tamanho_kb:.2f} KB)")
+    logger.debug(f"   ✅ Arquitetura salva: {json_path} ({tamanho_kb:.2f} KB)")
     
     # Salvar informações detalhadas
     info_path = os.path.join(DOCS_DIR, "model_info.json")
     
-    with open(info_path, 'w', encoding='utf-8') as f:
-        json.dump(info, f, indent=4, ensure_ascii=False)
+    # Texto inteiro gerado em memória (orjson, se disponível) e gravado
+    # em uma única escrita
+    if ORJSON_DISPONIVEL:
+        with open(info_path, 'wb') as f:
+            f.write(orjson.dumps(info, option=orjson.OPT_INDENT_2))
+    else:
+        with open(info_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(info, indent=4, ensure_ascii=False))
     
     tamanho_kb = os.path.getsize(info_path) / 1024
-    print(f"   ✅ Informações salvas: {info_path} ({tamanho_kb:.2f} KB)")
+    logger.debug(f"   ✅ Informações salvas: {info_path} ({tamanho_kb:.2f} KB)")
     
     # Salvar resumo em texto
     summary_path = os.path.join(DOCS_DIR, "model_summary.txt")
     
+    # Resumo acumulado em memória (uma linha por print_fn) e gravado de uma vez
+    buffer = io.StringIO()
+    model.summary(print_fn=lambda x: buffer.write(x + '\n'))
     with open(summary_path, 'w', encoding='utf-8') as f:
-        model.summary(print_fn=lambda x: f.write(x + '\n'))
+        f.write(buffer.getvalue())
     
     tamanho_kb = os.path.getsize(summary_path) / 1024
-    print(f"   ✅ Resumo salvo: {summary_path} ({tamanho_kb:.2f} KB)\n")
+    logger.debug(f"   ✅ Resumo salvo: {summary_path} ({tamanho_kb:.2f} KB)\n")
 
 
 # ===================================================================
@@ -331,6 +442,13 @@ def main():
     """
     Função principal que constrói e compila o modelo LSTM.
     """
+    # Execução como script: exibe as mensagens de construção no console
+    if not any(type(h) is logging.StreamHandler for h in logger.handlers):
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(console)
+    logger.setLevel(logging.DEBUG)
+    
     try:
         # 1. Construir arquitetura
         model = construir_modelo_lstm()
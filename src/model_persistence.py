@@ -18,7 +18,11 @@ Versão: 1.0.0
 
 import os
 import json
+import functools
+import hashlib
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Tuple
 
@@ -26,6 +30,21 @@ import numpy as np
 import joblib
 from tensorflow import keras
 
+# Exportação ONNX -> TensorRT para hosts com GPU NVIDIA (opcional)
+try:
+    import tf2onnx
+    import tensorrt as trt
+    TENSORRT_DISPONIVEL = True
+except ImportError:
+    TENSORRT_DISPONIVEL = False
+
+# Serializador JSON rápido (opcional)
+try:
+    import orjson
+    ORJSON_DISPONIVEL = True
+except ImportError:
+    ORJSON_DISPONIVEL = False
+
 warnings.filterwarnings('ignore')
 
 # ===================================================================
@@ -37,9 +56,17 @@ MODELS_DIR = "models"
 DOCS_DIR = "docs/deployment"
 
 # Arquivos de artefatos
-MODEL_FILE = "lstm_model_best.h5"
+MODEL_FILE = "lstm_model_best.keras"
+MODEL_FILE_LEGACY = "lstm_model_best.h5"  # HDF5 de treinos anteriores
 SCALER_FILE = "scaler.pkl"
 ARCHITECTURE_FILE = "model_architecture.json"
+ONNX_FILE = "lstm_model.onnx"
+TRT_ENGINE_FILE = "lstm_model.trt"
+TFLITE_FILE = "lstm_model_int8.tflite"
+FINGERPRINT_FILE = ".artifact_fingerprint"
+
+# Gerador (PCG64) dos dados sintéticos de teste: reprodutível entre execuções
+_rng = np.random.default_rng(seed=42)
 
 # Criar diretórios
 os.makedirs(MODELS_DIR, exist_ok=True)
@@ -50,6 +77,35 @@ os.makedirs(DOCS_DIR, exist_ok=True)
 # FUNÇÕES DE VERIFICAÇÃO
 # ===================================================================
 
+@functools.lru_cache(maxsize=4)
+def _load_model_cached(path: str, mtime_ns: int) -> keras.Model:
+    """Modelo desserializado uma vez por processo enquanto o arquivo não muda."""
+    return keras.models.load_model(path)
+
+
+@functools.lru_cache(maxsize=4)
+def _funcao_predicao(model: keras.Model, timesteps: int = 60, features: int = 5):
+    """
+    Função concreta de inferência do modelo, traçada uma vez por modelo.
+    
+    A assinatura (None, timesteps, features) float32 evita retraçar o
+    grafo a cada chamada e aceita qualquer tamanho de lote.
+    """
+    import tensorflow as tf
+    
+    funcao = tf.function(
+        lambda x: model(x, training=False),
+        input_signature=[tf.TensorSpec((None, timesteps, features), tf.float32)]
+    )
+    return funcao.get_concrete_function()
+
+
+@functools.lru_cache(maxsize=4)
+def _load_scaler_cached(path: str, mtime_ns: int) -> object:
+    """Scaler desserializado uma vez por processo enquanto o arquivo não muda."""
+    return joblib.load(path)
+
+
 def verificar_artefatos() -> Dict[str, dict]:
     """
     Verifica a existência e propriedades dos artefatos salvos.
@@ -68,35 +124,43 @@ def verificar_artefatos() -> Dict[str, dict]:
     
     artefatos = {}
     
-    # Verificar modelo
-    model_path = os.path.join(MODELS_DIR, MODEL_FILE)
-    if os.path.exists(model_path):
-        tamanho_mb = os.path.getsize(model_path) / (1024 * 1024)
-        modificado = datetime.fromtimestamp(os.path.getmtime(model_path))
+    # Um único scandir: nome -> stat de cada arquivo de models/
+    with os.scandir(MODELS_DIR) as entradas:
+        stats = {e.name: e.stat() for e in entradas if e.is_file()}
+    
+    # Verificar modelo (formato .keras; HDF5 apenas se ainda não retreinado)
+    model_file = MODEL_FILE if MODEL_FILE in stats else MODEL_FILE_LEGACY
+    model_path = os.path.join(MODELS_DIR, model_file)
+    if model_file in stats:
+        st = stats[model_file]
+        tamanho_mb = st.st_size / (1024 * 1024)
+        modificado = datetime.fromtimestamp(st.st_mtime)
+        formato = 'Keras' if model_file.endswith('.keras') else 'HDF5'
         
         artefatos['modelo'] = {
-            'arquivo': MODEL_FILE,
+            'arquivo': model_file,
             'caminho': model_path,
             'existe': True,
             'tamanho_mb': round(tamanho_mb, 2),
             'modificado': modificado.isoformat(),
-            'formato': 'HDF5'
+            'formato': formato
         }
         
         print(f"   ✅ Modelo LSTM encontrado:")
-        print(f"      • Arquivo: {MODEL_FILE}")
+        print(f"      • Arquivo: {model_file}")
         print(f"      • Tamanho: {tamanho_mb:.2f} MB")
         print(f"      • Modificado: {modificado.strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"      • Formato: HDF5\n")
+        print(f"      • Formato: {formato}\n")
     else:
         artefatos['modelo'] = {'existe': False, 'erro': 'Arquivo não encontrado'}
         print(f"   ❌ Modelo não encontrado: {model_path}\n")
     
     # Verificar scaler
     scaler_path = os.path.join(MODELS_DIR, SCALER_FILE)
-    if os.path.exists(scaler_path):
-        tamanho_kb = os.path.getsize(scaler_path) / 1024
-        modificado = datetime.fromtimestamp(os.path.getmtime(scaler_path))
+    if SCALER_FILE in stats:
+        st = stats[SCALER_FILE]
+        tamanho_kb = st.st_size / 1024
+        modificado = datetime.fromtimestamp(st.st_mtime)
         
         artefatos['scaler'] = {
             'arquivo': SCALER_FILE,
@@ -118,8 +182,8 @@ def verificar_artefatos() -> Dict[str, dict]:
     
     # Verificar arquitetura (opcional)
     arch_path = os.path.join(MODELS_DIR, ARCHITECTURE_FILE)
-    if os.path.exists(arch_path):
-        tamanho_kb = os.path.getsize(arch_path) / 1024
+    if ARCHITECTURE_FILE in stats:
+        tamanho_kb = stats[ARCHITECTURE_FILE].st_size / 1024
         
         artefatos['arquitetura'] = {
             'arquivo': ARCHITECTURE_FILE,
@@ -156,12 +220,14 @@ def testar_carregamento_modelo(model_path: str) -> Tuple[keras.Model, dict]:
     
     try:
         print(f"   📥 Carregando modelo de: {model_path}")
-        model = keras.models.load_model(model_path)
+        model = _load_model_cached(model_path, os.stat(model_path).st_mtime_ns)
         print(f"   ✅ Modelo carregado com sucesso!\n")
         
         # Extrair metadados
         metadados = {
             'nome': model.name,
+            'arquivo': os.path.basename(model_path),
+            'formato': 'Keras' if model_path.endswith('.keras') else 'HDF5',
             'input_shape': list(model.input_shape),
             'output_shape': list(model.output_shape),
             'num_parametros': int(model.count_params()),
@@ -196,6 +262,17 @@ def testar_carregamento_modelo(model_path: str) -> Tuple[keras.Model, dict]:
         raise
 
 
+def _parametros_close(scaler: object) -> Tuple[float, float]:
+    """
+    (close_min, close_range) tais que close = norm * close_range + close_min.
+    
+    Derivados de scale_/min_ do MinMaxScaler, válidos para qualquer
+    feature_range (para (0, 1) coincidem com data_min_/data_range_).
+    """
+    escala = float(scaler.scale_[3])  # Close é a feature de índice 3
+    return float(-scaler.min_[3] / escala), float(1.0 / escala)
+
+
 def testar_carregamento_scaler(scaler_path: str) -> Tuple[object, dict]:
     """
     Testa o carregamento do scaler e extrai metadados.
@@ -215,7 +292,7 @@ def testar_carregamento_scaler(scaler_path: str) -> Tuple[object, dict]:
     
     try:
         print(f"   📥 Carregando scaler de: {scaler_path}")
-        scaler = joblib.load(scaler_path)
+        scaler = _load_scaler_cached(scaler_path, os.stat(scaler_path).st_mtime_ns)
         print(f"   ✅ Scaler carregado com sucesso!\n")
         
         # Extrair metadados
@@ -223,17 +300,20 @@ def testar_carregamento_scaler(scaler_path: str) -> Tuple[object, dict]:
             'tipo': scaler.__class__.__name__,
             'feature_range': list(scaler.feature_range),
             'num_features': int(scaler.n_features_in_),
-            'data_min': scaler.data_min_.tolist() if hasattr(scaler, 'data_min_') else None,
-            'data_max': scaler.data_max_.tolist() if hasattr(scaler, 'data_max_') else None,
-            'data_range': scaler.data_range_.tolist() if hasattr(scaler, 'data_range_') else None
+            # Arrays NumPy: _json_bytes os serializa sem cópia para listas
+            'data_min': getattr(scaler, 'data_min_', None),
+            'data_max': getattr(scaler, 'data_max_', None),
+            'data_range': getattr(scaler, 'data_range_', None)
         }
+        if hasattr(scaler, 'scale_'):
+            metadados['close_min'], metadados['close_range'] = _parametros_close(scaler)
         
         print(f"   📊 Metadados do Scaler:")
         print(f"      • Tipo: {metadados['tipo']}")
         print(f"      • Feature Range: {metadados['feature_range']}")
         print(f"      • Número de Features: {metadados['num_features']}")
         
-        if metadados['data_min']:
+        if metadados['data_min'] is not None:
             print(f"      • Data Min: {[f'{x:.4f}' for x in metadados['data_min']]}")
             print(f"      • Data Max: {[f'{x:.4f}' for x in metadados['data_max']]}")
         
@@ -245,16 +325,25 @@ def testar_carregamento_scaler(scaler_path: str) -> Tuple[object, dict]:
         raise
 
 
-def testar_predicao_exemplo(model: keras.Model, scaler: object) -> dict:
+def testar_predicao_exemplo(model: keras.Model, scaler: object,
+                            tflite_path: str = None, batch_size: int = 32) -> dict:
     """
     Testa uma predição de exemplo para validar o pipeline completo.
     
+    As ``batch_size`` janelas são normalizadas em uma única chamada ao
+    scaler e previstas em uma única chamada ao modelo.
+    
     Parâmetros:
     -----------
     model : keras.Model
         Modelo carregado
     scaler : object
         Scaler carregado
+    tflite_path : str, opcional
+        Modelo TFLite INT8; se informado, a mesma entrada também é
+        prevista pelo interpretador TFLite e as duas saídas são comparadas
+    batch_size : int
+        Número de janelas de exemplo previstas de uma vez
         
     Retorna:
     --------
@@ -265,55 +354,68 @@ def testar_predicao_exemplo(model: keras.Model, scaler: object) -> dict:
     print(f"{'─'*70}\n")
     
     try:
-        # Criar dados de exemplo (60 timesteps, 5 features)
+        # Criar dados de exemplo (batch_size janelas × 60 timesteps × 5 features)
         # Simular dados aleatórios dentro de um range plausível
-        print(f"   📝 Gerando dados de exemplo...")
-        exemplo_raw = np.random.uniform(10, 15, size=(60, 5))
+        print(f"   📝 Gerando dados de exemplo ({batch_size} janelas)...")
+        exemplo_raw = _rng.uniform(10, 15, size=(batch_size * 60, 5))
         
-        # Normalizar
+        # Normalizar (uma única chamada para todas as janelas)
         print(f"   🔄 Normalizando dados...")
         exemplo_norm = scaler.transform(exemplo_raw)
         
-        # Reshape para modelo (1, 60, 5)
-        exemplo_input = exemplo_norm.reshape(1, 60, 5)
+        # Reshape para modelo (batch_size, 60, 5)
+        exemplo_input = exemplo_norm.reshape(batch_size, 60, 5).astype(np.float32)
         
+        # Função concreta cacheada: sem o laço de predict() nem retraçado
         print(f"   🔮 Fazendo predição...")
-        predicao_norm = model.predict(exemplo_input, verbose=0)
+        predicao_norm = _funcao_predicao(model)(exemplo_input).numpy()
         
-        # Desnormalizar
+        # Desnormalizar apenas o Close (afim: norm * range + min)
         print(f"   🔄 Desnormalizando resultado...")
-        # Criar array completo com a predição
-        exemplo_final = np.copy(exemplo_raw[-1:])  # Pegar última linha
-        exemplo_final[0, 3] = predicao_norm[0, 0]  # Substituir Close normalizado
-        
-        # Inverter normalização completa
-        resultado_full = scaler.inverse_transform(exemplo_final)
-        predicao_final = resultado_full[0, 3]  # Pegar Close desnormalizado
+        close_min, close_range = _parametros_close(scaler)
+        predicoes_finais = predicao_norm[:, 0] * close_range + close_min
+        predicao_final = predicoes_finais[0]
         
         print(f"   ✅ Predição realizada com sucesso!\n")
         
         print(f"   📊 Resultados do Teste:")
         print(f"      • Input Shape: {exemplo_input.shape}")
-        print(f"      • Predição Normalizada: {predicao_norm[0, 0]:.6f}")
-        print(f"      • Predição Final: R$ {predicao_final:.2f}")
+        print(f"      • Predição Normalizada (1ª janela): {predicao_norm[0, 0]:.6f}")
+        print(f"      • Predição Final (1ª janela): R$ {predicao_final:.2f}")
+        print(f"      • Predições Finais: R$ {predicoes_finais.min():.2f} - R$ {predicoes_finais.max():.2f}")
         print(f"      • Range Esperado: R$ 10.00 - R$ 15.00\n")
         
-        # Validar se está no range esperado
-        valido = 8.0 <= predicao_final <= 18.0
+        # Validar se todas as predições estão no range esperado
+        valido = bool(np.all((predicoes_finais >= 8.0) & (predicoes_finais <= 18.0)))
         
         if valido:
-            print(f"   ✅ Predição dentro do range esperado\n")
+            print(f"   ✅ Predições dentro do range esperado\n")
         else:
-            print(f"   ⚠️  Predição fora do range esperado\n")
+            print(f"   ⚠️  Predições fora do range esperado\n")
         
         resultado = {
             'input_shape': list(exemplo_input.shape),
+            'batch_size': int(batch_size),
             'predicao_normalizada': float(predicao_norm[0, 0]),
             'predicao_final': float(predicao_final),
-            'validacao': bool(valido),
+            'predicao_final_min': float(predicoes_finais.min()),
+            'predicao_final_max': float(predicoes_finais.max()),
+            'validacao': valido,
             'status': 'sucesso'
         }
         
+        if tflite_path and os.path.exists(tflite_path):
+            print(f"   🔮 Predição com o interpretador TFLite INT8...")
+            interpreter = _criar_interpretador_tflite(tflite_path)
+            # O modelo TFLite tem entrada fixa (1, 60, 5): compara a 1ª janela
+            predicao_tflite = _prever_tflite(interpreter, exemplo_input[:1])
+            diferenca = abs(float(predicao_tflite[0, 0]) - float(predicao_norm[0, 0]))
+            print(f"      • Predição TFLite Normalizada: {predicao_tflite[0, 0]:.6f}")
+            print(f"      • Diferença vs Keras: {diferenca:.6f}\n")
+            
+            resultado['predicao_tflite_normalizada'] = float(predicao_tflite[0, 0])
+            resultado['diferenca_tflite'] = diferenca
+        
         return resultado
         
     except Exception as e:
@@ -324,6 +426,222 @@ def testar_predicao_exemplo(model: keras.Model, scaler: object) -> dict:
         }
 
 
+def exportar_tensorrt(model: keras.Model, timesteps: int = 60, features: int = 5) -> dict:
+    """
+    Exporta o modelo para ONNX e compila um engine TensorRT (FP16) estático.
+    
+    A forma de entrada é fixa em (1, timesteps, features), a mesma da
+    predição de um dia na API. Só roda quando tf2onnx e tensorrt estão
+    instalados (hosts com GPU NVIDIA).
+    
+    Parâmetros:
+    -----------
+    model : keras.Model
+        Modelo carregado
+    timesteps : int
+        Passos de tempo da entrada
+    features : int
+        Features por timestep
+        
+    Retorna:
+    --------
+    dict
+        Informações dos artefatos gerados (ou motivo de não gerar)
+    """
+    print(f"⚡ Exportando Engine TensorRT:")
+    print(f"{'─'*70}\n")
+    
+    if not TENSORRT_DISPONIVEL:
+        print(f"   ⏭️  tf2onnx/tensorrt não instalados - exportação ignorada\n")
+        return {'existe': False, 'motivo': 'tf2onnx/tensorrt não instalados'}
+    
+    import tensorflow as tf
+    
+    onnx_path = os.path.join(MODELS_DIR, ONNX_FILE)
+    engine_path = os.path.join(MODELS_DIR, TRT_ENGINE_FILE)
+    
+    try:
+        # 1. Keras -> ONNX com forma de entrada estática
+        assinatura = [tf.TensorSpec((1, timesteps, features), tf.float32, name='input')]
+        tf2onnx.convert.from_keras(model, input_signature=assinatura,
+                                   opset=15, output_path=onnx_path)
+        print(f"   ✅ ONNX exportado: {onnx_path}")
+        
+        # 2. ONNX -> engine TensorRT (FP16 quando a GPU suporta)
+        logger = trt.Logger(trt.Logger.WARNING)
+        builder = trt.Builder(logger)
+        network = builder.create_network(
+            1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH)
+        )
+        parser = trt.OnnxParser(network, logger)
+        with open(onnx_path, 'rb') as f:
+            if not parser.parse(f.read()):
+                erros = [str(parser.get_error(i)) for i in range(parser.num_errors)]
+                raise RuntimeError(f"Falha ao interpretar ONNX: {erros}")
+        
+        config = builder.create_builder_config()
+        fp16 = bool(builder.platform_has_fast_fp16)
+        if fp16:
+            config.set_flag(trt.BuilderFlag.FP16)
+        
+        engine = builder.build_serialized_network(network, config)
+        if engine is None:
+            raise RuntimeError("TensorRT não conseguiu compilar o engine")
+        
+        with open(engine_path, 'wb') as f:
+            f.write(engine)
+        
+        tamanho_mb = os.path.getsize(engine_path) / (1024 * 1024)
+        print(f"   ✅ Engine TensorRT: {engine_path} ({tamanho_mb:.2f} MB, FP16={fp16})\n")
+        
+        return {
+            'arquivo': TRT_ENGINE_FILE,
+            'caminho': engine_path,
+            'onnx': ONNX_FILE,
+            'existe': True,
+            'tamanho_mb': round(tamanho_mb, 2),
+            'fp16': fp16,
+            'input_shape': [1, timesteps, features],
+            'formato': 'TensorRT'
+        }
+        
+    except Exception as e:
+        print(f"   ⚠️  Exportação TensorRT falhou: {str(e)}\n")
+        return {'existe': False, 'motivo': str(e)}
+
+
+def _criar_interpretador_tflite(tflite_path: str):
+    """Carrega o modelo TFLite e aloca os tensores do interpretador."""
+    import tensorflow as tf
+    
+    interpreter = tf.lite.Interpreter(model_path=tflite_path)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def _prever_tflite(interpreter, dados: np.ndarray) -> np.ndarray:
+    """
+    Executa uma predição no interpretador TFLite.
+    
+    Entradas/saídas inteiras (quantização completa) são convertidas com a
+    escala e o zero-point do próprio tensor.
+    """
+    entrada = interpreter.get_input_details()[0]
+    saida = interpreter.get_output_details()[0]
+    
+    if entrada['dtype'] == np.int8:
+        escala, zero = entrada['quantization']
+        dados = np.round(dados / escala + zero)
+        dados = np.clip(dados, -128, 127)
+    interpreter.set_tensor(entrada['index'], dados.astype(entrada['dtype']))
+    interpreter.invoke()
+    
+    predicao = interpreter.get_tensor(saida['index'])
+    if saida['dtype'] == np.int8:
+        escala, zero = saida['quantization']
+        predicao = (predicao.astype(np.float32) - zero) * escala
+    return predicao
+
+
+def exportar_tflite_int8(model: keras.Model, timesteps: int = 60,
+                         features: int = 5, n_amostras: int = 100) -> dict:
+    """
+    Converte o modelo para TFLite quantizado em INT8.
+    
+    Tenta primeiro a quantização inteira completa (dataset representativo
+    no intervalo [0, 1] do MinMaxScaler); se o conversor não suportar as
+    operações da LSTM, usa a quantização de faixa dinâmica (pesos INT8,
+    ativações em float). A forma de entrada é fixa em (1, timesteps,
+    features), necessária para o conversor fundir a LSTM.
+    
+    Parâmetros:
+    -----------
+    model : keras.Model
+        Modelo carregado
+    timesteps : int
+        Passos de tempo da entrada
+    features : int
+        Features por timestep
+    n_amostras : int
+        Amostras do dataset representativo (quantização completa)
+        
+    Retorna:
+    --------
+    dict
+        Informações do artefato gerado (tamanho, latência, quantização)
+    """
+    print(f"📦 Exportando Modelo TFLite INT8:")
+    print(f"{'─'*70}\n")
+    
+    import tensorflow as tf
+    
+    tflite_path = os.path.join(MODELS_DIR, TFLITE_FILE)
+    forma = (1, timesteps, features)
+    
+    def dataset_representativo():
+        for _ in range(n_amostras):
+            yield [_rng.random(forma, dtype=np.float32)]
+    
+    try:
+        funcao = tf.function(lambda x: model(x, training=False))
+        concreta = funcao.get_concrete_function(tf.TensorSpec(forma, tf.float32))
+        
+        # 1. Quantização inteira completa (entrada/saída INT8)
+        try:
+            converter = tf.lite.TFLiteConverter.from_concrete_functions([concreta], model)
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            converter.representative_dataset = dataset_representativo
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+            converter.inference_input_type = tf.int8
+            converter.inference_output_type = tf.int8
+            conteudo = converter.convert()
+            quantizacao = 'int8_completa'
+        except Exception as e:
+            print(f"   ⚠️  Quantização completa indisponível ({str(e)[:80]})")
+            print(f"   🔄 Usando quantização de faixa dinâmica...")
+            converter = tf.lite.TFLiteConverter.from_concrete_functions([concreta], model)
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            conteudo = converter.convert()
+            quantizacao = 'int8_faixa_dinamica'
+        
+        with open(tflite_path, 'wb') as f:
+            f.write(conteudo)
+        
+        # 2. Latência média por predição: interpretador vs Keras
+        dados = _rng.random(forma, dtype=np.float32)
+        interpreter = _criar_interpretador_tflite(tflite_path)
+        
+        def medir_ms(prever, repeticoes=50):
+            prever()
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                prever()
+            return (time.perf_counter() - inicio) / repeticoes * 1000
+        
+        latencia_tflite = medir_ms(lambda: _prever_tflite(interpreter, dados))
+        latencia_keras = medir_ms(lambda: model(dados, training=False))
+        
+        tamanho_mb = os.path.getsize(tflite_path) / (1024 * 1024)
+        print(f"   ✅ TFLite: {tflite_path} ({tamanho_mb:.2f} MB, {quantizacao})")
+        print(f"   ⏱️  Latência: TFLite {latencia_tflite:.2f} ms | Keras {latencia_keras:.2f} ms\n")
+        
+        return {
+            'arquivo': TFLITE_FILE,
+            'caminho': tflite_path,
+            'existe': True,
+            'tamanho_mb': round(tamanho_mb, 3),
+            'quantizacao': quantizacao,
+            'latencia_ms': round(latencia_tflite, 3),
+            'latencia_keras_ms': round(latencia_keras, 3),
+            'input_shape': list(forma),
+            'formato': 'TFLite'
+        }
+        
+    except Exception as e:
+        print(f"   ⚠️  Exportação TFLite falhou: {str(e)}\n")
+        return {'existe': False, 'motivo': str(e)}
+
+
 def gerar_metadados_api(model_meta: dict, scaler_meta: dict) -> dict:
     """
     Gera metadados necessários para a construção da API.
@@ -351,8 +669,8 @@ def gerar_metadados_api(model_meta: dict, scaler_meta: dict) -> dict:
         'versao': '1.0.0',
         'timestamp': datetime.now().isoformat(),
         'modelo': {
-            'arquivo': MODEL_FILE,
-            'formato': 'HDF5',
+            'arquivo': model_meta['arquivo'],
+            'formato': model_meta['formato'],
             'input_shape': model_meta['input_shape'],
             'output_shape': model_meta['output_shape'],
             'timesteps': timesteps,
@@ -432,8 +750,12 @@ def salvar_documentacao(artefatos: dict, model_meta: dict,
             'teste_predicao': teste_predicao
         },
         'instrucoes_uso': {
-            'carregar_modelo': f"model = keras.models.load_model('models/{MODEL_FILE}')",
+            'carregar_modelo': f"model = keras.models.load_model('models/{artefatos['modelo']['arquivo']}')",
             'carregar_scaler': f"scaler = joblib.load('models/{SCALER_FILE}')",
+            'carregar_tflite': (
+                f"interpreter = tf.lite.Interpreter(model_path='models/{TFLITE_FILE}'); "
+                "interpreter.allocate_tensors()  # preferir em CPU, quando existir"
+            ),
             'fazer_predicao': [
                 "1. Preparar dados: 60 dias × 5 features (OHLCV)",
                 "2. Normalizar com scaler: scaler.transform(dados)",
@@ -444,33 +766,29 @@ def salvar_documentacao(artefatos: dict, model_meta: dict,
         }
     }
     
-    # Salvar JSON principal
-    doc_path = os.path.join(DOCS_DIR, 'model_deployment_metadata.json')
-    with open(doc_path, 'w', encoding='utf-8') as f:
-        json.dump(documentacao, f, indent=4, ensure_ascii=False)
-    
-    tamanho_kb = os.path.getsize(doc_path) / 1024
-    print(f"   ✅ Documentação completa: {doc_path} ({tamanho_kb:.2f} KB)")
-    
-    # Salvar metadados da API separadamente
-    api_path = os.path.join(DOCS_DIR, 'api_metadata.json')
-    with open(api_path, 'w', encoding='utf-8') as f:
-        json.dump(api_meta, f, indent=4, ensure_ascii=False)
-    
-    tamanho_kb = os.path.getsize(api_path) / 1024
-    print(f"   ✅ Metadados da API: {api_path} ({tamanho_kb:.2f} KB)")
-    
     # Criar README de deployment
+    tflite = artefatos.get('tflite', {})
+    secao_tflite = ""
+    if tflite.get('existe'):
+        secao_tflite = f"""
+### Modelo TFLite INT8 (preferencial em CPU)
+- **Arquivo**: `{TFLITE_FILE}`
+- **Quantização**: {tflite['quantizacao']}
+- **Tamanho**: {tflite['tamanho_mb']} MB
+- **Latência**: {tflite['latencia_ms']} ms (Keras: {tflite['latencia_keras_ms']} ms)
+- **Input Shape**: {tflite['input_shape']} (fixo)
+"""
+    
     readme_content = f"""# Deployment do Modelo LSTM - B3SA3 Predictor
 
 ## 📦 Artefatos de Produção
 
 ### Modelo Treinado
-- **Arquivo**: `{MODEL_FILE}`
-- **Formato**: HDF5 (Keras/TensorFlow)
+- **Arquivo**: `{artefatos['modelo']['arquivo']}`
+- **Formato**: {artefatos['modelo']['formato']} (Keras/TensorFlow)
 - **Tamanho**: {artefatos['modelo']['tamanho_mb']} MB
 - **Parâmetros**: {model_meta['num_parametros']:,}
-
+{secao_tflite}
 ### Scaler de Normalização
 - **Arquivo**: `{SCALER_FILE}`
 - **Formato**: PKL (joblib)
@@ -499,7 +817,7 @@ import joblib
 from tensorflow import keras
 
 # Carregar modelo
-model = keras.models.load_model('models/{MODEL_FILE}')
+model = keras.models.load_model('models/{artefatos['modelo']['arquivo']}')
 
 # Carregar scaler
 scaler = joblib.load('models/{SCALER_FILE}')
@@ -568,60 +886,236 @@ print(f"Preço previsto: R$ {{preco_previsto:.2f}}")
 Gerado automaticamente em {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 """
     
-    readme_path = os.path.join(DOCS_DIR, 'README.md')
-    with open(readme_path, 'w', encoding='utf-8') as f:
-        f.write(readme_content)
+    # Conteúdo dos três arquivos pronto antes de qualquer escrita
+    arquivos = [
+        ("Documentação completa", os.path.join(DOCS_DIR, 'model_deployment_metadata.json'),
+         _json_bytes(documentacao)),
+        ("Metadados da API", os.path.join(DOCS_DIR, 'api_metadata.json'),
+         _json_bytes(api_meta)),
+        ("README de deployment", os.path.join(DOCS_DIR, 'README.md'),
+         readme_content.encode('utf-8')),
+    ]
+    
+    # Arquivos independentes: as escritas (limitadas por I/O) rodam em paralelo
+    with ThreadPoolExecutor(max_workers=len(arquivos)) as executor:
+        futuros = [executor.submit(_gravar_arquivo, path, conteudo)
+                   for _, path, conteudo in arquivos]
+        for futuro in futuros:
+            futuro.result()
+    
+    for descricao, path, conteudo in arquivos:
+        print(f"   ✅ {descricao}: {path} ({len(conteudo) / 1024:.2f} KB)")
+    print()
+
+
+def _json_bytes(obj) -> bytes:
+    """
+    JSON indentado em UTF-8 (orjson, se disponível).
+    
+    Arrays e escalares NumPy são aceitos nos dois caminhos.
+    """
+    if ORJSON_DISPONIVEL:
+        return orjson.dumps(
+            obj,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(obj, indent=4, ensure_ascii=False,
+                      default=lambda o: o.tolist()).encode('utf-8')
+
+
+def _gravar_arquivo(path: str, conteudo: bytes) -> None:
+    """Grava o conteúdo (já codificado) em uma única escrita."""
+    with open(path, 'wb') as f:
+        f.write(conteudo)
+
+
+def _sha256_arquivo(path: str) -> str:
+    """SHA-256 hexadecimal de um arquivo, lido em blocos."""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        h = hashlib.sha256()
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+        return h.hexdigest()
+
+
+def calcular_fingerprint(model_path: str, scaler_path: str) -> str:
+    """
+    Fingerprint do par modelo + scaler (SHA-256 dos dois arquivos).
+    
+    Parâmetros:
+    -----------
+    model_path : str
+        Caminho do arquivo do modelo
+    scaler_path : str
+        Caminho do arquivo do scaler
+        
+    Retorna:
+    --------
+    str
+        Hash hexadecimal combinado
+    """
+    combinado = f"{_sha256_arquivo(model_path)}:{_sha256_arquivo(scaler_path)}"
+    return hashlib.sha256(combinado.encode()).hexdigest()
+
+
+def carregar_verificacao_anterior(fingerprint: str) -> dict:
+    """
+    Retorna a verificação salva para este fingerprint, se houver.
+    
+    Só reaproveita verificações cujo teste de predição teve sucesso e
+    cujas exportações (TFLite/TensorRT) ainda existem.
     
-    tamanho_kb = os.path.getsize(readme_path) / 1024
-    print(f"   ✅ README de deployment: {readme_path} ({tamanho_kb:.2f} KB)\n")
+    Parâmetros:
+    -----------
+    fingerprint : str
+        Fingerprint atual dos artefatos
+        
+    Retorna:
+    --------
+    dict
+        Verificação anterior, ou None se os artefatos mudaram
+    """
+    path = os.path.join(DOCS_DIR, FINGERPRINT_FILE)
+    try:
+        with open(path, 'rb') as f:
+            conteudo = f.read()
+        cache = orjson.loads(conteudo) if ORJSON_DISPONIVEL else json.loads(conteudo)
+    except (OSError, ValueError):
+        return None
+    
+    if cache.get('fingerprint') != fingerprint:
+        return None
+    if cache.get('teste_predicao', {}).get('status') != 'sucesso':
+        return None
+    # Exportações removidas desde então precisam ser refeitas
+    for chave in ('tflite', 'tensorrt'):
+        exportado = cache.get(chave) or {}
+        if exportado.get('existe') and not os.path.exists(exportado['caminho']):
+            return None
+    return cache
+
+
+def salvar_verificacao(fingerprint: str, model_meta: dict, scaler_meta: dict,
+                       teste_predicao: dict, artefatos: dict) -> None:
+    """
+    Registra a verificação dos artefatos para reaproveitamento.
+    
+    Parâmetros:
+    -----------
+    fingerprint : str
+        Fingerprint dos artefatos verificados
+    model_meta : dict
+        Metadados do modelo
+    scaler_meta : dict
+        Metadados do scaler
+    teste_predicao : dict
+        Resultado do teste de predição
+    artefatos : dict
+        Informações dos artefatos (inclui exportações TFLite/TensorRT)
+    """
+    cache = {
+        'fingerprint': fingerprint,
+        'last_verified_at': datetime.now().isoformat(),
+        'model_meta': model_meta,
+        'scaler_meta': scaler_meta,
+        'teste_predicao': teste_predicao,
+        'tflite': artefatos.get('tflite'),
+        'tensorrt': artefatos.get('tensorrt')
+    }
+    path = os.path.join(DOCS_DIR, FINGERPRINT_FILE)
+    _gravar_arquivo(path, _json_bytes(cache))
 
 
 # ===================================================================
 # FUNÇÃO PRINCIPAL
 # ===================================================================
 
-def main():
+def main(forcar: bool = False):
     """
     Função principal que executa verificação e documentação completa.
+    
+    Se o modelo e o scaler não mudaram desde a última verificação bem
+    sucedida (mesmo SHA-256), o carregamento, o teste de predição e as
+    exportações são reaproveitados.
+    
+    Parâmetros:
+    -----------
+    forcar : bool
+        Refaz a verificação mesmo com artefatos inalterados
     """
+    model = scaler = None
     try:
         # 1. Verificar artefatos
         artefatos = verificar_artefatos()
         
         # Validar se os arquivos essenciais existem
         if not artefatos['modelo']['existe']:
-            raise FileNotFoundError(f"Modelo não encontrado: {MODEL_FILE}")
+            raise FileNotFoundError(f"Modelo não encontrado: {MODEL_FILE} / {MODEL_FILE_LEGACY}")
         
         if not artefatos['scaler']['existe']:
             raise FileNotFoundError(f"Scaler não encontrado: {SCALER_FILE}")
         
-        # 2. Testar carregamento do modelo
         model_path = artefatos['modelo']['caminho']
-        model, model_meta = testar_carregamento_modelo(model_path)
-        
-        # 3. Testar carregamento do scaler
         scaler_path = artefatos['scaler']['caminho']
-        scaler, scaler_meta = testar_carregamento_scaler(scaler_path)
         
-        # 4. Testar predição de exemplo
-        teste_predicao = testar_predicao_exemplo(model, scaler)
+        fingerprint = calcular_fingerprint(model_path, scaler_path)
+        anterior = None if forcar else carregar_verificacao_anterior(fingerprint)
         
-        # 5. Gerar metadados para API
+        if anterior:
+            print(f"♻️  Artefatos inalterados (SHA-256 {fingerprint[:12]}...)")
+            print(f"   Verificação reaproveitada de {anterior['last_verified_at']}\n")
+            model_meta = anterior['model_meta']
+            scaler_meta = anterior['scaler_meta']
+            teste_predicao = anterior['teste_predicao']
+            artefatos['tflite'] = anterior['tflite']
+            artefatos['tensorrt'] = anterior['tensorrt']
+        else:
+            # 2. Testar carregamento do modelo
+            model, model_meta = testar_carregamento_modelo(model_path)
+            
+            # 3. Testar carregamento do scaler
+            scaler, scaler_meta = testar_carregamento_scaler(scaler_path)
+            
+            # 4. Exportar modelo TFLite INT8 (serving em CPU)
+            artefatos['tflite'] = exportar_tflite_int8(
+                model, model_meta['input_shape'][1], model_meta['input_shape'][2]
+            )
+            
+            # 5. Testar predição de exemplo (Keras e TFLite)
+            teste_predicao = testar_predicao_exemplo(
+                model, scaler, artefatos['tflite'].get('caminho')
+            )
+            
+            # 6. Exportar engine TensorRT (apenas com GPU/tensorrt disponíveis)
+            artefatos['tensorrt'] = exportar_tensorrt(
+                model, model_meta['input_shape'][1], model_meta['input_shape'][2]
+            )
+            
+            salvar_verificacao(fingerprint, model_meta, scaler_meta,
+                               teste_predicao, artefatos)
+        
+        # 7. Gerar metadados para API
         api_meta = gerar_metadados_api(model_meta, scaler_meta)
         
-        # 6. Salvar documentação
+        # 8. Salvar documentação
         salvar_documentacao(artefatos, model_meta, scaler_meta, 
                            api_meta, teste_predicao)
         
-        # 7. Resumo final
+        # 9. Resumo final
         print(f"{'='*70}")
         print(f"✅ FASE 5 CONCLUÍDA COM SUCESSO!")
         print(f"{'='*70}\n")
         print(f"📁 Artefatos Verificados:")
-        print(f"   ✅ {MODEL_FILE} ({artefatos['modelo']['tamanho_mb']} MB)")
+        print(f"   ✅ {artefatos['modelo']['arquivo']} ({artefatos['modelo']['tamanho_mb']} MB)")
         print(f"   ✅ {SCALER_FILE} ({artefatos['scaler']['tamanho_kb']} KB)")
         if artefatos.get('arquitetura'):
             print(f"   ✅ {ARCHITECTURE_FILE} ({artefatos['arquitetura']['tamanho_kb']} KB)")
+        if artefatos['tflite']['existe']:
+            print(f"   ✅ {TFLITE_FILE} ({artefatos['tflite']['tamanho_mb']} MB)")
+        if artefatos['tensorrt']['existe']:
+            print(f"   ✅ {TRT_ENGINE_FILE} ({artefatos['tensorrt']['tamanho_mb']} MB)")
         
         print(f"\n📊 Especificações do Modelo:")
         print(f"   → Input Shape: {model_meta['input_shape']}")
@@ -643,6 +1137,9 @@ def main():
         # Limpar memória (opcional)
         del model
         del scaler
+        _load_model_cached.cache_clear()
+        _load_scaler_cached.cache_clear()
+        _funcao_predicao.cache_clear()
         print(f"🧹 Memória liberada (modelo e scaler removidos da RAM)\n")
         
     except Exception as e:
@@ -655,4 +1152,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Verificação dos artefatos do modelo (Fase 5)")
+    parser.add_argument('--forcar', action='store_true',
+                        help="Refaz a verificação mesmo com artefatos inalterados")
+    main(forcar=parser.parse_args().forcar)
@@ -19,16 +19,15 @@ Versão: 1.0.0
 
 import os
 import json
+import functools
 import warnings
 from datetime import datetime
 from typing import Tuple, Dict
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import joblib
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint, ReduceLROnPlateau
@@ -36,7 +35,21 @@ from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint, ReduceLRO
 # Importar função de construção do modelo
 import sys
 sys.path.append(os.path.dirname(__file__))
-from model_builder import construir_modelo_lstm, compilar_modelo
+from model_builder import construir_modelo_lstm, compilar_modelo, ativar_precisao_mista
+
+# Compilação JIT (opcional) para o pós-processamento das predições
+try:
+    from numba import njit
+    NUMBA_DISPONIVEL = True
+except ImportError:
+    NUMBA_DISPONIVEL = False
+
+# Serializador JSON rápido (opcional)
+try:
+    import orjson
+    ORJSON_DISPONIVEL = True
+except ImportError:
+    ORJSON_DISPONIVEL = False
 
 warnings.filterwarnings('ignore')
 
@@ -46,13 +59,18 @@ warnings.filterwarnings('ignore')
 
 # Diretórios
 PROCESSED_DIR = "data/processed"
+SERIE_FILE = os.path.join(PROCESSED_DIR, "serie_normalizada.npy")
+SERIE_META_FILE = os.path.join(PROCESSED_DIR, "serie_meta.json")
+SEQUENCIAS_FILE = os.path.join(PROCESSED_DIR, "sequencias.npz")
 MODELS_DIR = "models"
 DOCS_DIR = "docs/training"
 
 # Parâmetros de treinamento
 EPOCHS = 50           # Número de épocas
 BATCH_SIZE = 32       # Tamanho do batch
+ACCUM_STEPS = 1       # Lotes acumulados por atualização (batch efetivo = BATCH_SIZE × ACCUM_STEPS)
 VERBOSE = 1           # Nível de verbosidade (0=silencioso, 1=barra de progresso, 2=uma linha por época)
+CACHE_DATASET = True  # Manter as amostras em memória após a 1ª época (False se não couberem na RAM)
 
 # Early Stopping
 EARLY_STOPPING_PATIENCE = 10  # Paciência para early stopping
@@ -62,19 +80,66 @@ RESTORE_BEST_WEIGHTS = True   # Restaurar melhores pesos
 os.makedirs(MODELS_DIR, exist_ok=True)
 os.makedirs(DOCS_DIR, exist_ok=True)
 
-# Configuração de visualizações
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+
+@functools.lru_cache(maxsize=1)
+def _pyplot():
+    """
+    Importa matplotlib/seaborn e aplica o estilo apenas quando um gráfico
+    é gerado (carregar dados ou importar o módulo na API não paga esse custo).
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # Saída apenas em PNG: sem backend de GUI
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    # Configuração de visualizações
+    plt.style.use('seaborn-v0_8-darkgrid')
+    sns.set_palette("husl")
+    return plt
 
 
 # ===================================================================
 # FUNÇÕES DE CARREGAMENTO
 # ===================================================================
 
+def _formato_mais_recente() -> str:
+    """
+    Escolhe, entre os formatos gravados em PROCESSED_DIR, o mais recente.
+    
+    Preparações diferentes (Fase 2, retreino, versões antigas) gravam
+    formatos diferentes e não apagam os demais; a data de modificação
+    evita que um artefato antigo esconda um mais novo.
+    
+    Retorna:
+    --------
+    str
+        'serie', 'npz' ou 'npy'
+    """
+    candidatos = {
+        'serie': SERIE_META_FILE,
+        'npz': SEQUENCIAS_FILE,
+        'npy': os.path.join(PROCESSED_DIR, "X_train.npy")
+    }
+    mtimes = {
+        formato: os.stat(caminho).st_mtime_ns
+        for formato, caminho in candidatos.items()
+        if os.path.exists(caminho)
+    }
+    if not mtimes:
+        return 'npy'  # Mantém o FileNotFoundError de np.load como antes
+    return max(mtimes, key=mtimes.get)
+
+
 def carregar_dados_preparados() -> Dict[str, np.ndarray]:
     """
     Carrega os dados preparados da Fase 2.
     
+    Usa o formato gravado mais recentemente. Com a série normalizada, ela
+    é mapeada em memória e os conjuntos X/y são views (janelas
+    deslizantes) sobre o arquivo, sem cópia. Com sequencias.npz, carrega
+    os conjuntos do arquivo compactado; em preparações antigas, mapeia em
+    memória os arquivos X_*.npy/y_*.npy.
+    
     Retorna:
     --------
     dict
@@ -90,9 +155,36 @@ def carregar_dados_preparados() -> Dict[str, np.ndarray]:
     dados = {}
     arquivos = ['X_train', 'y_train', 'X_val', 'y_val', 'X_test', 'y_test']
     
+    formato = _formato_mais_recente()
+    
+    if formato == 'serie':
+        with open(SERIE_META_FILE, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        
+        serie = np.load(SERIE_FILE, mmap_mode='r')
+        timesteps = meta['timesteps']
+        X = np.lib.stride_tricks.sliding_window_view(
+            serie, window_shape=(timesteps, serie.shape[1])
+        )[:-1, 0]
+        y = serie[timesteps:, meta['target_idx']]
+        
+        fim_treino = meta['train_size']
+        fim_val = fim_treino + meta['val_size']
+        dados = {
+            'X_train': X[:fim_treino], 'y_train': y[:fim_treino],
+            'X_val': X[fim_treino:fim_val], 'y_val': y[fim_treino:fim_val],
+            'X_test': X[fim_val:], 'y_test': y[fim_val:]
+        }
+        print(f"   📎 Série mapeada em memória: {SERIE_FILE}")
+    elif formato == 'npz':
+        with np.load(SEQUENCIAS_FILE) as npz:
+            dados = {arquivo: npz[arquivo] for arquivo in arquivos}
+    else:
+        for arquivo in arquivos:
+            filepath = os.path.join(PROCESSED_DIR, f"{arquivo}.npy")
+            dados[arquivo] = np.load(filepath, mmap_mode='r')
+    
     for arquivo in arquivos:
-        filepath = os.path.join(PROCESSED_DIR, f"{arquivo}.npy")
-        dados[arquivo] = np.load(filepath)
         print(f"   ✅ {arquivo:10s} carregado - Shape: {dados[arquivo].shape}")
     
     print()
@@ -189,7 +281,135 @@ def configurar_callbacks(model_path: str) -> list:
     return callbacks
 
 
-def treinar_modelo(model: Sequential, dados: dict, callbacks: list) -> keras.callbacks.History:
+def _criar_dataset(X: np.ndarray, y: np.ndarray, embaralhar: bool,
+                   batch_size: int = BATCH_SIZE) -> tf.data.Dataset:
+    """
+    Pipeline tf.data que materializa um lote por vez a partir de X/y.
+    
+    X/y podem ser views sobre arquivos mapeados em memória: só as linhas
+    do lote são copiadas (indexação por lote), e o prefetch prepara o
+    próximo lote enquanto o atual é treinado. Com CACHE_DATASET, a 1ª
+    época lê o arquivo em ordem e guarda os lotes em memória; as épocas
+    seguintes apenas reembaralham as amostras já carregadas.
+    
+    Parâmetros:
+    -----------
+    X : np.ndarray
+        Janelas de entrada (n, timesteps, features)
+    y : np.ndarray
+        Alvos (n,)
+    embaralhar : bool
+        Reembaralha a ordem das amostras a cada época
+    batch_size : int
+        Amostras por lote
+        
+    Retorna:
+    --------
+    tf.data.Dataset
+        Lotes (X, y) em float32
+    """
+    n = len(X)
+    
+    def lote(indices):
+        indices = np.sort(indices)  # Leitura sequencial no arquivo mapeado
+        return (np.asarray(X[indices], dtype=np.float32),
+                np.asarray(y[indices], dtype=np.float32))
+    
+    def carregar(indices):
+        X_lote, y_lote = tf.numpy_function(lote, [indices], [tf.float32, tf.float32])
+        X_lote.set_shape((None,) + X.shape[1:])
+        y_lote.set_shape((None,) + y.shape[1:])
+        return X_lote, y_lote
+    
+    if CACHE_DATASET:
+        dataset = (tf.data.Dataset.range(n)
+                   .batch(batch_size)
+                   .map(carregar, num_parallel_calls=tf.data.AUTOTUNE)
+                   .cache())
+        if embaralhar:
+            dataset = (dataset.unbatch()
+                       .shuffle(n, reshuffle_each_iteration=True)
+                       .batch(batch_size))
+    else:
+        dataset = tf.data.Dataset.range(n)
+        if embaralhar:
+            dataset = dataset.shuffle(n, reshuffle_each_iteration=True)
+        dataset = (dataset.batch(batch_size)
+                   .map(carregar, num_parallel_calls=tf.data.AUTOTUNE))
+    
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def _ativar_acumulacao_gradientes(model: Sequential, passos: int,
+                                  lotes_por_epoca: int) -> None:
+    """
+    Substitui o train_step do modelo por um que acumula os gradientes de
+    ``passos`` lotes e só então chama apply_gradients (batch efetivo
+    maior sem aumentar a memória por lote).
+    
+    O último lote de cada época também aplica o que estiver acumulado (média
+    dos lotes pendentes), então nenhuma atualização mistura lotes de épocas
+    diferentes quando ``lotes_por_epoca`` não é múltiplo de ``passos``.
+    
+    O passo é trocado apenas nesta instância: fit, callbacks e o arquivo
+    salvo continuam os de um Sequential comum.
+    
+    Parâmetros:
+    -----------
+    model : Sequential
+        Modelo compilado
+    passos : int
+        Lotes acumulados por atualização dos pesos
+    lotes_por_epoca : int
+        Lotes de treino por época (fronteira em que o acumulado é aplicado)
+    """
+    otimizador = model.optimizer
+    variaveis = model.trainable_variables
+    escala_perda = isinstance(otimizador, keras.mixed_precision.LossScaleOptimizer)
+    
+    # Estado criado fora do grafo (variáveis não podem nascer dentro do tf.cond)
+    otimizador.build(variaveis)
+    acumulados = [tf.Variable(tf.zeros_like(v), trainable=False) for v in variaveis]
+    contador = tf.Variable(0, dtype=tf.int64, trainable=False)
+    pendentes = tf.Variable(0, dtype=tf.int64, trainable=False)
+    
+    def aplicar():
+        escala = tf.cast(pendentes, tf.float32)
+        otimizador.apply_gradients(zip(
+            [a.read_value() / tf.cast(escala, a.dtype) for a in acumulados], variaveis
+        ))
+        for a in acumulados:
+            a.assign(tf.zeros_like(a))
+        pendentes.assign(0)
+        return tf.constant(True)
+    
+    def train_step(data):
+        x, y = data
+        with tf.GradientTape() as tape:
+            y_pred = model(x, training=True)
+            loss = model.compute_loss(x, y, y_pred)
+            if escala_perda:
+                loss = otimizador.get_scaled_loss(loss)
+        grads = tape.gradient(loss, variaveis)
+        if escala_perda:
+            grads = otimizador.get_unscaled_gradients(grads)
+        
+        for acumulado, grad in zip(acumulados, grads):
+            acumulado.assign_add(tf.cast(grad, acumulado.dtype))
+        contador.assign_add(1)
+        pendentes.assign_add(1)
+        fim_epoca = contador % lotes_por_epoca == 0
+        tf.cond(tf.logical_or(pendentes == passos, fim_epoca),
+                aplicar, lambda: tf.constant(False))
+        
+        return model.compute_metrics(x, y, y_pred, None)
+    
+    model.train_step = train_step
+
+
+def treinar_modelo(model: Sequential, dados: dict, callbacks: list,
+                   batch_size: int = BATCH_SIZE,
+                   accum_steps: int = ACCUM_STEPS) -> keras.callbacks.History:
     """
     Treina o modelo LSTM.
     
@@ -201,6 +421,10 @@ def treinar_modelo(model: Sequential, dados: dict, callbacks: list) -> keras.cal
         Dicionário com dados de treino e validação
     callbacks : list
         Lista de callbacks
+    batch_size : int
+        Amostras por lote
+    accum_steps : int
+        Lotes cujos gradientes são acumulados por atualização dos pesos
         
     Retorna:
     --------
@@ -212,7 +436,10 @@ def treinar_modelo(model: Sequential, dados: dict, callbacks: list) -> keras.cal
     
     print(f"   📊 Configurações:")
     print(f"      • Épocas: {EPOCHS}")
-    print(f"      • Batch Size: {BATCH_SIZE}")
+    print(f"      • Batch Size: {batch_size}")
+    if accum_steps > 1:
+        print(f"      • Acumulação de Gradientes: {accum_steps} lotes "
+              f"(batch efetivo {batch_size * accum_steps})")
     print(f"      • Amostras de Treino: {len(dados['X_train'])}")
     print(f"      • Amostras de Validação: {len(dados['X_val'])}\n")
     
@@ -221,12 +448,17 @@ def treinar_modelo(model: Sequential, dados: dict, callbacks: list) -> keras.cal
     
     inicio = datetime.now()
     
+    if accum_steps > 1:
+        lotes_por_epoca = -(-len(dados['X_train']) // batch_size)
+        _ativar_acumulacao_gradientes(model, accum_steps, lotes_por_epoca)
+    
+    # Lotes sob demanda: X/y mapeados em memória não são materializados inteiros
     history = model.fit(
-        dados['X_train'], 
-        dados['y_train'],
+        _criar_dataset(dados['X_train'], dados['y_train'], embaralhar=True,
+                       batch_size=batch_size),
         epochs=EPOCHS,
-        batch_size=BATCH_SIZE,
-        validation_data=(dados['X_val'], dados['y_val']),
+        validation_data=_criar_dataset(dados['X_val'], dados['y_val'], embaralhar=False,
+                                       batch_size=batch_size),
         callbacks=callbacks,
         verbose=VERBOSE
     )
@@ -246,6 +478,92 @@ def treinar_modelo(model: Sequential, dados: dict, callbacks: list) -> keras.cal
 # FUNÇÕES DE AVALIAÇÃO
 # ===================================================================
 
+if NUMBA_DISPONIVEL:
+    @njit(cache=True)
+    def _inverter_close(pred_norm, min_close, escala_close):
+        """Desnormaliza a coluna Close prevista em uma única passada."""
+        out = np.empty(pred_norm.shape[0])
+        for i in range(pred_norm.shape[0]):
+            out[i] = (pred_norm[i] - min_close) / escala_close
+        return out
+
+    @njit(cache=True)
+    def _estatisticas_erro(y_true, y_pred):
+        """
+        Somas de erro e estatísticas de y_true em uma única passada:
+        (sse, sae, sape, n_ape, media, mínimo, máximo, sst). A média e o
+        SST vêm de Welford; sape/n_ape ignoram valores reais nulos.
+        """
+        sse = 0.0
+        sae = 0.0
+        sape = 0.0
+        n_ape = 0
+        media = 0.0
+        sst = 0.0
+        mn = np.inf
+        mx = -np.inf
+        for i in range(y_true.shape[0]):
+            yt = y_true[i]
+            erro = yt - y_pred[i]
+            sse += erro * erro
+            sae += abs(erro)
+            if yt != 0.0:
+                sape += abs(erro / yt)
+                n_ape += 1
+            d = yt - media
+            media += d / (i + 1)
+            sst += d * (yt - media)
+            mn = min(mn, yt)
+            mx = max(mx, yt)
+        return sse, sae, sape, n_ape, media, mn, mx, sst
+else:
+    def _inverter_close(pred_norm, min_close, escala_close):
+        """Desnormaliza a coluna Close prevista (fallback NumPy)."""
+        return (pred_norm - min_close) / escala_close
+
+    def _estatisticas_erro(y_true, y_pred):
+        """
+        Somas de erro e estatísticas de y_true (fallback NumPy):
+        (sse, sae, sape, n_ape, media, mínimo, máximo, sst).
+        """
+        erro = y_true - y_pred
+        validos = y_true != 0.0
+        media = y_true.mean()
+        return (
+            float(np.dot(erro, erro)),
+            float(np.abs(erro).sum()),
+            float(np.abs(erro[validos] / y_true[validos]).sum()),
+            int(validos.sum()),
+            float(media),
+            float(y_true.min()),
+            float(y_true.max()),
+            float(np.dot(y_true - media, y_true - media))
+        )
+
+
+@functools.lru_cache(maxsize=4)
+def _funcao_inferencia(model: Sequential):
+    """
+    Passo forward do modelo compilado em grafo, uma vez por modelo.
+    
+    Em CPU o grafo é compilado com XLA (jit_compile), que funde as
+    operações da LSTM; em GPU mantém-se o grafo comum para que a LSTM
+    continue usando o kernel cuDNN. A assinatura com lote None evita
+    retraçar para cada tamanho de conjunto.
+    """
+    _, timesteps, features = model.input_shape
+    usar_xla = not tf.config.list_physical_devices('GPU')
+    
+    @tf.function(
+        jit_compile=usar_xla,
+        input_signature=[tf.TensorSpec((None, timesteps, features), tf.float32)]
+    )
+    def inferir(x):
+        return model(x, training=False)
+    
+    return inferir
+
+
 def fazer_predicoes(model: Sequential, X_test: np.ndarray, 
                     scaler, feature_idx: int = 3) -> Tuple[np.ndarray, np.ndarray]:
     """
@@ -272,22 +590,21 @@ def fazer_predicoes(model: Sequential, X_test: np.ndarray,
     
     # Predições normalizadas
     print(f"   📊 Predizendo em {len(X_test)} amostras...")
-    predicoes_norm = model.predict(X_test, verbose=0)
+    predicoes_norm = _funcao_inferencia(model)(
+        tf.constant(X_test, dtype=tf.float32)
+    ).numpy()
     print(f"   ✅ Predições concluídas - Shape: {predicoes_norm.shape}\n")
     
     # Inverter escala das predições
     print(f"   🔄 Invertendo normalização...")
     
-    # Criar array com todas as features (usar últimos valores de X_test)
-    # e substituir apenas a coluna Close pelas predições
-    ultima_sequencia = X_test[:, -1, :]  # Pegar último timestep de cada sequência
-    
-    # Criar cópia para predições
-    predicoes_full = np.copy(ultima_sequencia)
-    predicoes_full[:, feature_idx] = predicoes_norm.flatten()
-    
-    # Inverter escala
-    predicoes_original = scaler.inverse_transform(predicoes_full)[:, feature_idx]
+    # Inverso do MinMaxScaler só na coluna Close: x = (x_norm - min_) / scale_
+    # (sem montar linhas completas para scaler.inverse_transform)
+    predicoes_original = _inverter_close(
+        predicoes_norm.ravel().astype(np.float64),
+        float(scaler.min_[feature_idx]),
+        float(scaler.scale_[feature_idx])
+    )
     
     print(f"   ✅ Escala invertida - Predições em valores originais\n")
     
@@ -318,19 +635,25 @@ def calcular_metricas(y_true: np.ndarray, y_pred: np.ndarray,
     print(f"📏 Calculando Métricas de Desempenho:")
     print(f"{'─'*70}\n")
     
+    # Todas as somas em uma única passada sobre y_true/y_pred
+    sse, sae, sape, n_ape, preco_medio, preco_min, preco_max, sst = _estatisticas_erro(
+        np.asarray(y_true, dtype=np.float64).ravel(),
+        np.asarray(y_pred, dtype=np.float64).ravel()
+    )
+    n = len(y_true)
+    
     # Métricas em escala original
-    mse = mean_squared_error(y_true, y_pred)
+    mse = sse / n
     rmse = np.sqrt(mse)
-    mae = mean_absolute_error(y_true, y_pred)
-    r2 = r2_score(y_true, y_pred)
-    
-    # MAPE (Mean Absolute Percentage Error)
-    mape = np.mean(np.abs((y_true - y_pred) / y_true)) * 100
+    mae = sae / n
+    # y_true constante: mesma convenção do sklearn (1.0 se a predição é exata)
+    if sst > 0:
+        r2 = 1.0 - sse / sst
+    else:
+        r2 = 1.0 if sse == 0 else 0.0
     
-    # Estatísticas dos dados
-    preco_medio = np.mean(y_true)
-    preco_min = np.min(y_true)
-    preco_max = np.max(y_true)
+    # MAPE (Mean Absolute Percentage Error); dias com preço real 0 são ignorados
+    mape = 100.0 * sape / n_ape if n_ape else np.nan
     
     # Erro percentual em relação ao preço médio
     erro_pct_medio = (rmse / preco_medio) * 100
@@ -389,6 +712,8 @@ def visualizar_curvas_aprendizado(history: keras.callbacks.History) -> None:
     history : History
         Histórico do treinamento
     """
+    plt = _pyplot()
+    
     print(f"📊 Gerando Curvas de Aprendizado:")
     print(f"{'─'*70}\n")
     
@@ -440,6 +765,8 @@ def visualizar_predicoes(y_true: np.ndarray, y_pred: np.ndarray,
     metricas : dict
         Métricas calculadas
     """
+    plt = _pyplot()
+    
     print(f"📈 Gerando Gráfico de Predições:")
     print(f"{'─'*70}\n")
     
@@ -500,7 +827,9 @@ def visualizar_predicoes(y_true: np.ndarray, y_pred: np.ndarray,
 # FUNÇÕES DE PERSISTÊNCIA
 # ===================================================================
 
-def salvar_resultados(history: keras.callbacks.History, metricas: dict) -> None:
+def salvar_resultados(history: keras.callbacks.History, metricas: dict,
+                      batch_size: int = BATCH_SIZE,
+                      accum_steps: int = ACCUM_STEPS) -> None:
     """
     Salva resultados do treinamento e avaliação.
     
@@ -510,18 +839,24 @@ def salvar_resultados(history: keras.callbacks.History, metricas: dict) -> None:
         Histórico do treinamento
     metricas : dict
         Métricas calculadas
+    batch_size : int
+        Amostras por lote usadas no treino
+    accum_steps : int
+        Lotes acumulados por atualização dos pesos
     """
     print(f"💾 Salvando Resultados:")
     print(f"{'─'*70}\n")
     
-    # Preparar dados do histórico
+    # Preparar dados do histórico (um cast vetorizado por série)
     historico = {
-        'loss': [float(x) for x in history.history['loss']],
-        'val_loss': [float(x) for x in history.history['val_loss']],
-        'mae': [float(x) for x in history.history['mae']],
-        'val_mae': [float(x) for x in history.history['val_mae']],
-        'epocas': len(history.history['loss'])
+        chave: np.asarray(history.history[chave], dtype=np.float64).tolist()
+        for chave in ('loss', 'val_loss', 'mae', 'val_mae')
     }
+    historico['epocas'] = len(historico['loss'])
+    
+    # Melhor época: um único argmin, reaproveitado para o valor
+    val_loss = np.asarray(historico['val_loss'])
+    melhor_idx = int(val_loss.argmin())
     
     # Criar log completo
     log_data = {
@@ -529,24 +864,34 @@ def salvar_resultados(history: keras.callbacks.History, metricas: dict) -> None:
         'treinamento': {
             'epocas_configuradas': EPOCHS,
             'epocas_executadas': historico['epocas'],
-            'batch_size': BATCH_SIZE,
+            'batch_size': batch_size,
+            'accum_steps': accum_steps,
+            'batch_efetivo': batch_size * accum_steps,
+            'dtype_policy': keras.mixed_precision.global_policy().name,
             'early_stopping_patience': EARLY_STOPPING_PATIENCE,
             'final_train_loss': historico['loss'][-1],
             'final_val_loss': historico['val_loss'][-1],
             'final_train_mae': historico['mae'][-1],
             'final_val_mae': historico['val_mae'][-1],
-            'best_val_loss': float(min(historico['val_loss'])),
-            'best_epoch': int(np.argmin(historico['val_loss']) + 1)
+            'best_val_loss': float(val_loss[melhor_idx]),
+            'best_epoch': melhor_idx + 1
         },
         'metricas_teste': metricas,
         'historico': historico,
         'interpretacao': interpretar_resultados(metricas, historico)
     }
     
-    # Salvar JSON
+    # Salvar JSON (orjson, se disponível, em uma única escrita)
     log_path = os.path.join(DOCS_DIR, 'training_results.json')
-    with open(log_path, 'w', encoding='utf-8') as f:
-        json.dump(log_data, f, indent=4, ensure_ascii=False)
+    if ORJSON_DISPONIVEL:
+        with open(log_path, 'wb') as f:
+            f.write(orjson.dumps(
+                log_data,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            ))
+    else:
+        with open(log_path, 'w', encoding='utf-8') as f:
+            json.dump(log_data, f, indent=4, ensure_ascii=False)
     
     tamanho_kb = os.path.getsize(log_path) / 1024
     print(f"   ✅ Resultados salvos: {log_path} ({tamanho_kb:.2f} KB)\n")
@@ -619,25 +964,39 @@ def interpretar_resultados(metricas: dict, historico: dict) -> dict:
 # FUNÇÃO PRINCIPAL
 # ===================================================================
 
-def main():
+def main(fp16: bool = False, batch_size: int = BATCH_SIZE,
+         accum_steps: int = ACCUM_STEPS):
     """
     Função principal que executa todo o pipeline de treinamento e avaliação.
+    
+    Parâmetros:
+    -----------
+    fp16 : bool
+        Precisão mista (mixed_float16), apenas sob demanda
+    batch_size : int
+        Amostras por lote
+    accum_steps : int
+        Lotes acumulados por atualização (batch efetivo = batch_size × accum_steps)
     """
     try:
         # 1. Carregar dados e scaler
         dados = carregar_dados_preparados()
         scaler = carregar_scaler()
         
-        # 2. Construir e compilar modelo
+        # 2. Construir e compilar modelo (FP16 misto só com --fp16)
+        if ativar_precisao_mista(fp16):
+            print(f"⚡ Precisão mista ativada (mixed_float16)\n")
         model = construir_modelo_lstm()
         model = compilar_modelo(model)
         
         # 3. Configurar callbacks
-        model_path = os.path.join(MODELS_DIR, 'lstm_model_best.h5')
+        # Formato nativo .keras (zip com config + pesos): carrega mais rápido que HDF5
+        model_path = os.path.join(MODELS_DIR, 'lstm_model_best.keras')
         callbacks = configurar_callbacks(model_path)
         
         # 4. Treinar modelo
-        history = treinar_modelo(model, dados, callbacks)
+        history = treinar_modelo(model, dados, callbacks,
+                                 batch_size=batch_size, accum_steps=accum_steps)
         
         # 5. Carregar melhor modelo
         print(f"📥 Carregando Melhor Modelo:")
@@ -647,13 +1006,19 @@ def main():
         print(f"   ✅ Melhor modelo carregado\n")
         
         # 6. Fazer predições
-        y_pred_original, y_pred_norm = fazer_predicoes(model, dados['X_test'], scaler)
+        # X_test pode ser uma view com strides sobre o arquivo mapeado:
+        # materializa uma vez em float32 contíguo para o TF e o scaler
+        X_test = np.ascontiguousarray(dados['X_test'], dtype=np.float32)
+        y_pred_original, y_pred_norm = fazer_predicoes(model, X_test, scaler)
         
         # Inverter escala dos valores reais de teste
-        # Pegar último timestep de cada sequência
-        ultima_sequencia_test = dados['X_test'][:, -1, :]
-        y_test_full = scaler.inverse_transform(ultima_sequencia_test)
-        y_test_original = y_test_full[:, 3]  # Índice 3 = Close
+        # Close (índice 3) do último timestep de cada sequência, desnormalizado
+        # pelo mesmo kernel das predições (sem inverse_transform das 5 colunas)
+        y_test_original = _inverter_close(
+            X_test[:, -1, 3].astype(np.float64),
+            float(scaler.min_[3]),
+            float(scaler.scale_[3])
+        )
         
         # 7. Calcular métricas
         metricas = calcular_metricas(y_test_original, y_pred_original,
@@ -664,14 +1029,15 @@ def main():
         visualizar_predicoes(y_test_original, y_pred_original, metricas)
         
         # 9. Salvar resultados
-        salvar_resultados(history, metricas)
+        salvar_resultados(history, metricas,
+                          batch_size=batch_size, accum_steps=accum_steps)
         
         # 10. Exibir resumo final
         print(f"{'='*70}")
         print(f"✅ FASE 4 CONCLUÍDA COM SUCESSO!")
         print(f"{'='*70}\n")
         print(f"📁 Arquivos gerados:")
-        print(f"   → models/lstm_model_best.h5")
+        print(f"   → models/lstm_model_best.keras")
         print(f"   → docs/training/training_results.json")
         print(f"   → docs/training/curvas_aprendizado.png")
         print(f"   → docs/training/resultado_teste.png")
@@ -695,4 +1061,14 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Treinamento e avaliação do modelo LSTM (Fase 4)")
+    parser.add_argument('--fp16', action=argparse.BooleanOptionalAction, default=False,
+                        help="Treino em precisão mista FP16 (padrão: desativado)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"Amostras por lote (padrão: {BATCH_SIZE})")
+    parser.add_argument('--accum-steps', type=int, default=ACCUM_STEPS,
+                        help="Lotes com gradientes acumulados por atualização (padrão: 1)")
+    args = parser.parse_args()
+    main(fp16=args.fp16, batch_size=args.batch_size, accum_steps=args.accum_steps)
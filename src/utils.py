@@ -12,11 +12,19 @@ Versão: 1.0.0
 import os
 import json
 import pickle
+import functools
 from datetime import datetime
 from typing import Any, Dict, List
 import numpy as np
 import pandas as pd
 
+# Serializador JSON rápido (opcional)
+try:
+    import orjson
+    ORJSON_DISPONIVEL = True
+except ImportError:
+    ORJSON_DISPONIVEL = False
+
 
 def criar_diretorio(caminho: str) -> None:
     """
@@ -30,9 +38,23 @@ def criar_diretorio(caminho: str) -> None:
     os.makedirs(caminho, exist_ok=True)
 
 
+def _tipo_nativo(obj: Any) -> Any:
+    """Converte tipos NumPy para tipos Python nativos (fallback do json)."""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Tipo não serializável em JSON: {type(obj).__name__}")
+
+
 def salvar_json(dados: Dict, caminho: str) -> None:
     """
-    Salva dados em formato JSON.
+    Salva dados em formato JSON (UTF-8, indentado).
+    
+    Usa orjson quando disponível; tipos NumPy (escalares e arrays) são
+    serializados diretamente nos dois caminhos.
     
     Parâmetros:
     -----------
@@ -41,8 +63,13 @@ def salvar_json(dados: Dict, caminho: str) -> None:
     caminho : str
         Caminho do arquivo
     """
+    if ORJSON_DISPONIVEL:
+        with open(caminho, 'wb') as f:
+            f.write(orjson.dumps(dados, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        return
+    
     with open(caminho, 'w', encoding='utf-8') as f:
-        json.dump(dados, f, indent=4, ensure_ascii=False)
+        json.dump(dados, f, indent=4, ensure_ascii=False, default=_tipo_nativo)
 
 
 def carregar_json(caminho: str) -> Dict:
@@ -140,6 +167,100 @@ def calcular_metricas_basicas(valores_reais: np.ndarray,
     }
 
 
+def indices_lttb(valores: np.ndarray, n_out: int = 5000) -> np.ndarray:
+    """
+    Seleciona pontos de uma série para plotagem (Largest-Triangle-Three-Buckets).
+    
+    Mantém o primeiro e o último ponto e, em cada bucket intermediário, o
+    ponto que forma o maior triângulo com o ponto escolhido no bucket
+    anterior e a média do próximo, preservando picos e vales visíveis.
+    
+    Parâmetros:
+    -----------
+    valores : np.ndarray
+        Série (1D) a reduzir, em ordem temporal
+    n_out : int
+        Número máximo de pontos retornados
+        
+    Retorna:
+    --------
+    np.ndarray
+        Índices (ordenados) dos pontos selecionados; todos se len <= n_out
+    """
+    y = np.asarray(valores, dtype=np.float64)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    
+    # Buckets intermediários (o primeiro e o último ponto são fixos)
+    limites = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selecionados = np.empty(n_out, dtype=np.int64)
+    selecionados[0] = 0
+    selecionados[-1] = n - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        
+        # Média do próximo bucket (ou o último ponto, no bucket final)
+        if i + 2 < len(limites):
+            prox = slice(limites[i + 1], limites[i + 2])
+            x_med, y_med = (prox.start + prox.stop - 1) / 2.0, y[prox].mean()
+        else:
+            x_med, y_med = n - 1.0, y[-1]
+        
+        # Área (x2) do triângulo (a, candidato, média do próximo bucket)
+        x = np.arange(inicio, fim)
+        areas = np.abs((a - x_med) * (y[inicio:fim] - y[a]) - (a - x) * (y_med - y[a]))
+        a = inicio + int(np.argmax(areas))
+        selecionados[i + 1] = a
+    
+    return selecionados
+
+
+@functools.lru_cache(maxsize=None)
+def _criar_figura(nrows: int, ncols: int, figsize: tuple):
+    """Cria Figure + eixos com canvas Agg (sem o estado global do pyplot)."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots(nrows, ncols, squeeze=False)
+
+
+def figura_reutilizavel(nrows: int = 1, ncols: int = 1, figsize: tuple = (10, 8)):
+    """
+    Retorna uma figura em cache para o layout pedido, pronta para redesenho.
+    
+    A figura e a grade de eixos são criadas uma vez por processo; nas
+    chamadas seguintes os eixos da grade são limpos e eixos extras
+    (twinx, colorbar) removidos. Salve com fig.savefig.
+    
+    Parâmetros:
+    -----------
+    nrows, ncols : int
+        Dimensões da grade de eixos
+    figsize : tuple
+        Tamanho da figura em polegadas
+        
+    Retorna:
+    --------
+    tuple
+        (Figure, array 2D de Axes)
+    """
+    fig, axes = _criar_figura(nrows, ncols, tuple(figsize))
+    
+    grade = set(axes.flat)
+    for ax in list(fig.axes):
+        if ax in grade:
+            ax.clear()
+        else:
+            ax.remove()
+    
+    return fig, axes
+
+
 def printar_separador(titulo: str = "", char: str = "=", largura: int = 70) -> None:
     """
     Imprime separador formatado.
@@ -0,0 +1,139 @@
+"""
+Testes do Pipeline do Modelo (Fases 4 e 5)
+
+Valida o reaproveitamento da verificação de artefatos por fingerprint e
+as métricas de avaliação contra o sklearn.
+"""
+
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from sklearn.metrics import (mean_absolute_error, mean_absolute_percentage_error,
+                             mean_squared_error, r2_score)
+
+# Add root to path
+ROOT_DIR = Path(__file__).parent
+sys.path.append(str(ROOT_DIR / "src"))
+
+import model_persistence
+from model_training import calcular_metricas
+
+
+def test_fingerprint_reuse():
+    """Testa o fingerprint dos artefatos e o reaproveitamento da verificação."""
+    print("\n" + "="*60)
+    print("TEST 1: Artifact Fingerprint")
+    print("="*60)
+
+    docs_dir_original = model_persistence.DOCS_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "model.keras")
+        scaler_path = os.path.join(tmp, "scaler.pkl")
+        tflite_path = os.path.join(tmp, "model.tflite")
+        for path, conteudo in ((model_path, b"pesos"), (scaler_path, b"scaler"),
+                               (tflite_path, b"tflite")):
+            with open(path, 'wb') as f:
+                f.write(conteudo)
+
+        model_persistence.DOCS_DIR = tmp
+        try:
+            fingerprint = model_persistence.calcular_fingerprint(model_path, scaler_path)
+            assert fingerprint == model_persistence.calcular_fingerprint(model_path, scaler_path)
+
+            # Sem verificação salva: nada a reaproveitar
+            assert model_persistence.carregar_verificacao_anterior(fingerprint) is None
+
+            model_persistence.salvar_verificacao(
+                fingerprint,
+                model_meta={'formato': 'Keras'},
+                scaler_meta={'tipo': 'MinMaxScaler'},
+                teste_predicao={'status': 'sucesso'},
+                artefatos={'tflite': {'existe': True, 'caminho': tflite_path},
+                           'tensorrt': {'existe': False}}
+            )
+            anterior = model_persistence.carregar_verificacao_anterior(fingerprint)
+            assert anterior is not None
+            assert anterior['model_meta'] == {'formato': 'Keras'}
+            print(f"✅ Unchanged artifacts reuse the previous verification")
+
+            # Modelo alterado: fingerprint novo, verificação refeita
+            with open(model_path, 'ab') as f:
+                f.write(b"!")
+            novo = model_persistence.calcular_fingerprint(model_path, scaler_path)
+            assert novo != fingerprint
+            assert model_persistence.carregar_verificacao_anterior(novo) is None
+            print(f"✅ Changed model invalidates the fingerprint")
+
+            # Exportação apagada desde a verificação: precisa ser refeita
+            os.remove(tflite_path)
+            assert model_persistence.carregar_verificacao_anterior(fingerprint) is None
+            print(f"✅ Missing TFLite export forces a new verification")
+
+            # Teste de predição com falha nunca é reaproveitado
+            cache_path = os.path.join(tmp, model_persistence.FINGERPRINT_FILE)
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            cache['tflite'] = None
+            cache['teste_predicao'] = {'status': 'falha'}
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            assert model_persistence.carregar_verificacao_anterior(fingerprint) is None
+            print(f"✅ Failed prediction test is not reused")
+        finally:
+            model_persistence.DOCS_DIR = docs_dir_original
+
+
+def test_metricas_vs_sklearn():
+    """Testa as métricas de passada única contra o sklearn."""
+    print("\n" + "="*60)
+    print("TEST 2: Metrics vs sklearn")
+    print("="*60)
+
+    rng = np.random.default_rng(42)
+    y_true = 30 + np.cumsum(rng.normal(0, 0.5, 500))
+    y_pred = y_true + rng.normal(0, 0.8, 500)
+
+    metricas = calcular_metricas(y_true, y_pred, y_true, y_pred)
+    assert np.isclose(metricas['mse'], mean_squared_error(y_true, y_pred))
+    assert np.isclose(metricas['rmse'], np.sqrt(mean_squared_error(y_true, y_pred)))
+    assert np.isclose(metricas['mae'], mean_absolute_error(y_true, y_pred))
+    assert np.isclose(metricas['r2_score'], r2_score(y_true, y_pred))
+    assert np.isclose(metricas['mape'],
+                      100 * mean_absolute_percentage_error(y_true, y_pred))
+    print(f"✅ MSE, RMSE, MAE, MAPE and R² match sklearn")
+
+    # y_true constante (sst == 0): sem divisão por zero, mesma convenção do sklearn
+    constante = np.full(50, 25.0)
+    for predito in (constante, constante + rng.normal(0, 0.1, 50)):
+        metricas = calcular_metricas(constante, predito, constante, predito)
+        assert np.isfinite(metricas['r2_score'])
+        assert metricas['r2_score'] == r2_score(constante, predito)
+    print(f"✅ Constant y_true gives R² = sklearn's (1.0 exact, 0.0 otherwise)")
+
+
+def main():
+    """Executa todos os testes."""
+    print("\n" + "="*70)
+    print("🧪 TESTE DO PIPELINE DO MODELO")
+    print("="*70)
+
+    try:
+        test_fingerprint_reuse()
+        test_metricas_vs_sklearn()
+
+        print("\n" + "="*70)
+        print("✅ TODOS OS TESTES PASSARAM!")
+        print("="*70)
+
+    except Exception as e:
+        print(f"\n❌ ERRO: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
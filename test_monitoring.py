@@ -7,6 +7,7 @@ Valida funcionalidades de logging, performance tracking e drift detection.
 import sys
 import json
 import numpy as np
+import pandas as pd
 from pathlib import Path
 
 # Add root to path
@@ -15,8 +16,10 @@ sys.path.append(str(ROOT_DIR))
 
 from api.monitoring import PredictionLogger, MetricsLogger
 from src.performance_monitor import PerformanceMonitor
-from src.drift_detector import DriftDetector
+from src.drift_detector import DriftDetector, SlidingWindowDriftDetector
 from src.alert_system import AlertSystem, AlertThresholds
+from src.adwin import ADWIN
+from src._drift_kernels import QUANTIS, batch_window_stats, welford_min_max
 
 
 def test_prediction_logging():
@@ -135,6 +138,16 @@ def test_alert_system():
     for v in violations:
         print(f"   • {v}")
     
+    # Testa verificação vetorizada (vários registros de uma vez)
+    batch = {
+        "mae": np.array([1.0, 2.5, 1.5, 0.5]),
+        "mape": np.array([3.0, 4.0, 6.0, 1.0])
+    }
+    mask = alert_system.check_performance_metrics_batch(batch)
+    assert np.flatnonzero(mask).tolist() == [1, 2]
+    print(f"✅ Batch check completed")
+    print(f"   Violating records: {np.flatnonzero(mask).tolist()}")
+    
     # Envia alerta de teste
     alert_system.send_alert(
         alert_type="test",
@@ -214,6 +227,95 @@ def test_integration():
     print(f"\n✅ Integration test completed successfully")
 
 
+def test_adwin():
+    """Testa a janela adaptativa (ADWIN)."""
+    print("\n" + "="*60)
+    print("TEST 6: ADWIN")
+    print("="*60)
+    
+    rng = np.random.default_rng(42)
+    
+    # Série estacionária: nenhum corte, janela cresce com os dados
+    adwin = ADWIN(clock=1)
+    cortes = sum(adwin.update(v) for v in rng.normal(12.0, 0.5, 2000))
+    assert cortes == 0
+    assert adwin.width == 2000
+    assert abs(adwin.mean - 12.0) < 0.1
+    print(f"✅ Stationary input: no change, width={adwin.width}")
+    
+    # Degrau na média: corte detectado e janela encolhe para o regime novo
+    adwin = ADWIN(clock=1)
+    for v in rng.normal(12.0, 0.5, 1000):
+        adwin.update(v)
+    detectado_em = None
+    for i, v in enumerate(rng.normal(15.0, 0.5, 500)):
+        if adwin.update(v) and detectado_em is None:
+            detectado_em = i
+    assert detectado_em is not None and detectado_em < 50
+    assert adwin.width < 600
+    assert abs(adwin.mean - 15.0) < 0.5
+    print(f"✅ Mean shift detected after {detectado_em} samples, width={adwin.width}")
+
+
+def test_drift_kernels():
+    """Testa os kernels de estatísticas contra o NumPy."""
+    print("\n" + "="*60)
+    print("TEST 7: Drift Kernels")
+    print("="*60)
+    
+    rng = np.random.default_rng(7)
+    
+    # Um array grande: média, desvio populacional e extremos em uma passada
+    x = rng.lognormal(2.5, 0.3, 10_001)
+    mean, std, mn, mx = welford_min_max(x)
+    assert np.allclose([mean, std, mn, mx], [x.mean(), x.std(), x.min(), x.max()])
+    print(f"✅ welford_min_max matches NumPy")
+    
+    # Várias features (colunas) de uma vez
+    data2d = rng.normal(12.0, 2.0, (251, 5))
+    n_features = data2d.shape[1]
+    out_mean, out_std, out_min, out_max = (np.empty(n_features) for _ in range(4))
+    out_quantis = np.empty((len(QUANTIS), n_features))
+    batch_window_stats(data2d, out_mean, out_std, out_min, out_max, out_quantis)
+    
+    assert np.allclose(out_mean, data2d.mean(axis=0))
+    assert np.allclose(out_std, data2d.std(axis=0))
+    assert np.array_equal(out_min, data2d.min(axis=0))
+    assert np.array_equal(out_max, data2d.max(axis=0))
+    assert np.allclose(out_quantis, np.percentile(data2d, [q * 100 for q in QUANTIS], axis=0))
+    print(f"✅ batch_window_stats matches NumPy for {n_features} features")
+
+
+def test_batched_wasserstein():
+    """Testa o Wasserstein por lotes com as janelas padrão (30/7 dias)."""
+    print("\n" + "="*60)
+    print("TEST 8: Batched Wasserstein")
+    print("="*60)
+    
+    rng = np.random.default_rng(42)
+    datas = pd.date_range("2025-01-01", periods=37, freq="B")
+    
+    def analisar(media_atual):
+        valores = np.concatenate([rng.normal(12.0, 0.2, 30), rng.normal(media_atual, 0.2, 7)])
+        detector = SlidingWindowDriftDetector(reference_window_days=30, current_window_days=7)
+        return detector.detect_drift_sliding_window(pd.DataFrame({"Close": valores}, index=datas), "Close")
+    
+    # Janela estável: o teste roda (3 lotes de 2 pontos) e não acusa drift
+    estavel = analisar(12.0)["comparisons"]["batched_wasserstein"]
+    assert estavel is not None
+    assert estavel["n_batches"] == 3 and estavel["batch_size"] == 2
+    assert estavel["p_value"] >= 0.05
+    print(f"✅ Stable window: p={estavel['p_value']:.3f}")
+    
+    # Janela atual deslocada: lotes mais distantes da base e alerta emitido
+    report = analisar(15.0)
+    deslocado = report["comparisons"]["batched_wasserstein"]
+    assert deslocado["p_value"] < 0.05
+    assert deslocado["mean_distance_current"] > deslocado["mean_distance_reference"]
+    assert any("Wasserstein" in alerta for alerta in report["alerts"])
+    print(f"✅ Shifted window flagged: p={deslocado['p_value']:.5f}")
+
+
 def main():
     """Executa todos os testes."""
     print("\n" + "="*70)
@@ -226,6 +328,9 @@ def main():
         test_drift_detector()
         test_alert_system()
         test_integration()
+        test_adwin()
+        test_drift_kernels()
+        test_batched_wasserstein()
         
         print("\n" + "="*70)
         print("✅ TODOS OS TESTES PASSARAM!")
@@ -237,7 +342,7 @@ def main():
         print("   • monitoring/predictions_tracking.json - Banco de previsões")
         print("   • monitoring/performance_metrics.json - Métricas históricas")
         print("   • monitoring/reference_statistics.json - Estatísticas de referência")
-        print("   • monitoring/drift_reports.json - Relatórios de drift")
+        print("   • monitoring/drift_reports.ndjson - Relatórios de drift")
         print("   • monitoring/alert_history.json - Histórico de alertas")
         print("   • monitoring/alert_config.json - Configuração de alertas")
         